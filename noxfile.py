@@ -41,3 +41,11 @@ def docs(session: nox.Session) -> None:
         shutil.rmtree(build_dir)
 
     session.run("sphinx-autobuild", *args)
+
+
+@nox.session(python="3.13")
+def benchmark(session: nox.Session) -> None:
+    """Run the benchmark suite over a synthetic corpus, and save the results as json."""
+    args = session.posargs or ["--bench-results-json", "benchmark.json"]
+    session.install(".", "pytest")
+    session.run("pytest", "tests/benchmarks", "--runslow", *args)
@@ -0,0 +1,229 @@
+"""Measure extraction throughput, latency, and memory use."""
+
+import json
+import multiprocessing
+import os
+import platform
+import sys
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import pdfminer
+
+from pfmsoft.pdf2txt import __version__
+from pfmsoft.pdf2txt.extract_txt import count_pdf_pages, extract_text_from_pdf_to_file
+from pfmsoft.pdf2txt.metrics import latency_summary
+from pfmsoft.pdf2txt.options import LayoutMode
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None  # type: ignore[assignment]
+
+
+@dataclass
+class BenchmarkResult:
+    """The measurements from one benchmark run."""
+
+    name: str
+    files: int
+    pages: int
+    bytes_in: int
+    seconds: float
+    pages_per_second: float
+    mb_per_second: float
+    latency_seconds: dict[str, float] = field(default_factory=dict)
+    peak_rss_bytes: int = 0
+    peak_rss_children_bytes: int = 0
+
+    def peak_memory(self) -> int:
+        """The larger of this process's and its worker processes' peak RSS."""
+        return max(self.peak_rss_bytes, self.peak_rss_children_bytes)
+
+
+def peak_rss() -> tuple[int, int]:
+    """Peak resident set size in bytes, of this process and of its waited for children.
+
+    Returns zeros where the `resource` module is not available.
+    """
+    if resource is None:
+        return 0, 0
+    # ru_maxrss is in kilobytes on Linux, and in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    )
+
+
+def make_result(
+    name: str,
+    file_paths: Sequence[Path],
+    seconds: float,
+    latencies: Sequence[float],
+) -> BenchmarkResult:
+    """Build a result from the files processed and the time taken."""
+    pages = sum(count_pdf_pages(file_path) for file_path in file_paths)
+    bytes_in = sum(file_path.stat().st_size for file_path in file_paths)
+    rss, rss_children = peak_rss()
+    return BenchmarkResult(
+        name=name,
+        files=len(file_paths),
+        pages=pages,
+        bytes_in=bytes_in,
+        seconds=seconds,
+        pages_per_second=pages / seconds if seconds else 0.0,
+        mb_per_second=bytes_in / 1_000_000 / seconds if seconds else 0.0,
+        latency_seconds=latency_summary(latencies),
+        peak_rss_bytes=rss,
+        peak_rss_children_bytes=rss_children,
+    )
+
+
+def benchmark_extract_files(
+    file_paths: Sequence[Path], path_out: Path, name: str = "extract_file"
+) -> BenchmarkResult:
+    """Benchmark `extract_text_from_pdf_to_file`, one file after another."""
+    latencies = []
+    start = perf_counter()
+    for file_path in file_paths:
+        file_start = perf_counter()
+        extract_text_from_pdf_to_file(
+            file_path, path_out / f"{file_path.stem}.txt", overwrite=True
+        )
+        latencies.append(perf_counter() - file_start)
+    seconds = perf_counter() - start
+    return make_result(
+        name=name, file_paths=file_paths, seconds=seconds, latencies=latencies
+    )
+
+
+def benchmark_extract_all(
+    path_in: Path,
+    path_out: Path,
+    workers: int = 1,
+    name: str = "extract_all",
+    layout: LayoutMode = LayoutMode.FULL,
+) -> BenchmarkResult:
+    """Benchmark the `extract all` batch path over a directory.
+
+    Per file latency is only reported for a single worker, where it is the time
+    between one file finishing and the next.
+    """
+    # The cli module pulls in typer and rich, only needed for this benchmark.
+    from pfmsoft.pdf2txt.cli.extract_txt_cli import (
+        build_jobs_from_directory,
+        resolve_workers,
+        run_jobs,
+    )
+
+    jobs = build_jobs_from_directory(
+        path_in=path_in,
+        path_out=path_out,
+        recurse=True,
+        overwrite=True,
+        halt_on_fail=True,
+        layout=layout,
+    )
+    workers = resolve_workers(workers)
+    latencies = []
+    start = perf_counter()
+    last = start
+    for _ in run_jobs(jobs=jobs, workers=workers):
+        now = perf_counter()
+        latencies.append(now - last)
+        last = now
+    seconds = perf_counter() - start
+    return make_result(
+        name=name,
+        file_paths=[job.path_in for job in jobs],
+        seconds=seconds,
+        latencies=latencies if workers == 1 else [],
+    )
+
+
+def run_isolated(
+    func: Callable[..., BenchmarkResult], *args: Any, **kwargs: Any
+) -> BenchmarkResult:
+    """Run a benchmark in a fresh process, so the peak RSS belongs to it alone."""
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return executor.submit(func, *args, **kwargs).result()
+
+
+def environment() -> dict[str, Any]:
+    """Describe the environment a benchmark ran in."""
+    return {
+        "timestamp": datetime.now(UTC).isoformat(),
+        "version": __version__,
+        "pdfminer_version": pdfminer.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: Path, results: Iterable[BenchmarkResult]):
+    """Save benchmark results and their environment as json."""
+    data = {
+        "environment": environment(),
+        "results": [asdict(result) for result in results],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def load_results(path: Path) -> list[BenchmarkResult]:
+    """Load benchmark results saved by `write_results`."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return [BenchmarkResult(**result) for result in data["results"]]
+
+
+def compare_results(
+    baseline: BenchmarkResult,
+    current: BenchmarkResult,
+    max_throughput_drop: float = 10.0,
+    max_memory_increase: float = 10.0,
+) -> list[str]:
+    """Compare a result to a baseline.
+
+    Args:
+        baseline: The earlier result.
+        current: The new result.
+        max_throughput_drop: Allowed drop in pages/sec, as a percent.
+        max_memory_increase: Allowed increase in peak memory, as a percent.
+
+    Returns:
+        A description of each regression past a threshold. Empty if there are none.
+    """
+    regressions = []
+    throughput_change = percent_change(
+        baseline.pages_per_second, current.pages_per_second
+    )
+    if -throughput_change > max_throughput_drop:
+        regressions.append(
+            f"Throughput fell {-throughput_change:.1f}% "
+            f"({baseline.pages_per_second:.2f} -> {current.pages_per_second:.2f} "
+            f"pages/sec), more than the allowed {max_throughput_drop}%."
+        )
+    memory_change = percent_change(baseline.peak_memory(), current.peak_memory())
+    if memory_change > max_memory_increase:
+        regressions.append(
+            f"Peak memory rose {memory_change:.1f}% "
+            f"({baseline.peak_memory()} -> {current.peak_memory()} bytes), "
+            f"more than the allowed {max_memory_increase}%."
+        )
+    return regressions
+
+
+def percent_change(before: float, after: float) -> float:
+    """Percent change from one value to another, 0 if the first value is 0."""
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
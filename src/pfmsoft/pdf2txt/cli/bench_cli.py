@@ -0,0 +1,127 @@
+"""Command-line interface for benchmarking extraction on a chosen corpus."""
+
+import re
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import TYPE_CHECKING, Annotated
+
+import typer
+
+from pfmsoft.pdf2txt.options import LayoutMode
+
+if TYPE_CHECKING:
+    from pfmsoft.pdf2txt.benchmark import BenchmarkResult
+
+
+def baseline_path(name: str) -> Path:
+    """Get the path of a named baseline in the application directory."""
+    if not re.fullmatch(r"[\w.-]+", name):
+        raise typer.BadParameter(
+            f"Baseline name {name!r} may only use letters, digits, '_', '.', and '-'."
+        )
+    # Imported here, as main_typer imports this module.
+    from pfmsoft.pdf2txt.cli.main_typer import app_dir
+
+    return app_dir() / "baselines" / f"{name}.json"
+
+
+def bench(
+    ctx: typer.Context,
+    path_in: Annotated[
+        Path,
+        typer.Argument(
+            help="Directory of pdf files to benchmark, searched recursively.",
+            exists=True,
+            file_okay=False,
+            dir_okay=True,
+        ),
+    ],
+    save_baseline: Annotated[
+        str | None,
+        typer.Option(help="Save the result as a baseline with this name."),
+    ] = None,
+    baseline: Annotated[
+        str | None,
+        typer.Option(help="Compare the result to the baseline with this name."),
+    ] = None,
+    workers: Annotated[
+        int,
+        typer.Option(
+            min=0, help="Number of worker processes. 0 uses all available cores."
+        ),
+    ] = 1,
+    max_throughput_drop: Annotated[
+        float,
+        typer.Option(help="Fail if pages/sec falls by more than this percent."),
+    ] = 10.0,
+    max_memory_increase: Annotated[
+        float,
+        typer.Option(help="Fail if peak memory rises by more than this percent."),
+    ] = 10.0,
+    layout: Annotated[
+        LayoutMode,
+        typer.Option(help="Layout analysis to benchmark: full, fast, or none."),
+    ] = LayoutMode.FULL,
+):
+    """Benchmark the extraction pipeline on a directory of pdf files.
+
+    The files are extracted with the same batch path as `extract all`, to a
+    temporary directory. The result can be saved as a named baseline, and later
+    runs compared to it. The command exits with code 1 when throughput falls, or
+    memory rises, past the thresholds.
+    """
+    _ = ctx
+    # Imported here, to keep cli startup fast.
+    from pfmsoft.pdf2txt.benchmark import (
+        benchmark_extract_all,
+        compare_results,
+        load_results,
+        run_isolated,
+        write_results,
+    )
+
+    baseline_result = None
+    if baseline is not None:
+        path = baseline_path(baseline)
+        if not path.is_file():
+            raise typer.BadParameter(f"No baseline named {baseline!r} at {path}")
+        (baseline_result,) = load_results(path)
+    with TemporaryDirectory() as path_out:
+        result = run_isolated(
+            benchmark_extract_all,
+            path_in,
+            Path(path_out),
+            workers=workers,
+            name=path_in.name,
+            layout=layout,
+        )
+    echo_result(result)
+    if save_baseline is not None:
+        path = baseline_path(save_baseline)
+        write_results(path, [result])
+        typer.echo(f"Saved baseline {save_baseline!r} to {path}")
+    if baseline_result is None:
+        return
+    regressions = compare_results(
+        baseline=baseline_result,
+        current=result,
+        max_throughput_drop=max_throughput_drop,
+        max_memory_increase=max_memory_increase,
+    )
+    if regressions:
+        typer.echo(f"Regressions against baseline {baseline!r}:")
+        for regression in regressions:
+            typer.echo(f"  {regression}")
+        raise typer.Exit(code=1)
+    typer.echo(f"No regressions against baseline {baseline!r}.")
+
+
+def echo_result(result: "BenchmarkResult"):
+    """Print a benchmark result."""
+    typer.echo(f"Files: {result.files}  Pages: {result.pages}")
+    typer.echo(f"Seconds: {result.seconds:.3f}")
+    typer.echo(f"Pages/sec: {result.pages_per_second:.2f}")
+    typer.echo(f"MB/sec: {result.mb_per_second:.3f}")
+    for label, seconds in result.latency_seconds.items():
+        typer.echo(f"Latency {label}: {seconds:.3f} s")
+    typer.echo(f"Peak memory: {result.peak_memory()} bytes")
@@ -1,26 +1,47 @@
-"""Command-line interface."""
+"""Command-line interface.
 
-from collections.abc import Sequence
-from dataclasses import dataclass
+pdfminer.six, rich's progress bars, the process pool modules, and the modules of
+this package that import them, are imported inside the functions that use them,
+so that `--help` and shell completion do not wait on them.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import asdict, dataclass
+from enum import StrEnum
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Annotated
+from time import perf_counter, perf_counter_ns
+from typing import TYPE_CHECKING, Annotated
 
 import typer
-from rich.progress import (
-    BarColumn,
-    FileSizeColumn,
-    Progress,
-    TaskProgressColumn,
-    TextColumn,
-    TimeElapsedColumn,
-    TotalFileSizeColumn,
-)
 
-from pfmsoft.pdf2txt.extract_txt import extract_text_from_pdf_to_file
+from pfmsoft.pdf2txt.compression import SUFFIXES
+from pfmsoft.pdf2txt.discovery import prefetch, scan_pdf_files
+from pfmsoft.pdf2txt.journal import JOURNAL_FILE_NAME, Journal
+from pfmsoft.pdf2txt.metrics import ExtractMetrics, MetricsReport
+from pfmsoft.pdf2txt.options import (
+    DEFAULT_FONT_CACHE_SIZE,
+    Compression,
+    LayoutMode,
+    LinkMethod,
+    ProgressMode,
+    SinkKind,
+)
 from pfmsoft.pdf2txt.snippets.path_delta import path_delta
 
-# TODO support extracting text to command line - pipe.
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
+    from pfmsoft.pdf2txt.manifest import Manifest
+    from pfmsoft.pdf2txt.progress import PageListener
+    from pfmsoft.pdf2txt.shard import ShardManifest
+    from pfmsoft.pdf2txt.watch import DirectoryIndex
 
 app = typer.Typer()
 
@@ -33,14 +54,309 @@ class ExtractJob:
     path_out: Path
     overwrite: bool = False
     halt_on_fail: bool = False
+    profile_dir: Path | None = None
+    layout: LayoutMode = LayoutMode.FULL
+    size: int = 0
+    """Size of the input file in bytes, from when the job was made."""
+    stat: os.stat_result | None = None
+    """The stat result of the input file, from the scan that found it."""
+    sha256: str | None = None
+    """The content hash of the input file from before it was extracted, for the
+    incremental manifest."""
+    sink: SinkKind = SinkKind.FILES
+    """Write the text to `path_out` for files, otherwise return it for a sink."""
+    compression: Compression = Compression.NONE
+    compress_level: int | None = None
+    font_cache_size: int = 0
+    """Fonts the worker process keeps decoded across jobs, 0 for no cache."""
+    page_cache: Path | None = None
+    """The database of page text to reuse and add to, if any."""
+    page_cache_bytes: int = 0
+    """The size limit of the page cache."""
+
+
+@dataclass
+class JobResult:
+    """The outcome of an extraction job."""
+
+    job: ExtractJob
+    metrics: ExtractMetrics | None = None
+    error: BaseException | None = None
+    text: str | None = None
+    """The extracted text, for a job that writes to a sink other than files."""
+    duplicate_of: Path | None = None
+    """The input with identical content that was extracted instead, if any."""
+
+
+JobCallback = Callable[[JobResult], None]
+
+
+class ManifestLocation(StrEnum):
+    """Where the manifest for an incremental run is stored."""
+
+    OUTPUT = "output"
+    APP_DIR = "app-dir"
+
+
+class JobOrder(StrEnum):
+    """The order that the jobs of a batch run are started in."""
+
+    DISCOVERY = "discovery"
+    LARGEST_FIRST = "largest-first"
+    SMALLEST_FIRST = "smallest-first"
+
+
+# Options shared by the extract commands.
+ManifestLocationOption = Annotated[
+    ManifestLocation,
+    typer.Option(
+        help="Store the incremental manifest in the output directory, "
+        "or in the application directory."
+    ),
+]
+LayoutOption = Annotated[
+    LayoutMode,
+    typer.Option(
+        help="Layout analysis: full, fast only breaks the text into lines, "
+        "none writes the raw glyph stream."
+    ),
+]
+CompressOption = Annotated[
+    Compression,
+    typer.Option(
+        help="Compress each text file as it is written, adding .gz, .xz, or "
+        ".bz2 to its name."
+    ),
+]
+CompressLevelOption = Annotated[
+    int | None,
+    typer.Option(
+        min=1,
+        max=9,
+        help="Compression level, 1 is fastest, 9 is smallest. "
+        "Defaults to 6 for gzip and xz, and 9 for bz2.",
+    ),
+]
+FontCacheSizeOption = Annotated[
+    int,
+    typer.Option(
+        min=0,
+        help="Fonts each worker keeps decoded between files, so files that "
+        "embed the same fonts skip decoding them. 0 turns the cache off.",
+    ),
+]
+PageCacheOption = Annotated[
+    Path | None,
+    typer.Option(
+        help="Reuse the text of pages seen in earlier files or runs, from this "
+        "SQLite database, and add the text of new pages to it.",
+        dir_okay=False,
+    ),
+]
+PageCacheSizeOption = Annotated[
+    int,
+    typer.Option(
+        min=1,
+        help="MiB of page text kept in --page-cache. The least recently used "
+        "pages are evicted.",
+    ),
+]
+
+
+def order_jobs(jobs: Iterable[ExtractJob], order: JobOrder) -> Iterator[ExtractJob]:
+    """Order jobs by the size of their input files.
+
+    Discovery order streams the jobs as they are found. The other orders wait
+    until every job has been found, then sort them by size.
+    """
+    if order == JobOrder.DISCOVERY:
+        yield from jobs
+        return
+    yield from sorted(
+        jobs, key=lambda job: job.size, reverse=order == JobOrder.LARGEST_FIRST
+    )
+
+
+def extract_job(job: ExtractJob) -> JobResult:
+    """Extract the text for a single job.
+
+    This is a module level function so that it can be sent to a worker process.
+    """
+    from pfmsoft.pdf2txt.extract_txt import (
+        extract_text_from_pdf,
+        extract_text_from_pdf_to_file,
+    )
+    from pfmsoft.pdf2txt.page_cache import open_page_cache
+    from pfmsoft.pdf2txt.profiling import profile_path_for, run_profiled
+    from pfmsoft.pdf2txt.progress import page_callback
+
+    profile_path = None
+    if job.profile_dir is not None:
+        profile_path = profile_path_for(job.profile_dir, job.path_in)
+    on_page = page_callback(job.path_in)
+    page_cache = None
+    if job.page_cache is not None:
+        page_cache = open_page_cache(job.page_cache, max_bytes=job.page_cache_bytes)
+    if job.sink != SinkKind.FILES:
+        text, metrics = run_profiled(
+            profile_path,
+            extract_text_from_pdf,
+            job.path_in,
+            layout=job.layout,
+            font_cache_size=job.font_cache_size,
+            page_cache=page_cache,
+            on_page=on_page,
+        )
+        return JobResult(job=job, metrics=metrics, text=text)
+    metrics = run_profiled(
+        profile_path,
+        extract_text_from_pdf_to_file,
+        job.path_in,
+        job.path_out,
+        job.overwrite,
+        layout=job.layout,
+        compression=job.compression,
+        compress_level=job.compress_level,
+        font_cache_size=job.font_cache_size,
+        page_cache=page_cache,
+        on_page=on_page,
+    )
+    return JobResult(job=job, metrics=metrics)
+
+
+def resolve_workers(workers: int) -> int:
+    """Translate the `--workers` option into a worker process count.
+
+    A value of 0 means use all available cores.
+    """
+    if workers == 0:
+        return os.cpu_count() or 1
+    return workers
+
 
+def elapsed_seconds(ctx: typer.Context) -> float | None:
+    """Seconds since the `START_TIME` recorded by the main callback, if there is one."""
+    start_time = (ctx.obj or {}).get("START_TIME", None)
+    if start_time is None:
+        return None
+    return (perf_counter_ns() - start_time) / 1_000_000_000
 
-def total_size_of_files(jobs: Sequence[ExtractJob]) -> int:
-    """Get total file size of jobs."""
-    total = 0
-    for job in jobs:
-        total += job.path_in.stat().st_size
-    return total
+
+def started_at(ctx: typer.Context) -> float | None:
+    """The unix time recorded by the main callback as `START_TIMESTAMP`, if there is one."""
+    return (ctx.obj or {}).get("START_TIMESTAMP", None)
+
+
+def profile_dir_from(ctx: typer.Context) -> Path | None:
+    """The `--profile` directory given to the main callback, if there is one."""
+    return (ctx.obj or {}).get("PROFILE_DIR", None)
+
+
+def metrics_callback(report: MetricsReport) -> JobCallback:
+    """Make a job callback that records results in a metrics report."""
+
+    def record_metrics(result: JobResult):
+        if result.error is not None:
+            report.record_failure(path_in=result.job.path_in, error=result.error)
+        elif result.duplicate_of is not None:
+            report.record_duplicate(
+                path_in=result.job.path_in, duplicate_of=result.duplicate_of
+            )
+        elif result.metrics is not None:
+            report.record(result.metrics)
+
+    return record_metrics
+
+
+def dedupe_jobs(
+    jobs: Iterable[ExtractJob], duplicates: dict[Path, list[ExtractJob]]
+) -> Iterator[ExtractJob]:
+    """Keep one job for each unique input, by content.
+
+    Waits for every job to be found, then hashes the inputs that share a size
+    with another input.
+
+    Args:
+        jobs: The extraction jobs.
+        duplicates: Filled with the jobs left out, keyed by the input path of the
+            job with the same content. The entries for a job are added before it
+            is yielded.
+
+    Yields:
+        The jobs for unique inputs, in the order of `jobs`.
+    """
+    from pfmsoft.pdf2txt.dedupe import group_duplicates
+
+    for job, same_content in group_duplicates(
+        jobs, path=lambda job: job.path_in, size=lambda job: job.size
+    ):
+        if same_content:
+            duplicates[job.path_in] = same_content
+        yield job
+
+
+def shard_callback(shard: "ShardManifest") -> JobCallback:
+    """Make a job callback that records results in a shard manifest."""
+
+    def record_shard(result: JobResult):
+        if result.error is not None:
+            shard.record(result.job.path_in, status="failed")
+        elif result.metrics is not None:
+            shard.record(
+                result.job.path_in,
+                status="extracted" if result.duplicate_of is None else "duplicate",
+                pages=result.metrics.pages,
+                bytes_in=result.metrics.bytes_in,
+                chars_out=result.metrics.chars_out,
+            )
+
+    return record_shard
+
+
+def duplicates_callback(
+    duplicates: dict[Path, list[ExtractJob]],
+    link: LinkMethod,
+    on_job_complete: Sequence[JobCallback],
+) -> JobCallback:
+    """Make a job callback that completes the duplicates of each finished job.
+
+    The output of each duplicate is reproduced from the output of the finished
+    job, and a result for the duplicate is passed to the `on_job_complete`
+    callbacks. A duplicate of a failed job fails with the same error.
+    """
+    from pfmsoft.pdf2txt.dedupe import reproduce_file
+
+    def complete_duplicates(result: JobResult):
+        for job in duplicates.pop(result.job.path_in, []):
+            duplicate = JobResult(
+                job=job, error=result.error, duplicate_of=result.job.path_in
+            )
+            if result.metrics is not None and result.error is None:
+                try:
+                    if job.sink == SinkKind.FILES:
+                        reproduce_file(
+                            result.job.path_out,
+                            job.path_out,
+                            method=link,
+                            overwrite=job.overwrite,
+                        )
+                except Exception as e:
+                    if job.halt_on_fail:
+                        raise e
+                    duplicate.error = e
+                else:
+                    duplicate.text = result.text
+                    duplicate.metrics = ExtractMetrics(
+                        path_in=str(job.path_in),
+                        path_out=str(job.path_out),
+                        pages=result.metrics.pages,
+                        bytes_in=result.metrics.bytes_in,
+                        chars_out=result.metrics.chars_out,
+                    )
+            for callback in on_job_complete:
+                callback(duplicate)
+
+    return complete_duplicates
 
 
 @app.command()
@@ -52,59 +368,483 @@ def text(
             help="source pdf file.", exists=True, dir_okay=False, file_okay=True
         ),
     ],
-    path_out: Annotated[Path, typer.Argument(help="Path to the extracted text file.")],
+    path_out: Annotated[
+        Path,
+        typer.Argument(help="Path to the extracted text file, or - for stdout."),
+    ],
     overwrite: Annotated[
         bool, typer.Option(help="Overwrite existing output file.")
     ] = False,
+    workers: Annotated[
+        int,
+        typer.Option(
+            min=0,
+            help="Number of worker processes, each extracting a range of pages. "
+            "0 uses all available cores.",
+        ),
+    ] = 1,
+    pages_per_chunk: Annotated[
+        int,
+        typer.Option(
+            min=0,
+            help="Pages in each range sent to a worker. 0 picks a size automatically.",
+        ),
+    ] = 0,
+    metrics_out: Annotated[
+        Path | None,
+        typer.Option(
+            help="Write per phase timings, page count, and sizes to this json file."
+        ),
+    ] = None,
+    layout: LayoutOption = LayoutMode.FULL,
 ):
-    """Extract text from a single pdf file."""
+    """Extract text from a single pdf file.
+
+    With more than one worker, the pages of the pdf file are split into ranges that
+    are extracted in parallel, and then written to the output file in page order.
+
+    If PATH_OUT is -, the text of each page is written to stdout as soon as it is
+    extracted, so the output can be piped to another program.
+    """
     in_suffix = path_in.suffix.lower()
     if in_suffix != ".pdf":
         typer.echo(
             f"input file might not be a pdf, suffix for {path_in.name} is not "
-            f"'.pdf' (case insensitive)."
+            f"'.pdf' (case insensitive).",
+            err=True,
         )
-    job = ExtractJob(
-        path_in=path_in, path_out=path_out, overwrite=overwrite, halt_on_fail=False
-    )
-    jobs = [job]
+    from pfmsoft.pdf2txt.profiling import profile_path_for, run_profiled
 
-    extract_txt_rich(jobs=jobs)
+    report = MetricsReport()
+    if str(path_out) == "-":
+        if workers != 1:
+            raise typer.BadParameter("--workers is not supported when writing to -.")
+        profile_path = None
+        if profile_dir_from(ctx) is not None:
+            profile_path = profile_path_for(profile_dir_from(ctx), path_in)
+        metrics = run_profiled(
+            profile_path, extract_to_stdout, path_in=path_in, layout=layout
+        )
+        if metrics is not None:
+            report.record(metrics)
+    else:
+        job = ExtractJob(
+            path_in=path_in,
+            path_out=path_out,
+            overwrite=overwrite,
+            halt_on_fail=False,
+            profile_dir=profile_dir_from(ctx),
+            layout=layout,
+            size=path_in.stat().st_size,
+        )
+        if workers == 1:
+            extract_txt_rich(jobs=[job], on_job_complete=[metrics_callback(report)])
+        else:
+            metrics = extract_pages_rich(
+                job=job,
+                workers=resolve_workers(workers),
+                pages_per_chunk=pages_per_chunk,
+            )
+            report.record(metrics)
+    if metrics_out is not None:
+        report.write(metrics_out, elapsed_seconds=elapsed_seconds(ctx))
 
 
-def extract_txt_rich(
-    jobs: Sequence[ExtractJob],
-):
-    """Extract text from pdf files, show rich text progress bar."""
-    file_count = len(jobs)
+def extract_to_stdout(
+    path_in: Path, layout: LayoutMode = LayoutMode.FULL
+) -> ExtractMetrics | None:
+    """Stream the text of a pdf file to stdout, page by page.
+
+    Returns:
+        The metrics of the extraction, or None if the reader closed the pipe early.
+    """
+    from pfmsoft.pdf2txt.extract_txt import extract_text_from_pdf_to_stream
+
+    try:
+        return extract_text_from_pdf_to_stream(
+            file_in=path_in, fp_out=sys.stdout, layout=layout
+        )
+    except BrokenPipeError:
+        # The reader went away, e.g. `| head`. Point stdout at devnull so the
+        # interpreter does not fail again flushing it at exit.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return None
+
+
+def extract_pages_rich(
+    job: ExtractJob, workers: int, pages_per_chunk: int = 0
+) -> ExtractMetrics:
+    """Extract text from one pdf file by page ranges, show rich text progress bar."""
+    from rich.progress import (
+        BarColumn,
+        MofNCompleteColumn,
+        Progress,
+        TaskProgressColumn,
+        TextColumn,
+        TimeElapsedColumn,
+    )
+
+    from pfmsoft.pdf2txt.extract_txt import extract_text_from_pdf_to_file_parallel
+
     with Progress(
         TextColumn("[progress.description]{task.description}"),
         BarColumn(),
         TaskProgressColumn(),
-        FileSizeColumn(),
-        TotalFileSizeColumn(),
+        MofNCompleteColumn(),
         TimeElapsedColumn(),
     ) as progress:
-        task = progress.add_task(
-            f"1 of {file_count}", total=total_size_of_files(jobs=jobs)
+        task = progress.add_task(f"{job.path_in.name} pages", total=None)
+
+        def chunk_complete(pages_done: int, page_count: int):
+            progress.update(task, completed=pages_done, total=page_count)
+
+        return extract_text_from_pdf_to_file_parallel(
+            file_in=job.path_in,
+            file_out=job.path_out,
+            overwrite=job.overwrite,
+            layout=job.layout,
+            workers=workers,
+            pages_per_chunk=pages_per_chunk,
+            on_chunk_complete=chunk_complete,
+            profile_dir=job.profile_dir,
+        )
+
+
+def extract_txt_rich(
+    jobs: Iterable[ExtractJob],
+    workers: int = 1,
+    on_job_complete: Sequence[JobCallback] = (),
+    timeout: float | None = None,
+    max_memory: int | None = None,
+    progress: ProgressMode = ProgressMode.RICH,
+) -> float:
+    """Extract text from pdf files, show rich text progress bar.
+
+    The jobs are pulled from a background thread, so a lazy iterable of jobs, such
+    as one from `iter_jobs_from_directory`, is scanned while the first jobs are
+    extracted. The file count and total size of the progress bar grow until the
+    scan finishes.
+
+    The workers report every page they extract, so the progress, pages per second,
+    and the estimated time remaining move while a large file is extracted. With
+    `ProgressMode.NONE` the pages are not reported at all.
+
+    Args:
+        jobs: The extraction jobs.
+        workers: Number of worker processes. 1 extracts in this process, 0 uses
+            all available cores.
+        on_job_complete: Each is called with the result of every finished job.
+        timeout: Seconds allowed for each file, see `run_jobs`.
+        max_memory: Bytes of memory allowed for each file, see `run_jobs`.
+        progress: How the progress is shown, see `ProgressMode`.
+
+    Returns:
+        The makespan, the seconds from starting the first job to finishing the
+        last one.
+    """
+    from pfmsoft.pdf2txt.progress import REPORTERS
+
+    with REPORTERS[progress]() as reporter:
+
+        def job_found(job: ExtractJob):
+            reporter.job_found(job.path_in, job.size)
+
+        start = perf_counter()
+        for result in run_jobs(
+            jobs=prefetch(jobs, on_item=job_found),
+            workers=resolve_workers(workers),
+            timeout=timeout,
+            max_memory=max_memory,
+            on_page=None if progress == ProgressMode.NONE else reporter.page_done,
+        ):
+            pages = 0 if result.metrics is None else result.metrics.pages
+            reporter.job_done(result.job.path_in, pages=pages, error=result.error)
+            for callback in on_job_complete:
+                callback(result)
+        return perf_counter() - start
+
+
+def run_jobs(
+    jobs: Iterable[ExtractJob],
+    workers: int = 1,
+    timeout: float | None = None,
+    max_memory: int | None = None,
+    on_page: "PageListener | None" = None,
+) -> Iterator[JobResult]:
+    """Run extraction jobs, yielding the result of each job as it completes.
+
+    With one worker the jobs run serially in this process, in order. With more
+    than one worker the jobs are sent to a process pool, and are yielded in
+    completion order.
+
+    With a time or memory limit, each job runs in a worker process that is killed
+    if the job goes over the limit, even with one worker. The job then fails with
+    a `LimitExceededError`, and the run continues with a new worker.
+
+    Args:
+        jobs: The extraction jobs.
+        workers: Number of worker processes.
+        timeout: Seconds allowed for each job, or None for no limit.
+        max_memory: Bytes of address space allowed for each worker process, or
+            None for no limit.
+        on_page: Called in this process with every page the jobs extract, or
+            None to not report pages.
+
+    Raises:
+        Exception: The error from the first failed job with `halt_on_fail` set.
+
+    Yields:
+        The result of each finished job, with its metrics if it succeeded, or the
+        error raised by it.
+    """
+    from pfmsoft.pdf2txt.progress import set_page_listener
+
+    if timeout is not None or max_memory is not None:
+        yield from _run_jobs_with_limits(
+            jobs=jobs,
+            workers=workers,
+            timeout=timeout,
+            max_memory=max_memory,
+            on_page=on_page,
         )
-        for idx, job in enumerate(jobs, start=1):
+        return
+    if workers > 1:
+        yield from _run_jobs_in_pool(jobs=jobs, workers=workers, on_page=on_page)
+        return
+    set_page_listener(on_page)
+    try:
+        for job in jobs:
             try:
-                extract_text_from_pdf_to_file(job.path_in, job.path_out, job.overwrite)
-                progress.update(
-                    task,
-                    advance=job.path_in.stat().st_size,
-                    description=f"{idx} of {file_count}",
-                )
+                result = extract_job(job)
             except Exception as e:
                 if job.halt_on_fail:
                     raise e
-                progress.console.print(f"Skipping {job}\n\tCause: {e}")
-                progress.update(
-                    task,
-                    advance=job.path_in.stat().st_size,
-                    description=f"{idx} of {file_count}",
+                yield JobResult(job=job, error=e)
+                continue
+            yield result
+    finally:
+        set_page_listener(None)
+
+
+def _run_jobs_in_pool(
+    jobs: Iterable[ExtractJob], workers: int, on_page: "PageListener | None" = None
+) -> Iterator[JobResult]:
+    """Run extraction jobs in a process pool.
+
+    Only a small window of jobs is submitted ahead of the workers, so that
+    halting on a failure only has a handful of pending jobs to cancel. Workers
+    are spawned rather than forked, as the progress bar runs its own thread.
+
+    If a worker dies, e.g. killed for running out of memory, the jobs in the
+    window fail with a `BrokenProcessPool`, and the workers are replaced for the
+    jobs after them.
+
+    The workers put their page events on a queue, which a thread passes on to
+    `on_page`.
+    """
+    import multiprocessing
+    import threading
+    from collections import deque
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    from pfmsoft.pdf2txt.progress import listen_on_queue
+
+    mp_context = multiprocessing.get_context("spawn")
+    initializer = None
+    initargs = ()
+    page_thread = None
+    if on_page is not None:
+        page_queue = mp_context.SimpleQueue()
+        initializer, initargs = listen_on_queue, (page_queue,)
+
+        def pass_on_pages():
+            while (event := page_queue.get()) is not None:
+                on_page(event)
+
+        page_thread = threading.Thread(target=pass_on_pages, daemon=True)
+        page_thread.start()
+
+    def start_workers() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=initializer,
+            initargs=initargs,
+        )
+
+    job_iter = iter(jobs)
+    unsent: deque[ExtractJob] = deque()
+    pending: dict[Future[JobResult], ExtractJob] = {}
+
+    def fill_window(executor: ProcessPoolExecutor):
+        while len(pending) < workers * 2:
+            job = unsent.popleft() if unsent else next(job_iter, None)
+            if job is None:
+                return
+            try:
+                pending[executor.submit(extract_job, job)] = job
+            except BrokenProcessPool:
+                # A worker died since the last wait. The pool is replaced once
+                # the jobs in the window have failed.
+                unsent.appendleft(job)
+                return
+
+    def job_result(future: "Future[JobResult]", job: ExtractJob) -> JobResult:
+        error = future.exception()
+        if error is None:
+            return future.result()
+        if job.halt_on_fail:
+            raise error
+        return JobResult(job=job, error=error)
+
+    executor = start_workers()
+    try:
+        try:
+            while True:
+                fill_window(executor)
+                if not pending:
+                    if not unsent:
+                        break
+                    # The pool broke with no jobs in it.
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = start_workers()
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    job = pending.pop(future)
+                    broken = broken or isinstance(future.exception(), BrokenProcessPool)
+                    yield job_result(future, job)
+                if broken:
+                    # Every job left on the broken pool fails with it.
+                    done, _ = wait(pending)
+                    for future in done:
+                        yield job_result(future, pending.pop(future))
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = start_workers()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        if page_thread is not None:
+            # The workers have exited, so every page event is already queued.
+            page_queue.put(None)
+            page_thread.join()
+
+
+def _run_jobs_with_limits(
+    jobs: Iterable[ExtractJob],
+    workers: int,
+    timeout: float | None,
+    max_memory: int | None,
+    on_page: "PageListener | None" = None,
+) -> Iterator[JobResult]:
+    """Run extraction jobs in worker processes that are killed at a limit."""
+    from pfmsoft.pdf2txt.isolation import run_with_limits
+    from pfmsoft.pdf2txt.progress import set_page_listener
+
+    for job, result, error in run_with_limits(
+        extract_job,
+        jobs,
+        workers=workers,
+        timeout=timeout,
+        max_memory=max_memory,
+        event_initializer=None if on_page is None else set_page_listener,
+        on_event=on_page,
+    ):
+        if error is not None:
+            if job.halt_on_fail:
+                raise error
+            yield JobResult(job=job, error=error)
+        elif result is not None:
+            yield result
+
+
+def watch_jobs(
+    index: "DirectoryIndex",
+    make_job: Callable[[Path, os.stat_result], ExtractJob | None],
+    workers: int = 1,
+    poll_interval: float = 1.0,
+    max_idle: float | None = None,
+    on_idle: Callable[[], None] | None = None,
+) -> Iterator[JobResult]:
+    """Extract the files of a directory as they become ready, until stopped.
+
+    The worker processes are started once, and kept for the whole watch, so they
+    keep their font caches warm between files. Ready files wait in a queue while
+    all of the workers are busy. If a worker dies, the jobs that were running
+    fail, and the workers are replaced.
+
+    A file is only extracted by one job at a time, as the jobs would write the
+    same temporary file. A file that is ready again while its job runs waits in
+    the queue until that job finishes, and a file ready again while it waits
+    replaces its queued job.
+
+    Args:
+        index: The directory, polled for new and changed files.
+        make_job: Makes the job for a ready file, or returns None to skip it.
+        workers: Number of worker processes, the most files extracted at once.
+        poll_interval: Seconds between polls of the directory.
+        max_idle: Stop after this many seconds with no files ready, queued, or
+            settling, or None to watch until interrupted.
+        on_idle: Called each time the last queued job finishes.
+
+    Yields:
+        The result of each finished job, in completion order.
+    """
+    import multiprocessing
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from concurrent.futures.process import BrokenProcessPool
+    from time import sleep
+
+    mp_context = multiprocessing.get_context("spawn")
+    # By input path, in the order they were first queued.
+    queued: dict[Path, ExtractJob] = {}
+    running: dict[Future[JobResult], ExtractJob] = {}
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+    idle_since = perf_counter()
+    try:
+        while True:
+            for path, stat in index.poll():
+                job = make_job(path, stat)
+                if job is not None:
+                    queued[job.path_in] = job
+            busy = {job.path_in for job in running.values()}
+            for path in [path for path in queued if path not in busy]:
+                if len(running) >= workers:
+                    break
+                job = queued.pop(path)
+                running[executor.submit(extract_job, job)] = job
+            if not running:
+                if queued or index.settling or max_idle is None:
+                    idle_since = perf_counter()
+                elif perf_counter() - idle_since >= max_idle:
+                    return
+                sleep(poll_interval)
+                continue
+            idle_since = perf_counter()
+            done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                job = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    broken = broken or isinstance(error, BrokenProcessPool)
+                    yield JobResult(job=job, error=error)
+                else:
+                    yield future.result()
+            if broken:
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=mp_context
                 )
+            if done and not running and not queued and on_idle is not None:
+                on_idle()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
 
 
 @app.command()
@@ -120,7 +860,11 @@ def all(
         ),
     ],
     path_out: Annotated[
-        Path, typer.Argument(help="destination directory for text files.")
+        Path,
+        typer.Argument(
+            help="destination directory for text files, or the container file "
+            "for a --sink other than files."
+        ),
     ],
     overwrite: Annotated[
         bool, typer.Option(help="Overwrite existing output file.")
@@ -131,70 +875,743 @@ def all(
     halt_on_fail: Annotated[
         bool, typer.Option(help="Exit program if any one task fails.")
     ] = False,
+    workers: Annotated[
+        int,
+        typer.Option(
+            min=0, help="Number of worker processes. 0 uses all available cores."
+        ),
+    ] = 1,
+    incremental: Annotated[
+        bool,
+        typer.Option(
+            help="Skip files whose text was extracted by an earlier run, "
+            "and that have not changed since."
+        ),
+    ] = False,
+    manifest_location: ManifestLocationOption = ManifestLocation.OUTPUT,
+    metrics_out: Annotated[
+        Path | None,
+        typer.Option(
+            help="Write per file phase timings, and a run summary, to this json file."
+        ),
+    ] = None,
+    layout: LayoutOption = LayoutMode.FULL,
+    order: Annotated[
+        JobOrder,
+        typer.Option(
+            help="Order to start the jobs in. Starting the largest files first keeps "
+            "one large file from finishing long after the others."
+        ),
+    ] = JobOrder.DISCOVERY,
+    timeout_per_file: Annotated[
+        float | None,
+        typer.Option(
+            min=0,
+            help="Seconds allowed for each file. A file that takes longer is "
+            "stopped, and recorded as failed.",
+        ),
+    ] = None,
+    max_memory_per_file: Annotated[
+        int | None,
+        typer.Option(
+            min=1,
+            help="MiB of memory allowed for each file. A file that uses more is "
+            "stopped, and recorded as failed. Not supported on Windows.",
+        ),
+    ] = None,
+    resume: Annotated[
+        bool,
+        typer.Option(
+            help="Continue an interrupted run, skipping the files it completed. "
+            "Use the same PATH_OUT and options as the interrupted run."
+        ),
+    ] = False,
+    sink: Annotated[
+        SinkKind,
+        typer.Option(
+            help="Write a text file for each pdf file, or write all of the text "
+            "into one jsonl, sqlite, or tar file at PATH_OUT."
+        ),
+    ] = SinkKind.FILES,
+    compress: CompressOption = Compression.NONE,
+    compress_level: CompressLevelOption = None,
+    font_cache_size: FontCacheSizeOption = DEFAULT_FONT_CACHE_SIZE,
+    dedupe: Annotated[
+        bool,
+        typer.Option(
+            help="Extract each unique input once, by content, and reproduce its "
+            "output for the other inputs with the same content."
+        ),
+    ] = False,
+    dedupe_link: Annotated[
+        LinkMethod,
+        typer.Option(
+            help="How --dedupe reproduces an output. reflink and hardlink fall "
+            "back to a copy where the file system cannot do them."
+        ),
+    ] = LinkMethod.REFLINK,
+    page_cache: PageCacheOption = None,
+    page_cache_size: PageCacheSizeOption = 1024,
+    shard: Annotated[
+        str | None,
+        typer.Option(
+            help="Only extract shard i of N, e.g. 2/8, for runs split across "
+            "machines. Inputs are assigned by a hash of their relative path.",
+        ),
+    ] = None,
+    shard_manifest: Annotated[
+        Path | None,
+        typer.Option(
+            help="Where to write the shard manifest for `extract merge`. Defaults "
+            "to a .pdf2txt-shard-I-of-N.json file in PATH_OUT, or next to it for "
+            "a --sink other than files.",
+            dir_okay=False,
+        ),
+    ] = None,
+    progress: Annotated[
+        ProgressMode,
+        typer.Option(
+            help="Show progress as a bar, as json lines events on stderr for a "
+            "program running the extraction, or not at all.",
+        ),
+    ] = ProgressMode.RICH,
+    prometheus_out: Annotated[
+        Path | None,
+        typer.Option(
+            help="Write run metrics in the Prometheus text format to this file, "
+            "for the node exporter's textfile collector. Use a .prom suffix.",
+            dir_okay=False,
+        ),
+    ] = None,
+    prometheus_interval: Annotated[
+        float,
+        typer.Option(
+            min=1,
+            help="Seconds between writes of --prometheus-out while the run is in "
+            "progress.",
+        ),
+    ] = 15.0,
 ):
     """Extract multiple files, with optional recursion, and automatic naming of extracted files.
 
     If recursing sub directories, the sub directory structure is reproduced
     in the output directory. Automatic file renaming will replace the .pdf suffix
     with the .txt suffix.
+
+    An incremental run keeps a manifest of the size, mtime, content hash, and
+    extraction settings of each input file, and only extracts files that are new
+    or have changed. Output files recorded in the manifest are overwritten when
+    their input changes.
+
+    With several workers, --order largest-first usually shortens the run, as the
+    small files fill in around the large ones. Other orders wait for the scan of
+    PATH_IN to finish before starting.
+
+    With --timeout-per-file or --max-memory-per-file, each file is extracted in a
+    worker process that is killed when it goes over a limit, so one malformed pdf
+    cannot stall or crash the run.
+
+    Each completed file is recorded in a journal in PATH_OUT, and text files are
+    only renamed into place once complete. If a run is killed, --resume picks up
+    where it stopped, without checking the files that were already completed.
+
+    With --sink jsonl, sqlite, or tar, the text of every pdf file is written into
+    the one container file at PATH_OUT, keyed by the path of the pdf file relative
+    to PATH_IN, by a single writer thread. This avoids creating a file per pdf
+    file. --incremental and --resume need --sink files.
+
+    With --compress, each text file is compressed as it is written, and named
+    e.g. sample.txt.gz.
+
+    Each worker keeps a cache of decoded fonts, keyed by their content, so files
+    made from the same templates only decode their fonts once per worker. The
+    hits and misses are in the --metrics-out summary.
+
+    With --dedupe, inputs with the same size are hashed once the scan of PATH_IN
+    finishes, and only the first of each set of identical inputs is extracted.
+    The others get a reflink, hardlink, or copy of its text file, and are counted
+    as parses_saved in the --metrics-out summary.
+
+    With --page-cache, pages are looked up by a digest of their content streams,
+    resources, boxes, and the layout settings, so a reissued document only has
+    its new or changed pages laid out.
+
+    With --shard i/N, each of N machines runs the same command on the same
+    PATH_IN, with its own i, and extracts a disjoint part of the inputs. Each
+    writes a shard manifest of its inputs, and `extract merge` checks that the
+    shards cover every input exactly once.
     """
-    _ = ctx
-    jobs = build_jobs_from_directory(
+    from pfmsoft.pdf2txt.extract_txt import layout_params
+    from pfmsoft.pdf2txt.isolation import MEMORY_LIMIT_SUPPORTED
+    from pfmsoft.pdf2txt.manifest import Manifest
+    from pfmsoft.pdf2txt.prometheus import PeriodicMetricsWriter
+    from pfmsoft.pdf2txt.shard import Shard, ShardManifest, shard_manifest_name
+    from pfmsoft.pdf2txt.sinks import Document, open_sink
+
+    max_memory = None
+    if max_memory_per_file is not None:
+        if not MEMORY_LIMIT_SUPPORTED:
+            raise typer.BadParameter(
+                "--max-memory-per-file is not supported on this platform."
+            )
+        max_memory = max_memory_per_file * 1024 * 1024
+    container = None
+    if sink != SinkKind.FILES:
+        if incremental or resume or compress != Compression.NONE:
+            raise typer.BadParameter(
+                "--incremental, --resume, and --compress are only supported with "
+                "--sink files."
+            )
+        if path_out.exists() and not overwrite:
+            raise typer.BadParameter(
+                f"PATH_OUT: {path_out} exists, use --overwrite to replace it."
+            )
+        if path_out.is_dir():
+            raise typer.BadParameter(f"PATH_OUT: {path_out} is a directory.")
+    elif path_out.is_file():
+        raise typer.BadParameter(
+            f"PATH_OUT: {path_out} is an existing file, not a directory."
+        )
+    # Checked before the journal creates PATH_OUT. Stops at the first pdf file.
+    if next(scan_pdf_files(path_in, recurse=recurse), None) is None:
+        raise typer.BadParameter(f"No pdf files were found in {path_in}")
+    shard_record = None
+    if shard is not None:
+        try:
+            run_shard = Shard.parse(shard)
+        except ValueError as e:
+            raise typer.BadParameter(str(e)) from e
+        if shard_manifest is None:
+            shard_dir = path_out if sink == SinkKind.FILES else path_out.parent
+            shard_manifest = shard_dir / shard_manifest_name(run_shard)
+        shard_record = ShardManifest(
+            path=shard_manifest,
+            source_dir=path_in,
+            shard=run_shard,
+            settings={
+                "layout": str(layout),
+                "sink": str(sink),
+                "compress": str(compress),
+            },
+        )
+    manifest = None
+    if incremental:
+        manifest = Manifest.load(
+            path=manifest_path(path_out=path_out, location=manifest_location),
+            source_dir=path_in,
+            la_params=layout_params(layout),
+        )
+    journal = None
+    if sink == SinkKind.FILES:
+        try:
+            journal = Journal.open(
+                path=path_out / JOURNAL_FILE_NAME,
+                source_dir=path_in,
+                settings={
+                    "path_in": str(path_in.resolve()),
+                    "layout": str(layout),
+                    "compress": str(compress),
+                }
+                | ({} if shard_record is None else {"shard": str(shard_record.shard)}),
+                resume=resume,
+            )
+        except ValueError as e:
+            raise typer.BadParameter(f"Cannot resume. {e}") from e
+    jobs = iter_jobs_from_directory(
         path_in=path_in,
         path_out=path_out,
         recurse=recurse,
         overwrite=overwrite,
         halt_on_fail=halt_on_fail,
+        manifest=manifest,
+        profile_dir=profile_dir_from(ctx),
+        layout=layout,
+        journal=journal,
+        sink=sink,
+        compression=compress,
+        compress_level=compress_level,
+        font_cache_size=font_cache_size,
+        page_cache=page_cache,
+        page_cache_bytes=page_cache_size * 1024 * 1024,
+        shard=shard_record,
     )
-    extract_txt_rich(jobs=jobs)
+    duplicates: dict[Path, list[ExtractJob]] = {}
+    if dedupe:
+        jobs = dedupe_jobs(jobs, duplicates=duplicates)
+    callbacks: list[JobCallback] = []
+    report = MetricsReport()
+    if metrics_out is not None or prometheus_out is not None:
+        callbacks.append(metrics_callback(report))
+    if shard_record is not None:
+        callbacks.append(shard_callback(shard_record))
+    if manifest is not None:
 
+        def record_job(result: JobResult):
+            if result.error is None:
+                manifest.record(
+                    path_in=result.job.path_in,
+                    path_out=result.job.path_out,
+                    stat=result.job.stat,
+                    sha256=result.job.sha256,
+                )
 
-def build_jobs_from_directory(
-    path_in: Path, path_out: Path, recurse: bool, overwrite: bool, halt_on_fail: bool
-) -> list[ExtractJob]:
-    """Build extract jobs based on pdf files foud in a directory.
+        callbacks.append(record_job)
 
-    _extended_summary_
+    if journal is not None:
 
-    Args:
-        path_in (_type_): _description_
-        path_out (_type_): _description_
-        recurse (_type_): _description_
-        overwrite (_type_): _description_
-        halt_on_fail (_type_): _description_
+        def journal_job(result: JobResult):
+            if result.error is None:
+                journal.record(path_in=result.job.path_in, path_out=result.job.path_out)
 
-    Raises:
-        typer.BadParameter: _description_
-        typer.BadParameter: _description_
+        callbacks.append(journal_job)
+    else:
+        container = open_sink(sink, path_out)
 
-    Returns:
-        list[ExtractJob]: The jobs.
+        def write_document(result: JobResult):
+            if result.text is not None and result.metrics is not None:
+                container.write(
+                    Document(
+                        path=result.job.path_in.relative_to(path_in).as_posix(),
+                        text=result.text,
+                        pages=result.metrics.pages,
+                        bytes_in=result.metrics.bytes_in,
+                    )
+                )
+
+        callbacks.append(write_document)
+    if dedupe:
+        callbacks.append(
+            duplicates_callback(
+                duplicates, link=dedupe_link, on_job_complete=list(callbacks)
+            )
+        )
+    metrics_writer: AbstractContextManager = nullcontext()
+    if prometheus_out is not None:
+        metrics_writer = PeriodicMetricsWriter(
+            prometheus_out,
+            report,
+            elapsed=partial(elapsed_seconds, ctx),
+            started_at=started_at(ctx),
+            interval=prometheus_interval,
+        )
+    makespan = None
+    finished = False
+    try:
+        with metrics_writer:
+            makespan = extract_txt_rich(
+                jobs=order_jobs(jobs, order=order),
+                workers=workers,
+                on_job_complete=callbacks,
+                timeout=timeout_per_file,
+                max_memory=max_memory,
+                progress=progress,
+            )
+        finished = True
+    finally:
+        if journal is not None:
+            journal.close()
+        if container is not None:
+            # A run that stopped early leaves any earlier container in place.
+            if finished:
+                container.close()
+            else:
+                container.abort()
+        if manifest is not None:
+            manifest.save()
+        if shard_record is not None:
+            shard_record.write(
+                elapsed_seconds=elapsed_seconds(ctx), makespan_seconds=makespan
+            )
+        if metrics_out is not None:
+            report.write(
+                metrics_out,
+                elapsed_seconds=elapsed_seconds(ctx),
+                makespan_seconds=makespan,
+            )
+
+
+@app.command()
+def merge(
+    shard_manifests: Annotated[
+        list[Path],
+        typer.Argument(
+            help="The shard manifest written by each node of a sharded run.",
+            exists=True,
+            dir_okay=False,
+        ),
+    ],
+    path_in: Annotated[
+        Path | None,
+        typer.Option(
+            help="Also check the shards against a scan of the run's input "
+            "directory, so inputs that no node found are reported.",
+            exists=True,
+            file_okay=False,
+        ),
+    ] = None,
+    recurse: Annotated[
+        bool, typer.Option(help="Scan sub directories of --path-in.")
+    ] = False,
+    report_out: Annotated[
+        Path | None,
+        typer.Option(help="Write the combined report to this json file."),
+    ] = None,
+):
+    """Check that the shards of a run cover every input exactly once.
+
+    Reports the combined page count and throughput of the nodes, using the wall
+    clock time from the first node starting to the last node finishing. Exits
+    with status 1 if a shard is missing, an input is in more than one shard, or
+    an input is in no shard.
     """
+    from pfmsoft.pdf2txt.shard import merge_shard_manifests
+
+    expected_files = None
+    if path_in is not None:
+        expected_files = {
+            path.relative_to(path_in).as_posix()
+            for path, _ in scan_pdf_files(path_in, recurse=recurse)
+        }
+    report = merge_shard_manifests(shard_manifests, expected_files=expected_files)
+    typer.echo(f"Shards: {report.shards}")
+    typer.echo(f"Files: {report.files}")
+    for status, count in sorted(report.status_counts.items()):
+        typer.echo(f"  {status}: {count}")
+    typer.echo(f"Pages: {report.pages}")
+    typer.echo(f"Wall seconds: {report.wall_seconds:.1f}")
+    typer.echo(f"Node seconds: {report.node_seconds:.1f}")
+    typer.echo(f"Pages per second: {report.pages_per_second:.1f}")
+    typer.echo(f"MiB per second: {report.bytes_per_second / (1024 * 1024):.2f}")
+    if report_out is not None:
+        data = asdict(report) | {
+            "pages_per_second": report.pages_per_second,
+            "bytes_per_second": report.bytes_per_second,
+        }
+        report_out.parent.mkdir(parents=True, exist_ok=True)
+        report_out.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    for problem in report.problems:
+        typer.echo(problem, err=True)
+    if report.problems:
+        raise typer.Exit(code=1)
+    typer.echo("The shards cover every input exactly once.")
+
+
+@app.command()
+def watch(
+    ctx: typer.Context,
+    path_in: Annotated[
+        Path,
+        typer.Argument(
+            help="source directory to watch for files ending in .pdf, case "
+            "insensitive.",
+            exists=True,
+            file_okay=False,
+            dir_okay=True,
+        ),
+    ],
+    path_out: Annotated[
+        Path, typer.Argument(help="destination directory for text files.")
+    ],
+    overwrite: Annotated[
+        bool, typer.Option(help="Overwrite existing output file.")
+    ] = False,
+    recurse: Annotated[
+        bool, typer.Option(help="Also watch sub directories of path_in,")
+    ] = False,
+    workers: Annotated[
+        int,
+        typer.Option(
+            min=0,
+            help="Number of worker processes, the most files extracted at once. "
+            "0 uses all available cores.",
+        ),
+    ] = 1,
+    poll_interval: Annotated[
+        float,
+        typer.Option(min=0.01, help="Seconds between scans of PATH_IN."),
+    ] = 1.0,
+    debounce: Annotated[
+        float,
+        typer.Option(
+            min=0,
+            help="Seconds a new or changed file must keep the same size and mtime "
+            "before it is extracted, so files still being written are left alone.",
+        ),
+    ] = 2.0,
+    max_idle: Annotated[
+        float | None,
+        typer.Option(
+            min=0,
+            help="Exit after this many seconds with nothing to extract. By "
+            "default, watch until interrupted.",
+        ),
+    ] = None,
+    manifest_location: ManifestLocationOption = ManifestLocation.OUTPUT,
+    layout: LayoutOption = LayoutMode.FULL,
+    compress: CompressOption = Compression.NONE,
+    compress_level: CompressLevelOption = None,
+    font_cache_size: FontCacheSizeOption = DEFAULT_FONT_CACHE_SIZE,
+    page_cache: PageCacheOption = None,
+    page_cache_size: PageCacheSizeOption = 1024,
+):
+    """Extract pdf files as they are added to a directory, or change.
+
+    PATH_IN is scanned every --poll-interval seconds, keeping the size and mtime
+    of its files in memory. A new or changed file is extracted once it has stayed
+    the same for --debounce seconds, by a pool of worker processes that is kept
+    for the whole watch.
+
+    Extracted files are recorded in the same manifest as `all --incremental`, so
+    files that are current when the watch starts are skipped, and the outputs of
+    changed files are overwritten. The manifest is saved whenever the workers
+    have nothing left to do, and when the watch stops.
+    """
+    from pfmsoft.pdf2txt.extract_txt import layout_params
+    from pfmsoft.pdf2txt.manifest import Manifest
+    from pfmsoft.pdf2txt.watch import DirectoryIndex
+
     if path_out.is_file():
         raise typer.BadParameter(
             f"PATH_OUT: {path_out} is an existing file, not a directory."
         )
-    if recurse:
-        input_files = list(path_in.glob("**/*.pdf", case_sensitive=False))
-    else:
-        input_files = list(path_in.glob("*.pdf", case_sensitive=False))
-    if not input_files:
-        raise typer.BadParameter(f"No pdf files were found in {path_in}")
-    jobs: list[ExtractJob] = []
-    for input_file in input_files:
+    manifest = Manifest.load(
+        path=manifest_path(path_out=path_out, location=manifest_location),
+        source_dir=path_in,
+        la_params=layout_params(layout),
+    )
+
+    def make_job(input_file: Path, stat: os.stat_result) -> ExtractJob | None:
         job = ExtractJob(
             path_in=input_file,
             path_out=path_delta(
                 source_base_path=path_in,
                 source_sub_path=input_file,
                 destination_base_path=path_out,
-            ),
+            ).with_suffix(f".txt{SUFFIXES[compress]}"),
+            overwrite=overwrite or manifest.has_entry(input_file),
+            halt_on_fail=False,
+            profile_dir=profile_dir_from(ctx),
+            layout=layout,
+            size=stat.st_size,
+            compression=compress,
+            compress_level=compress_level,
+            font_cache_size=font_cache_size,
+            page_cache=page_cache,
+            page_cache_bytes=page_cache_size * 1024 * 1024,
+        )
+        if manifest.is_current(path_in=job.path_in, path_out=job.path_out, stat=stat):
+            return None
+        job.stat = stat
+        job.sha256 = manifest.input_sha256(job.path_in)
+        return job
+
+    typer.echo(f"Watching {path_in}")
+    try:
+        for result in watch_jobs(
+            DirectoryIndex(path_in, recurse=recurse, debounce=debounce),
+            make_job=make_job,
+            workers=resolve_workers(workers),
+            poll_interval=poll_interval,
+            max_idle=max_idle,
+            on_idle=manifest.save,
+        ):
+            if result.error is not None:
+                typer.echo(
+                    f"Skipping {result.job.path_in}\n\tCause: {result.error}", err=True
+                )
+                continue
+            manifest.record(
+                path_in=result.job.path_in,
+                path_out=result.job.path_out,
+                stat=result.job.stat,
+                sha256=result.job.sha256,
+            )
+            typer.echo(f"Extracted {result.job.path_in}")
+    except KeyboardInterrupt:
+        typer.echo("Stopped watching.")
+    finally:
+        manifest.save()
+
+
+def manifest_path(path_out: Path, location: ManifestLocation) -> Path:
+    """Get the path of the incremental manifest for an output directory."""
+    from pfmsoft.pdf2txt.manifest import MANIFEST_FILE_NAME
+
+    if location == ManifestLocation.OUTPUT:
+        return path_out / MANIFEST_FILE_NAME
+    # Imported here, as main_typer imports this module.
+    from pfmsoft.pdf2txt.cli.main_typer import app_dir
+
+    digest = hashlib.sha256(str(path_out.resolve()).encode()).hexdigest()[:16]
+    return app_dir() / "manifests" / f"{digest}.json"
+
+
+def build_jobs_from_directory(
+    path_in: Path,
+    path_out: Path,
+    recurse: bool,
+    overwrite: bool,
+    halt_on_fail: bool,
+    manifest: "Manifest | None" = None,
+    profile_dir: Path | None = None,
+    layout: LayoutMode = LayoutMode.FULL,
+    journal: Journal | None = None,
+    sink: SinkKind = SinkKind.FILES,
+    compression: Compression = Compression.NONE,
+    compress_level: int | None = None,
+    font_cache_size: int = 0,
+    page_cache: Path | None = None,
+    page_cache_bytes: int = 0,
+    shard: "ShardManifest | None" = None,
+) -> list[ExtractJob]:
+    """Build extract jobs based on pdf files foud in a directory.
+
+    Scans the whole directory before returning. See `iter_jobs_from_directory`
+    for the arguments.
+
+    Returns:
+        list[ExtractJob]: The jobs.
+    """
+    return list(
+        iter_jobs_from_directory(
+            path_in=path_in,
+            path_out=path_out,
+            recurse=recurse,
             overwrite=overwrite,
             halt_on_fail=halt_on_fail,
+            manifest=manifest,
+            profile_dir=profile_dir,
+            layout=layout,
+            journal=journal,
+            sink=sink,
+            compression=compression,
+            compress_level=compress_level,
+            font_cache_size=font_cache_size,
+            page_cache=page_cache,
+            page_cache_bytes=page_cache_bytes,
+            shard=shard,
+        )
+    )
+
+
+def iter_jobs_from_directory(
+    path_in: Path,
+    path_out: Path,
+    recurse: bool,
+    overwrite: bool,
+    halt_on_fail: bool,
+    manifest: "Manifest | None" = None,
+    profile_dir: Path | None = None,
+    layout: LayoutMode = LayoutMode.FULL,
+    journal: Journal | None = None,
+    sink: SinkKind = SinkKind.FILES,
+    compression: Compression = Compression.NONE,
+    compress_level: int | None = None,
+    font_cache_size: int = 0,
+    page_cache: Path | None = None,
+    page_cache_bytes: int = 0,
+    shard: "ShardManifest | None" = None,
+) -> Iterator[ExtractJob]:
+    """Make extract jobs for pdf files in a directory, as the files are found.
+
+    Each input file is stat'd once, while scanning, and its size is kept on the
+    job.
+
+    Args:
+        path_in: The directory to search for files ending in .pdf, case
+            insensitive.
+        path_out: The directory for the text files, or the container file of a
+            sink.
+        recurse: Also search sub directories, reproducing them under `path_out`.
+        overwrite: Overwrite existing output files.
+        halt_on_fail: Stop the run if a job fails.
+        manifest: Skip input files with a current entry in the manifest, and
+            allow overwriting outputs that the manifest recorded.
+        profile_dir: Profile each job, saving .pstats files to this directory.
+        layout: How much layout analysis to do.
+        journal: Skip input files completed by an earlier attempt at the run,
+            without stat'ing them, and overwrite outputs that the attempt wrote
+            without recording them.
+        sink: Where the text goes. For a sink other than files, the jobs return
+            their text, and the job's `path_out` is the container file.
+        compression: Compress the text files, adding the compression's suffix to
+            their names, e.g. `.txt.gz`.
+        compress_level: Compression level, 1 to 9, or None for the default.
+        font_cache_size: Fonts each worker process keeps decoded across jobs,
+            0 for no cache.
+        page_cache: The database of page text to reuse and add to, if any.
+        page_cache_bytes: The size limit of the page cache.
+        shard: Only make jobs for the inputs of this shard, recording each input
+            of the shard, and those skipped as current or completed, in it.
+
+    Raises:
+        typer.BadParameter: If `path_out` is a file. Raised immediately.
+        typer.BadParameter: If no pdf files are found. Raised when the scan
+            finishes.
+
+    Returns:
+        An iterator of the jobs.
+    """
+    if sink == SinkKind.FILES and path_out.is_file():
+        raise typer.BadParameter(
+            f"PATH_OUT: {path_out} is an existing file, not a directory."
         )
-        job.path_out = job.path_out.with_suffix(".txt")
-        jobs.append(job)
-    return jobs
+
+    def jobs() -> Iterator[ExtractJob]:
+        found = False
+
+        def completed(input_file: Path) -> bool:
+            nonlocal found
+            found = True
+            if shard is not None and not shard.claim(input_file):
+                return True
+            if journal is not None and journal.is_completed(input_file):
+                if shard is not None:
+                    shard.record(input_file, status="resumed")
+                return True
+            return False
+
+        for input_file, stat in scan_pdf_files(
+            path_in, recurse=recurse, skip=completed
+        ):
+            job = ExtractJob(
+                path_in=input_file,
+                path_out=path_delta(
+                    source_base_path=path_in,
+                    source_sub_path=input_file,
+                    destination_base_path=path_out,
+                ).with_suffix(f".txt{SUFFIXES[compression]}"),
+                overwrite=overwrite,
+                halt_on_fail=halt_on_fail,
+                profile_dir=profile_dir,
+                layout=layout,
+                size=stat.st_size,
+                sink=sink,
+                compression=compression,
+                compress_level=compress_level,
+                font_cache_size=font_cache_size,
+                page_cache=page_cache,
+                page_cache_bytes=page_cache_bytes,
+            )
+            if sink != SinkKind.FILES:
+                job.path_out = path_out
+            if manifest is not None:
+                if manifest.is_current(
+                    path_in=job.path_in, path_out=job.path_out, stat=stat
+                ):
+                    if shard is not None:
+                        shard.record(job.path_in, status="current")
+                    continue
+                job.overwrite = job.overwrite or manifest.has_entry(job.path_in)
+                job.stat = stat
+                job.sha256 = manifest.input_sha256(job.path_in)
+            if journal is not None and journal.written_by_run(job.path_out):
+                job.overwrite = True
+            yield job
+        if not found:
+            raise typer.BadParameter(f"No pdf files were found in {path_in}")
+
+    return jobs()
 
 
 if __name__ == "__main__":
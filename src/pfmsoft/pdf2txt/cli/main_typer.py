@@ -2,13 +2,14 @@
 
 import datetime
 import logging
+from functools import partial
 from pathlib import Path
-from time import perf_counter_ns
+from time import perf_counter_ns, time
 from typing import Annotated
 
 import typer
 
-from pfmsoft.pdf2txt.cli import extract_txt_cli
+from pfmsoft.pdf2txt.cli import bench_cli, extract_txt_cli, serve_cli
 
 logger = logging.getLogger(__name__)
 
@@ -28,12 +29,28 @@ def default_options(
     ctx: typer.Context,
     debug: Annotated[bool, typer.Option(help="Enable debug output.")] = False,
     verbosity: Annotated[int, typer.Option("-v", help="Verbosity.", count=True)] = 1,
+    profile: Annotated[
+        Path | None,
+        typer.Option(
+            help="Profile the extraction work, including worker processes. "
+            "Writes .pstats files for each file, and a combined report, "
+            "to this directory.",
+            file_okay=False,
+        ),
+    ] = None,
+    profile_top: Annotated[
+        int, typer.Option(help="Number of hot functions in the profile report.")
+    ] = 30,
 ):
     """Describe what your app does here."""
     ctx.ensure_object(dict)
     ctx.obj["START_TIME"] = perf_counter_ns()
+    ctx.obj["START_TIMESTAMP"] = time()
     ctx.obj["DEBUG"] = debug
     ctx.obj["VERBOSITY"] = verbosity
+    ctx.obj["PROFILE_DIR"] = profile
+    if profile is not None:
+        ctx.call_on_close(partial(profile_report, profile_dir=profile, top=profile_top))
     if ctx.obj["VERBOSITY"] >= 3:
         typer.echo(f"Verbosity: {ctx.obj["VERBOSITY"]}")
         typer.echo(f"Debug: {ctx.obj["DEBUG"]}")
@@ -42,8 +59,20 @@ def default_options(
         typer.echo(f"Started at: {formatted_time}")
 
 
+def profile_report(profile_dir: Path, top: int):
+    """Combine the profiles of a run, and write the hot function report."""
+    # Imported here, to keep cli startup fast.
+    from pfmsoft.pdf2txt.profiling import write_profile_report
+
+    report_path = write_profile_report(profile_dir=profile_dir, top=top)
+    if report_path is not None:
+        typer.echo(f"Profile report written to {report_path}", err=True)
+
+
 app = typer.Typer(callback=default_options)
 app.add_typer(extract_txt_cli.app, name="extract", help="Extract text from pdf files.")
+app.command(name="bench")(bench_cli.bench)
+app.command(name="serve")(serve_cli.serve)
 
 
 if __name__ == "__main__":
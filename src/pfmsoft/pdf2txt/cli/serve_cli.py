@@ -0,0 +1,65 @@
+"""Command-line interface for the long lived extraction server."""
+
+import signal
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from pfmsoft.pdf2txt.options import DEFAULT_FONT_CACHE_SIZE
+
+
+def serve(
+    socket_path: Annotated[
+        Path,
+        typer.Argument(help="Path of the Unix domain socket to listen on."),
+    ],
+    workers: Annotated[
+        int,
+        typer.Option(min=1, help="Number of warm worker processes."),
+    ] = 1,
+    queue_size: Annotated[
+        int,
+        typer.Option(
+            min=0,
+            help="Jobs that can be queued or running at once, across all "
+            "connections. 0 uses four per worker.",
+        ),
+    ] = 0,
+    font_cache_size: Annotated[
+        int,
+        typer.Option(
+            min=0,
+            help="Fonts each worker keeps decoded between requests, so documents "
+            "that embed the same fonts skip decoding them. 0 turns the cache off.",
+        ),
+    ] = DEFAULT_FONT_CACHE_SIZE,
+):
+    """Serve extraction requests on a Unix domain socket, until interrupted.
+
+    Worker processes are started once, and kept warm between requests, so a
+    request does not pay for starting Python and importing pdfminer.six. Clients
+    send json lines requests, see `pfmsoft.pdf2txt.client.ExtractClient`. When
+    the queue is full, the server stops reading requests until a job finishes.
+    """
+    # Imported here, to keep cli startup fast.
+    from pfmsoft.pdf2txt.server import ExtractServer
+
+    try:
+        server = ExtractServer(
+            socket_path=socket_path,
+            workers=workers,
+            queue_size=queue_size,
+            font_cache_size=font_cache_size,
+        )
+    except FileExistsError as e:
+        raise typer.BadParameter(str(e)) from e
+    # Stop cleanly on SIGTERM, as on Ctrl-C.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    typer.echo(f"Listening on {socket_path} with {workers} workers.", err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        typer.echo("Shutting down.", err=True)
+    finally:
+        server.server_close()
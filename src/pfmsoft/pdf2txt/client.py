@@ -0,0 +1,95 @@
+"""A client for the extraction server started by `pfmsoft-pdf2txt serve`."""
+
+import json
+import socket
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict
+from pathlib import Path
+
+from pfmsoft.pdf2txt.server import ServeRequest, ServeResponse
+
+
+class ExtractClient:
+    """Submits extraction requests to a server, and streams back the responses.
+
+    Example:
+        ```python
+        client = ExtractClient(Path("/run/pdf2txt.sock"))
+        response = client.extract(Path("report.pdf"))
+        if response.ok:
+            print(response.text)
+        ```
+    """
+
+    def __init__(self, socket_path: Path, timeout: float | None = None):
+        """Make a client.
+
+        Args:
+            socket_path: The server's socket file.
+            timeout: Seconds to wait on the socket, or None to wait forever.
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def extract_many(self, requests: Iterable[ServeRequest]) -> Iterator[ServeResponse]:
+        """Submit requests over one connection, yielding responses as they finish.
+
+        The requests are sent from a background thread, so sending waits on the
+        server's queue without holding up the responses. Give each request an
+        `id` to match the responses, which arrive in completion order.
+
+        Yields:
+            A response for each request.
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(str(self.socket_path))
+            send_error: list[BaseException] = []
+
+            def send_requests():
+                try:
+                    with sock.makefile("wb") as fp_out:
+                        for request in requests:
+                            fp_out.write((json.dumps(asdict(request)) + "\n").encode())
+                            fp_out.flush()
+                except BaseException as e:
+                    send_error.append(e)
+                finally:
+                    sock.shutdown(socket.SHUT_WR)
+
+            sender = threading.Thread(target=send_requests, name="client-send")
+            sender.start()
+            try:
+                with sock.makefile("rb") as fp_in:
+                    for line in fp_in:
+                        yield ServeResponse(**json.loads(line))
+            finally:
+                sender.join()
+            if send_error:
+                raise send_error[0]
+
+    def extract(
+        self,
+        path_in: Path,
+        path_out: Path | None = None,
+        overwrite: bool = False,
+        layout: str = "full",
+    ) -> ServeResponse:
+        """Extract the text of one pdf file.
+
+        Args:
+            path_in: The pdf file, as a path the server can read.
+            path_out: Write the text to this file on the server, instead of
+                returning it.
+            overwrite: Overwrite an existing `path_out`.
+            layout: How much layout analysis to do, full, fast, or none.
+        """
+        request = ServeRequest(
+            path_in=str(Path(path_in).resolve()),
+            path_out=None if path_out is None else str(Path(path_out).resolve()),
+            overwrite=overwrite,
+            layout=layout,  # type: ignore[arg-type]
+        )
+        (response,) = self.extract_many([request])
+        return response
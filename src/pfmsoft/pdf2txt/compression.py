@@ -0,0 +1,82 @@
+"""Streaming compression of extracted text."""
+
+import io
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import BinaryIO, TextIO
+
+from pfmsoft.pdf2txt.options import Compression
+
+
+SUFFIXES = {
+    Compression.NONE: "",
+    Compression.GZIP: ".gz",
+    Compression.XZ: ".xz",
+    Compression.BZ2: ".bz2",
+}
+
+DEFAULT_LEVELS = {
+    Compression.GZIP: 6,
+    Compression.XZ: 6,
+    Compression.BZ2: 9,
+}
+
+
+def compressor(
+    fp_out: BinaryIO, compression: Compression, level: int | None = None
+) -> BinaryIO:
+    """Wrap a binary file in a streaming compressor.
+
+    Closing the compressor finishes the compressed stream, but does not close
+    `fp_out`.
+
+    Args:
+        fp_out: The binary file to write the compressed data to.
+        compression: The compression format. Not `Compression.NONE`.
+        level: Compression level, 1 (fastest) to 9 (smallest). Defaults to a
+            level that favors speed for gzip and xz.
+    """
+    if level is None:
+        level = DEFAULT_LEVELS[compression]
+    # Imported here, so that only the format in use is imported.
+    match compression:
+        case Compression.GZIP:
+            import gzip
+
+            # An empty name and zero mtime keep the output reproducible.
+            return gzip.GzipFile(
+                filename="", mode="wb", compresslevel=level, fileobj=fp_out, mtime=0
+            )  # type: ignore[return-value]
+        case Compression.XZ:
+            import lzma
+
+            return lzma.LZMAFile(fp_out, mode="wb", preset=level)  # type: ignore[return-value]
+        case Compression.BZ2:
+            import bz2
+
+            return bz2.BZ2File(fp_out, mode="wb", compresslevel=level)  # type: ignore[return-value]
+    raise ValueError(f"Not a compression format: {compression}")
+
+
+@contextmanager
+def text_writer(
+    fp_out: BinaryIO,
+    compression: Compression = Compression.NONE,
+    level: int | None = None,
+) -> Iterator[TextIO]:
+    """Write utf-8 text to a binary file, through an optional streaming compressor.
+
+    The text is compressed as it is written, so the uncompressed text is never
+    held in memory or written to disk. `fp_out` is left open.
+    """
+    raw = (
+        fp_out
+        if compression == Compression.NONE
+        else compressor(fp_out, compression=compression, level=level)
+    )
+    text = io.TextIOWrapper(raw, encoding="utf-8")  # type: ignore[type-var]
+    yield text
+    text.flush()
+    text.detach()
+    if raw is not fp_out:
+        raw.close()
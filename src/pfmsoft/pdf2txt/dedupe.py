@@ -0,0 +1,124 @@
+"""Find inputs with identical content, so each unique document is extracted once."""
+
+import errno
+import os
+import shutil
+import sys
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+from pfmsoft.pdf2txt.discovery import raise_if_prefetch_stopped
+from pfmsoft.pdf2txt.manifest import file_sha256
+from pfmsoft.pdf2txt.options import LinkMethod
+from pfmsoft.pdf2txt.snippets.atomic_write import fsync_directory, temporary_path_for
+from pfmsoft.pdf2txt.snippets.check_file import check_file
+
+# The FICLONE ioctl of Linux, from linux/fs.h.
+_FICLONE = 0x40049409
+# Errors meaning the file system, or the platform, cannot clone files.
+_NO_CLONE_ERRORS = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL}
+
+
+def group_duplicates[T](
+    items: Iterable[T],
+    path: Callable[[T], Path],
+    size: Callable[[T], int],
+) -> Iterator[tuple[T, list[T]]]:
+    """Group items whose files have identical content.
+
+    Only files that share their size with another file are hashed, so a batch of
+    files with distinct sizes is not read at all. Every item is read from
+    `items` before the first group is yielded.
+
+    Args:
+        items: The items, e.g. extraction jobs.
+        path: Gets the path of an item's file.
+        size: Gets the size of an item's file, in bytes.
+
+    Yields:
+        Each unique item, in the order of `items`, and the later items with the
+        same content.
+    """
+    all_items = list(items)
+    by_size: dict[int, list[T]] = {}
+    for item in all_items:
+        by_size.setdefault(size(item), []).append(item)
+    # The duplicates of each unique item, keyed by the id of the unique item.
+    duplicates: dict[int, list[T]] = {}
+    is_duplicate: set[int] = set()
+    for same_size in by_size.values():
+        if len(same_size) == 1:
+            continue
+        originals: dict[str, T] = {}
+        for item in same_size:
+            raise_if_prefetch_stopped()
+            digest = file_sha256(path(item))
+            original = originals.setdefault(digest, item)
+            if original is not item:
+                duplicates.setdefault(id(original), []).append(item)
+                is_duplicate.add(id(item))
+    for item in all_items:
+        if id(item) not in is_duplicate:
+            yield item, duplicates.get(id(item), [])
+
+
+def reproduce_file(
+    source: Path,
+    destination: Path,
+    method: LinkMethod = LinkMethod.REFLINK,
+    overwrite: bool = False,
+) -> LinkMethod:
+    """Make `destination` a file with the same content as `source`.
+
+    The new file is made under a temporary name, and renamed to `destination`,
+    so readers never see a partial file.
+
+    Args:
+        source: The existing file.
+        destination: The file to make.
+        method: How to make the file. A hardlink or reflink that the file system
+            does not support falls back to a copy.
+        overwrite: Replace an existing `destination`.
+
+    Raises:
+        ValueError: If `destination` exists and `overwrite` is false.
+
+    Returns:
+        The method that was used.
+    """
+    check_file(path_out=destination, ensure_parents=True, overwrite=overwrite)
+    tmp_path = temporary_path_for(destination)
+    tmp_path.unlink(missing_ok=True)
+    try:
+        used = _reproduce(source, tmp_path, method)
+        with open(tmp_path, mode="r+b") as fp_tmp:
+            os.fsync(fp_tmp.fileno())
+        os.replace(tmp_path, destination)
+        fsync_directory(destination.parent)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return used
+
+
+def _reproduce(source: Path, destination: Path, method: LinkMethod) -> LinkMethod:
+    if method == LinkMethod.HARDLINK:
+        try:
+            os.link(source, destination)
+            return LinkMethod.HARDLINK
+        except OSError as e:
+            if e.errno not in {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP}:
+                raise
+    elif method == LinkMethod.REFLINK and sys.platform == "linux":
+        # Imported here, as it is not available on Windows.
+        import fcntl
+
+        with open(source, mode="rb") as fp_in, open(destination, mode="wb") as fp_out:
+            try:
+                fcntl.ioctl(fp_out.fileno(), _FICLONE, fp_in.fileno())
+                return LinkMethod.REFLINK
+            except OSError as e:
+                if e.errno not in _NO_CLONE_ERRORS:
+                    raise
+    shutil.copyfile(source, destination)
+    return LinkMethod.COPY
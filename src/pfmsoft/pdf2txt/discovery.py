@@ -0,0 +1,123 @@
+"""Find input files, streaming them to the caller as they are found."""
+
+import os
+import queue
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+_producer = threading.local()
+
+
+class PrefetchStopped(Exception):
+    """Raised in the producer thread of `prefetch` once its consumer has stopped."""
+
+
+def raise_if_prefetch_stopped():
+    """Stop the work of a `prefetch` producer thread once its consumer has stopped.
+
+    Long steps run by the producer, such as a directory scan, or a sort of every
+    job that waits for the scan, call this often, so that a consumer that stops
+    early does not wait for them to finish. Does nothing in other threads.
+
+    Raises:
+        PrefetchStopped: If called in a producer thread whose consumer stopped.
+    """
+    stop = getattr(_producer, "stop", None)
+    if stop is not None and stop.is_set():
+        raise PrefetchStopped()
+
+
+def scan_pdf_files(
+    directory: Path,
+    recurse: bool = False,
+    skip: Callable[[Path], bool] | None = None,
+) -> Iterator[tuple[Path, os.stat_result]]:
+    """Find files ending in .pdf, case insensitive, with `os.scandir`.
+
+    Each file is stat'd once, and the stat result is yielded with its path, so
+    callers do not need to stat it again. Symlinked files are followed, but
+    symlinked directories are not, matching `Path.glob("**/*.pdf")`.
+
+    Args:
+        directory: The directory to search.
+        recurse: Also search sub directories.
+        skip: Called with the path of each pdf file before it is stat'd. Files it
+            returns True for are left out.
+
+    Raises:
+        PrefetchStopped: In the producer thread of `prefetch`, once its consumer
+            has stopped.
+
+    Yields:
+        The path and stat result of each pdf file, in directory order.
+    """
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        sub_directories = []
+        with os.scandir(current) as entries:
+            for entry in entries:
+                raise_if_prefetch_stopped()
+                if recurse and entry.is_dir(follow_symlinks=False):
+                    sub_directories.append(Path(entry.path))
+                elif entry.name.lower().endswith(".pdf") and entry.is_file():
+                    path = Path(entry.path)
+                    if skip is None or not skip(path):
+                        yield path, entry.stat()
+        # Reversed, so the sub directories are popped in directory order.
+        pending.extend(reversed(sub_directories))
+
+
+_DONE = object()
+
+
+def prefetch[T](
+    items: Iterable[T],
+    on_item: Callable[[T], None] | None = None,
+) -> Iterator[T]:
+    """Iterate over items that are produced by a background thread.
+
+    Producing the items, e.g. scanning a large network share, runs ahead of the
+    consumer, so the scan overlaps with the work done on each item. When the
+    consumer stops early, the producer is stopped before its next item, or at its
+    next call of `raise_if_prefetch_stopped`, e.g. part way through a scan.
+
+    Args:
+        items: The items to produce. Iterated in the background thread.
+        on_item: Called in the background thread as each item is produced, before
+            the consumer reaches it.
+
+    Raises:
+        Exception: Any error raised while producing the items, once the items
+            produced before it have been consumed.
+
+    Yields:
+        The items, in order.
+    """
+    buffer: queue.SimpleQueue = queue.SimpleQueue()
+    stop = threading.Event()
+
+    def produce():
+        _producer.stop = stop
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                if on_item is not None:
+                    on_item(item)
+                buffer.put(item)
+        except BaseException as e:
+            buffer.put(e)
+        buffer.put(_DONE)
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while (item := buffer.get()) is not _DONE:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
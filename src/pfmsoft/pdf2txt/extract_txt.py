@@ -1,25 +1,549 @@
 """Extract text from pdf file."""
 
+import multiprocessing
+import os
+import sys
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from io import BytesIO, StringIO
 from pathlib import Path
+from time import perf_counter
+from typing import BinaryIO, TextIO
 
-from pdfminer.high_level import extract_text_to_fp
-from pdfminer.layout import LAParams
+from pdfminer.converter import PDFPageAggregator, TextConverter
+from pdfminer.layout import (
+    LAParams,
+    LTAnno,
+    LTChar,
+    LTComponent,
+    LTLayoutContainer,
+)
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdftypes import resolve1
 
+from pfmsoft.pdf2txt.compression import text_writer
+from pfmsoft.pdf2txt.metrics import ExtractMetrics
+from pfmsoft.pdf2txt.options import Compression, LayoutMode
+from pfmsoft.pdf2txt.page_cache import PageCache, page_key
+from pfmsoft.pdf2txt.profiling import profile_path_for, run_profiled
+from pfmsoft.pdf2txt.resource_cache import CachingResourceManager, shared_font_cache
+from pfmsoft.pdf2txt.snippets.atomic_write import atomic_open
 from pfmsoft.pdf2txt.snippets.check_file import check_file
 
+PageCallback = Callable[[int, int | None], None]
+
+
+@contextmanager
+def open_pdf(file_in: Path, metrics: ExtractMetrics) -> Iterator[BinaryIO]:
+    """Open a pdf file for reading, recording its size in the metrics.
+
+    The size is taken from the open file, so a file that was stat'd by the scan
+    that found it is not stat'd again by path, which is a round trip to the
+    server on a network file system.
+    """
+    with open(file_in, mode="rb") as fp_in:
+        metrics.bytes_in = os.fstat(fp_in.fileno()).st_size
+        yield fp_in
+
+
+class LineLAParams(LAParams):
+    """Layout parameters of the fast mode, which only breaks the text into lines.
+
+    `lines_only` tells these parameters apart from those of the full mode, in
+    the incremental manifest and the page cache keys.
+    """
+
+    def __init__(self, **kwargs):
+        """Make the parameters, taking the same arguments as `LAParams`."""
+        super().__init__(**kwargs)
+        self.lines_only = True
+
+
+def layout_params(
+    layout: LayoutMode = LayoutMode.FULL, la_params: LAParams | None = None
+) -> LAParams | None:
+    """The layout parameters for a layout mode.
+
+    Args:
+        layout: The layout mode.
+        la_params: Parameters to use for the full and fast modes, instead of the
+            defaults. The fast mode only uses the line overlap, and the char and
+            word margins.
+
+    Returns:
+        The parameters, or None for no layout analysis.
+    """
+    if layout == LayoutMode.NONE:
+        return None
+    if la_params is None:
+        la_params = LAParams()
+    if layout == LayoutMode.FAST and not isinstance(la_params, LineLAParams):
+        la_params = LineLAParams(**vars(la_params))
+    return la_params
+
+
+def analyze_layout(container: LTLayoutContainer, la_params: LAParams):
+    """Run the layout analysis of a page, as its layout parameters ask.
+
+    With `LineLAParams`, the characters are left in content stream order, with a
+    space between words and a line break between lines, in one pass over the
+    characters. Nothing is grouped into line or box objects, and the boxes are
+    not ordered, which is where the full analysis spends its time. All text is
+    taken to be horizontal.
+    """
+    if not isinstance(la_params, LineLAParams):
+        container.analyze(la_params)
+        return
+    text: list[LTComponent] = []
+    others: list[LTComponent] = []
+    prev = None
+    for obj in container:
+        if not isinstance(obj, LTChar):
+            obj.analyze(la_params)
+            others.append(obj)
+            continue
+        if prev is not None:
+            # The same tests as pdfminer's grouping of characters into lines.
+            overlap = min(prev.y1, obj.y1) - max(prev.y0, obj.y0)
+            gap = obj.x0 - prev.x1
+            if (
+                overlap > min(prev.height, obj.height) * la_params.line_overlap
+                and max(gap, prev.x0 - obj.x1)
+                < max(prev.width, obj.width) * la_params.char_margin
+            ):
+                if gap > la_params.word_margin * max(obj.width, obj.height):
+                    text.append(LTAnno(" "))
+            else:
+                text.append(LTAnno("\n"))
+        text.append(obj)
+        prev = obj
+    if prev is not None:
+        text.append(LTAnno("\n"))
+    container._objs = text + others
+
 
 def extract_text_from_pdf_to_file(
     file_in: Path,
     file_out: Path,
     overwrite: bool = False,
     la_params: LAParams | None = None,
+    layout: LayoutMode = LayoutMode.FULL,
+    compression: Compression = Compression.NONE,
+    compress_level: int | None = None,
+    font_cache_size: int = 0,
+    page_cache: PageCache | None = None,
+    on_page: PageCallback | None = None,
+) -> ExtractMetrics:
+    """Extract text from a pdf file.
+
+    The text is written to a temporary file that is renamed to `file_out` when it
+    is complete, so an interrupted extraction never leaves a truncated file.
+
+    Args:
+        file_in: The pdf file.
+        file_out: The text file. Its name is used as is, so give it a suffix that
+            matches the compression, e.g. `.txt.gz`.
+        overwrite: Overwrite an existing output file.
+        la_params: Layout parameters. Defaults to those of `layout`.
+        layout: How much layout analysis to do.
+        compression: Compress the text as it is written.
+        compress_level: Compression level, 1 to 9. Defaults to the format's
+            default in `compression.DEFAULT_LEVELS`.
+        font_cache_size: Share decoded fonts with the other documents extracted
+            by this process, in a cache of this many fonts. 0 decodes the fonts
+            of each document afresh.
+        page_cache: Reuse the text of pages that were extracted before, and add
+            the text of new pages to this cache.
+        on_page: Called with the page number, and the page count of the
+            document if it is known, as each page is extracted.
+
+    Returns:
+        The page count, sizes, and phase timings of the extraction.
+    """
+    start = perf_counter()
+    metrics = ExtractMetrics(path_in=str(file_in), path_out=str(file_out))
+    check_file(path_out=file_out, ensure_parents=True, overwrite=overwrite)
+    with (
+        open_pdf(file_in, metrics) as fp_in,
+        atomic_open(file_out, mode="wb") as fp_binary,
+        text_writer(fp_binary, compression=compression, level=compress_level) as fp_out,
+    ):
+        write_pages(
+            iter_text_pages(
+                fp_in,
+                la_params=la_params,
+                layout=layout,
+                metrics=metrics,
+                font_cache_size=font_cache_size,
+                page_cache=page_cache,
+                on_page=on_page,
+            ),
+            fp_out=fp_out,
+            metrics=metrics,
+        )
+    metrics.total_seconds = perf_counter() - start
+    return metrics
+
+
+def write_pages(
+    pages: Iterator[tuple[int, str]],
+    fp_out: TextIO,
+    metrics: ExtractMetrics,
+    flush: bool = False,
 ):
-    """Extract text from a pdf file."""
+    """Write the text of pages to a stream, timing the writes."""
+    for _, text in pages:
+        start = perf_counter()
+        fp_out.write(text)
+        if flush:
+            fp_out.flush()
+        metrics.write_seconds += perf_counter() - start
+        metrics.chars_out += len(text)
+
+
+def iter_text_pages(
+    source: Path | str | bytes | BinaryIO,
+    first_page: int = 1,
+    last_page: int | None = None,
+    la_params: LAParams | None = None,
+    layout: LayoutMode = LayoutMode.FULL,
+    metrics: ExtractMetrics | None = None,
+    font_cache_size: int = 0,
+    page_cache: PageCache | None = None,
+    on_page: PageCallback | None = None,
+) -> Iterator[tuple[int, str]]:
+    """Lazily extract the text of a pdf, one page at a time.
+
+    Pages are only laid out as they are requested, and pages outside of
+    `first_page` to `last_page` are never laid out at all. The text of each page
+    is the same as its part of a whole file extraction, ending in a form feed.
+
+    Example:
+        ```python
+        for page_number, text in iter_text_pages(Path("report.pdf"), last_page=1):
+            print(page_number, text)
+        ```
+
+    Args:
+        source: A path to a pdf file, the bytes of a pdf file, or a binary file
+            object open for reading. A file object is not closed.
+        first_page: The one based number of the first page to extract.
+        last_page: The one based number of the last page to extract, inclusive.
+            Defaults to the last page of the document.
+        la_params: Layout parameters. Defaults to those of `layout`.
+        layout: How much layout analysis to do.
+        metrics: If given, the page count and the parse, layout, and render
+            timings are added to it, and the font and page cache hits and
+            misses.
+        font_cache_size: Share decoded fonts with the other documents extracted
+            by this process, in a cache of this many fonts. 0 decodes the fonts
+            of each document afresh.
+        page_cache: Reuse the text of pages that were extracted before, skipping
+            their interpretation and layout, and add the text of new pages to
+            this cache. The additions are committed when the last page is done.
+        on_page: Called with the page number, and the page count of the
+            document if its page tree gives one, as each page is extracted,
+            before it is yielded. For progress reporting.
+
+    Raises:
+        ValueError: If the page range is empty.
+
+    Yields:
+        The one based page number, and the text of that page.
+    """
+    if first_page < 1 or (last_page is not None and last_page < first_page):
+        raise ValueError(f"Invalid page range {first_page} to {last_page}.")
+    la_params = layout_params(layout=layout, la_params=la_params)
+    if isinstance(source, Path | str):
+        fp_context = open(source, mode="rb")
+    elif isinstance(source, bytes):
+        fp_context = nullcontext(BytesIO(source))
+    else:
+        fp_context = nullcontext(source)
+    # pdfminer page numbers are zero based, and maxpages stops the walk of the
+    # page tree after the last page wanted.
+    page_numbers = None
+    if first_page > 1:
+        page_numbers = range(first_page - 1, last_page or sys.maxsize)
+    max_pages = last_page or 0
+    if metrics is None:
+        metrics = ExtractMetrics()
+    page_text = StringIO()
+    if font_cache_size:
+        rsrcmgr: PDFResourceManager = CachingResourceManager(
+            shared_font_cache(font_cache_size)
+        )
+    else:
+        rsrcmgr = PDFResourceManager()
+    # The aggregator is given no layout parameters, so that layout analysis can
+    # be run, and timed, separately from interpreting the page. This is the same
+    # work TextConverter does in one step.
+    aggregator = PDFPageAggregator(rsrcmgr)
+    renderer = TextConverter(rsrcmgr, page_text, laparams=la_params)
+    interpreter = PDFPageInterpreter(rsrcmgr, aggregator)
+    with fp_context as fp_in:
+        start = perf_counter()
+        pages = PDFPage.get_pages(fp_in, page_numbers, maxpages=max_pages)
+        page_count = None
+        for page_idx, page in enumerate(pages, start=first_page):
+            if on_page is not None and page_idx == first_page:
+                page_count = document_page_count(page)
+            key = None
+            if page_cache is not None:
+                key = page_key(page, la_params)
+                cached = page_cache.get(key)
+                if cached is not None:
+                    metrics.pages += 1
+                    metrics.page_cache_hits += 1
+                    metrics.parse_seconds += perf_counter() - start
+                    if on_page is not None:
+                        on_page(page_idx, page_count)
+                    yield page_idx, cached
+                    start = perf_counter()
+                    continue
+                metrics.page_cache_misses += 1
+            interpreter.process_page(page)
+            ltpage = aggregator.get_result()
+            parsed = perf_counter()
+            if la_params is not None:
+                analyze_layout(ltpage, la_params)
+            analyzed = perf_counter()
+            renderer.receive_layout(ltpage)
+            rendered = perf_counter()
+            metrics.pages += 1
+            metrics.parse_seconds += parsed - start
+            metrics.layout_seconds += analyzed - parsed
+            metrics.render_seconds += rendered - analyzed
+            text = page_text.getvalue()
+            if page_cache is not None and key is not None:
+                page_cache.put(key, text)
+            if on_page is not None:
+                on_page(page_idx, page_count)
+            yield page_idx, text
+            page_text.seek(0)
+            page_text.truncate()
+            start = perf_counter()
+        metrics.parse_seconds += perf_counter() - start
+    renderer.close()
+    if page_cache is not None:
+        page_cache.commit()
+    if isinstance(rsrcmgr, CachingResourceManager):
+        metrics.font_cache_hits += rsrcmgr.font_cache_hits
+        metrics.font_cache_misses += rsrcmgr.font_cache_misses
+
+
+def document_page_count(page: PDFPage) -> int | None:
+    """The page count in the page tree of a page's document, if it has one."""
+    pages = resolve1(page.doc.catalog.get("Pages"))
+    if not isinstance(pages, dict):
+        return None
+    count = resolve1(pages.get("Count"))
+    return count if isinstance(count, int) else None
+
+
+def extract_text_from_pdf_to_stream(
+    file_in: Path,
+    fp_out: TextIO,
+    la_params: LAParams | None = None,
+    layout: LayoutMode = LayoutMode.FULL,
+) -> ExtractMetrics:
+    """Extract text from a pdf file to an open text stream, one page at a time.
+
+    Each page is written as soon as its layout is analyzed, and the stream is
+    flushed at every page boundary, so a reader like a pipe sees text right away.
+
+    Args:
+        file_in: The pdf file.
+        fp_out: The text stream, e.g. `sys.stdout`.
+        la_params: Layout parameters. Defaults to those of `layout`.
+        layout: How much layout analysis to do.
+
+    Returns:
+        The page count, sizes, and phase timings of the extraction.
+    """
+    start = perf_counter()
+    metrics = ExtractMetrics(path_in=str(file_in), path_out="-")
+    with open_pdf(file_in, metrics) as fp_in:
+        write_pages(
+            iter_text_pages(fp_in, la_params=la_params, layout=layout, metrics=metrics),
+            fp_out=fp_out,
+            metrics=metrics,
+            flush=True,
+        )
+    metrics.total_seconds = perf_counter() - start
+    return metrics
+
+
+def extract_text_from_pdf(
+    file_in: Path,
+    la_params: LAParams | None = None,
+    layout: LayoutMode = LayoutMode.FULL,
+    font_cache_size: int = 0,
+    page_cache: PageCache | None = None,
+    on_page: PageCallback | None = None,
+) -> tuple[str, ExtractMetrics]:
+    """Extract the text of a whole pdf file into a string.
+
+    Args:
+        file_in: The pdf file.
+        la_params: Layout parameters. Defaults to those of `layout`.
+        layout: How much layout analysis to do.
+        font_cache_size: Share decoded fonts with the other documents extracted
+            by this process, in a cache of this many fonts. 0 decodes the fonts
+            of each document afresh.
+        page_cache: Reuse the text of pages that were extracted before, and add
+            the text of new pages to this cache.
+        on_page: Called with the page number, and the page count of the
+            document if it is known, as each page is extracted.
+
+    Returns:
+        The text, in the same form as `extract_text_from_pdf_to_file` writes, and
+        the page count, sizes, and phase timings of the extraction.
+    """
+    start = perf_counter()
+    metrics = ExtractMetrics(path_in=str(file_in))
+    text = StringIO()
+    with open_pdf(file_in, metrics) as fp_in:
+        write_pages(
+            iter_text_pages(
+                fp_in,
+                la_params=la_params,
+                layout=layout,
+                metrics=metrics,
+                font_cache_size=font_cache_size,
+                page_cache=page_cache,
+                on_page=on_page,
+            ),
+            fp_out=text,
+            metrics=metrics,
+        )
+    metrics.total_seconds = perf_counter() - start
+    return text.getvalue(), metrics
+
+
+def count_pdf_pages(file_in: Path) -> int:
+    """Count the pages in a pdf file, without any layout analysis."""
+    with open(file_in, mode="rb") as fp_in:
+        return sum(1 for _ in PDFPage.get_pages(fp_in))
+
+
+def extract_text_from_pdf_page_range(
+    file_in: Path,
+    start: int,
+    stop: int,
+    la_params: LAParams | None = None,
+    layout: LayoutMode = LayoutMode.FULL,
+) -> tuple[str, ExtractMetrics]:
+    """Extract the text from a range of pages in a pdf file.
+
+    Args:
+        file_in: The pdf file.
+        start: The zero based index of the first page.
+        stop: The zero based index after the last page.
+        la_params: Layout parameters. Defaults to those of `layout`.
+        layout: How much layout analysis to do.
+
+    Returns:
+        The text of the pages, in the same form as a whole file extraction, and
+        the page count and phase timings of the range.
+    """
+    metrics = ExtractMetrics()
+    pages = iter_text_pages(
+        file_in,
+        first_page=start + 1,
+        last_page=stop,
+        la_params=la_params,
+        layout=layout,
+        metrics=metrics,
+    )
+    return "".join(text for _, text in pages), metrics
+
+
+def page_ranges(page_count: int, pages_per_chunk: int) -> list[tuple[int, int]]:
+    """Split a page count into consecutive `(start, stop)` page ranges."""
+    return [
+        (start, min(start + pages_per_chunk, page_count))
+        for start in range(0, page_count, pages_per_chunk)
+    ]
+
+
+def extract_text_from_pdf_to_file_parallel(
+    file_in: Path,
+    file_out: Path,
+    overwrite: bool = False,
+    la_params: LAParams | None = None,
+    layout: LayoutMode = LayoutMode.FULL,
+    workers: int = 0,
+    pages_per_chunk: int = 0,
+    on_chunk_complete: Callable[[int, int], None] | None = None,
+    profile_dir: Path | None = None,
+) -> ExtractMetrics:
+    """Extract text from a pdf file, running layout analysis of page ranges in parallel.
+
+    The pages of the document are split into ranges, and each range is extracted
+    in a separate process. The text of the ranges is written to `file_out` in
+    page order, so the output is the same as `extract_text_from_pdf_to_file`.
+
+    Args:
+        file_in: The pdf file.
+        file_out: The text file.
+        overwrite: Overwrite an existing output file.
+        la_params: Layout parameters. Defaults to those of `layout`.
+        layout: How much layout analysis to do.
+        workers: Number of worker processes. 0 uses all available cores.
+        pages_per_chunk: Number of pages in each range. 0 picks a size that
+            gives each worker several ranges.
+        on_chunk_complete: Called with the number of pages written so far, and
+            the page count, after each range is written.
+        profile_dir: If given, each range is profiled in its worker process, and
+            the .pstats files are saved to this directory.
+
+    Returns:
+        The page count and sizes of the extraction. The parse, layout, and render
+        timings are summed over the worker processes.
+    """
+    start_time = perf_counter()
+    metrics = ExtractMetrics(path_in=str(file_in), path_out=str(file_out))
     check_file(path_out=file_out, ensure_parents=True, overwrite=overwrite)
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    with open_pdf(file_in, metrics) as fp_in:
+        page_count = sum(1 for _ in PDFPage.get_pages(fp_in))
+    if pages_per_chunk == 0:
+        pages_per_chunk = max(1, -(-page_count // (workers * 4)))
+    ranges = page_ranges(page_count=page_count, pages_per_chunk=pages_per_chunk)
     with (
-        open(file_out, mode="w", encoding="utf-8") as fp_out,
-        open(file_in, mode="rb") as fp_in,
+        atomic_open(file_out) as fp_out,
+        ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor,
     ):
-        if la_params is None:
-            la_params = LAParams()
-        extract_text_to_fp(fp_in, fp_out, laparams=la_params)
+        if profile_dir is None:
+            profile_paths: list[Path | None] = [None] * len(ranges)
+        else:
+            profile_paths = [
+                profile_path_for(profile_dir, file_in, suffix=f"-pages-{start}-{stop}")
+                for start, stop in ranges
+            ]
+        chunks = executor.map(
+            run_profiled,
+            profile_paths,
+            [extract_text_from_pdf_page_range] * len(ranges),
+            [file_in] * len(ranges),
+            [start for start, _ in ranges],
+            [stop for _, stop in ranges],
+            [la_params] * len(ranges),
+            [layout] * len(ranges),
+        )
+        for (_, stop), (chunk, chunk_metrics) in zip(ranges, chunks, strict=True):
+            metrics.add(chunk_metrics)
+            write_start = perf_counter()
+            fp_out.write(chunk)
+            metrics.write_seconds += perf_counter() - write_start
+            metrics.chars_out += len(chunk)
+            if on_chunk_complete is not None:
+                on_chunk_complete(stop, page_count)
+    metrics.total_seconds = perf_counter() - start_time
+    return metrics
@@ -0,0 +1,217 @@
+"""Run work in worker processes that are killed when they go over a limit."""
+
+import multiprocessing
+import pickle
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from functools import partial
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from time import monotonic
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None  # type: ignore[assignment]
+
+MEMORY_LIMIT_SUPPORTED = resource is not None
+
+
+class LimitExceededError(Exception):
+    """A worker was stopped for going over a limit."""
+
+
+class WorkTimeoutError(LimitExceededError):
+    """A worker took longer than the time limit."""
+
+
+class WorkMemoryError(LimitExceededError):
+    """A worker used more memory than the memory limit."""
+
+
+class WorkerDiedError(Exception):
+    """A worker process exited without returning a result."""
+
+
+@dataclass
+class _Worker:
+    process: BaseProcess
+    conn: Connection
+    item: Any = None
+    deadline: float | None = None
+    started: float = 0.0
+
+
+def _send_event(conn: Connection, event: Any):
+    """Send an event from a worker, ahead of the result of its item."""
+    conn.send((None, event))
+
+
+def _worker_main(
+    conn: Connection,
+    func: Callable[[Any], Any],
+    max_memory: int | None,
+    event_initializer: Callable[[Callable[[Any], None]], None] | None = None,
+):
+    """Call `func` on each item received, sending back the result or the error.
+
+    Messages are `(ok, value)` pairs, where `ok` is None for an event, True for a
+    result, and False for an error.
+    """
+    if max_memory is not None and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+    if event_initializer is not None:
+        event_initializer(partial(_send_event, conn))
+    while (item := conn.recv()) is not None:
+        try:
+            conn.send((True, func(item)))
+        except BaseException as e:
+            try:
+                pickle.dumps(e)
+            except Exception:
+                e = RuntimeError(f"{type(e).__name__}: {e}")
+            conn.send((False, e))
+
+
+_DIED = object()
+
+
+def _receive_result(conn: Connection, on_event: Callable[[Any], None] | None) -> Any:
+    """Handle the waiting events of a worker, and receive its result if it is ready.
+
+    Returns:
+        The `(ok, value)` result message, `_DIED` if the worker exited, or None
+        if the result is not ready.
+    """
+    while conn.poll():
+        try:
+            message = conn.recv()
+        except EOFError:
+            return _DIED
+        if message[0] is not None:
+            return message
+        if on_event is not None:
+            on_event(message[1])
+    return None
+
+
+def run_with_limits[T, R](
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: int = 1,
+    timeout: float | None = None,
+    max_memory: int | None = None,
+    event_initializer: Callable[[Callable[[Any], None]], None] | None = None,
+    on_event: Callable[[Any], None] | None = None,
+) -> Iterator[tuple[T, R | None, BaseException | None]]:
+    """Call a function on each item in worker processes, with a time and memory limit.
+
+    Each worker process is reused until it goes over a limit, or raises a
+    MemoryError, when it is killed and replaced. Workers are spawned rather than
+    forked, so `func` and the items must be picklable.
+
+    Args:
+        func: Called with each item. A module level function.
+        items: The items, pulled as workers become free.
+        workers: Number of worker processes.
+        timeout: Seconds allowed for each item, or None for no limit.
+        max_memory: Bytes of address space allowed for each worker process, or
+            None for no limit. Enforced with RLIMIT_AS, where available.
+        event_initializer: Called in each worker process, when it starts, with a
+            function that sends an event to `on_event`. A module level function.
+            Each worker has its own pipe, so killing a worker cannot corrupt the
+            events of the others.
+        on_event: Called in this process with each event sent by the workers,
+            while waiting on the items.
+
+    Raises:
+        NotImplementedError: If a memory limit is given where it is not supported.
+
+    Yields:
+        Each item with its result or its error, in completion order. A worker that
+        went over a limit gives a `LimitExceededError`.
+    """
+    if max_memory is not None and not MEMORY_LIMIT_SUPPORTED:
+        raise NotImplementedError("A memory limit is not supported on this platform.")
+    mp_context = multiprocessing.get_context("spawn")
+    item_iter = iter(items)
+    idle: list[_Worker] = []
+    busy: list[_Worker] = []
+
+    def start_worker() -> _Worker:
+        conn, child_conn = mp_context.Pipe()
+        process = mp_context.Process(
+            target=_worker_main,
+            args=(child_conn, func, max_memory, event_initializer),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process=process, conn=conn)
+
+    def stop_worker(worker: _Worker):
+        worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+
+    try:
+        while True:
+            while len(busy) < workers:
+                try:
+                    item = next(item_iter)
+                except StopIteration:
+                    break
+                worker = idle.pop() if idle else start_worker()
+                worker.item = item
+                worker.started = monotonic()
+                worker.deadline = None if timeout is None else worker.started + timeout
+                worker.conn.send(item)
+                busy.append(worker)
+            if not busy:
+                break
+            deadlines = [w.deadline for w in busy if w.deadline is not None]
+            wait_seconds = max(0.0, min(deadlines) - monotonic()) if deadlines else None
+            wait([worker.conn for worker in busy], timeout=wait_seconds)
+            now = monotonic()
+            for worker in list(busy):
+                result: Any = None
+                error: BaseException | None = None
+                message = _receive_result(worker.conn, on_event)
+                if message is _DIED:
+                    worker.process.join()
+                    error = WorkerDiedError(
+                        f"Worker exited with code {worker.process.exitcode} after "
+                        f"{now - worker.started:.1f}s."
+                    )
+                elif message is not None:
+                    ok, value = message
+                    if ok:
+                        result = value
+                    elif isinstance(value, MemoryError) and max_memory is not None:
+                        error = WorkMemoryError(
+                            f"Went over the memory limit of {max_memory} bytes."
+                        )
+                    else:
+                        error = value
+                elif worker.deadline is not None and now >= worker.deadline:
+                    error = WorkTimeoutError(
+                        f"Went over the time limit of {timeout} seconds."
+                    )
+                else:
+                    continue
+                busy.remove(worker)
+                if error is None or not isinstance(
+                    error, LimitExceededError | WorkerDiedError
+                ):
+                    idle.append(worker)
+                else:
+                    stop_worker(worker)
+                yield worker.item, result, error
+    finally:
+        for worker in busy:
+            stop_worker(worker)
+        for worker in idle:
+            worker.conn.send(None)
+            worker.process.join()
+            worker.conn.close()
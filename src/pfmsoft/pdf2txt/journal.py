@@ -0,0 +1,166 @@
+"""Append only journal of completed jobs, used to resume an interrupted run."""
+
+import json
+import logging
+import os
+from pathlib import Path
+from time import monotonic, time
+from typing import TextIO
+
+from pfmsoft.pdf2txt.snippets.atomic_write import fsync_directory
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE_NAME = ".pdf2txt-journal.jsonl"
+JOURNAL_FORMAT = 1
+SYNC_INTERVAL = 1.0
+"""The most seconds between syncs of the journal to disk."""
+
+
+class Journal:
+    """Record of the completed jobs of a run, keyed by the input path relative to a source directory.
+
+    The first line of the journal file describes the run. Each later line records
+    one completed job, and is flushed as soon as it is written, so a killed run
+    loses at most the jobs that were in progress. A partly written last line is
+    ignored when the journal is read.
+
+    The journal is synced to disk at most `SYNC_INTERVAL` seconds after a record,
+    and when it is closed, so a crash of the machine also loses the records of
+    the last second. Outputs are synced before they are renamed into place, see
+    `atomic_open`, so a recorded output is complete after a crash too.
+
+    An output is renamed into place by its worker before the main process records
+    the job, so a killed run can leave complete outputs that are not in the
+    journal. A resumed run overwrites those, see `written_by_run`.
+    """
+
+    def __init__(self, path: Path, source_dir: Path, settings: dict[str, str]):
+        """Make a journal. Use `Journal.open` to start or resume one.
+
+        Args:
+            path: Where the journal is stored.
+            source_dir: The input directory that entry keys are relative to.
+            settings: The options of the run that change its output. A run can
+                only be resumed with the same settings.
+        """
+        self.path = path
+        self.source_dir = source_dir
+        self.settings = settings
+        self.completed: set[str] = set()
+        self.started_at: float | None = None
+        """The unix time the run was started, None if the journal does not say."""
+        self.resumed = False
+        self._fp: TextIO | None = None
+        self._synced_at = float("-inf")
+
+    @classmethod
+    def open(
+        cls, path: Path, source_dir: Path, settings: dict[str, str], resume: bool
+    ) -> "Journal":
+        """Start a new journal, or resume the one at `path`.
+
+        Args:
+            path: Where the journal is stored.
+            source_dir: The input directory that entry keys are relative to.
+            settings: The options of the run that change its output.
+            resume: Keep the completed jobs of an existing journal. Otherwise any
+                existing journal is replaced.
+
+        Raises:
+            ValueError: If resuming a journal written with different settings.
+
+        Returns:
+            The journal, open for recording completed jobs.
+        """
+        journal = cls(path=path, source_dir=source_dir, settings=settings)
+        if resume and path.is_file():
+            journal.read()
+            journal.resumed = True
+            torn = not path.read_bytes().endswith(b"\n")
+            journal._fp = open(path, mode="a", encoding="utf-8")
+            if torn:
+                # End the partly written line, so the next record starts cleanly.
+                journal._fp.write("\n")
+            return journal
+        if resume:
+            logger.warning(f"No journal at {path} to resume, starting a new run.")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        journal._fp = open(path, mode="w", encoding="utf-8")
+        journal.started_at = time()
+        journal._write(
+            {
+                "format": JOURNAL_FORMAT,
+                "settings": settings,
+                "started_at": journal.started_at,
+            }
+        )
+        fsync_directory(path.parent)
+        return journal
+
+    def read(self):
+        """Read the completed jobs from the journal file."""
+        with open(self.path, encoding="utf-8") as fp_in:
+            lines = fp_in.read().splitlines()
+        header = json.loads(lines[0]) if lines else {}
+        if header.get("format") != JOURNAL_FORMAT:
+            raise ValueError(f"Journal {self.path} has an unknown format.")
+        if header.get("settings") != self.settings:
+            raise ValueError(
+                f"Journal {self.path} was written with the settings "
+                f"{header.get('settings')}, not {self.settings}."
+            )
+        self.started_at = header.get("started_at")
+        for line in lines[1:]:
+            try:
+                self.completed.add(json.loads(line)["path_in"])
+            except (json.JSONDecodeError, KeyError):
+                logger.warning(f"Ignoring a damaged line in journal {self.path}.")
+
+    def key(self, path_in: Path) -> str:
+        """The journal key for an input file."""
+        return path_in.relative_to(self.source_dir).as_posix()
+
+    def is_completed(self, path_in: Path) -> bool:
+        """Check if the job for an input file completed in an earlier attempt."""
+        return self.key(path_in) in self.completed
+
+    def written_by_run(self, path_out: Path) -> bool:
+        """Check if a resumed run wrote an output file before it was interrupted.
+
+        Outputs are written atomically, so such an output is complete, but its job
+        may not have been recorded, and it is safe to overwrite.
+        """
+        if not self.resumed or self.started_at is None:
+            return False
+        try:
+            return path_out.stat().st_mtime >= self.started_at
+        except FileNotFoundError:
+            return False
+
+    def record(self, path_in: Path, path_out: Path):
+        """Record a completed job."""
+        key = self.key(path_in)
+        self.completed.add(key)
+        self._write({"path_in": key, "path_out": str(path_out)})
+
+    def sync(self):
+        """Sync the journal to disk, so its records survive a crash of the machine."""
+        assert self._fp is not None, "The journal is not open."
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        self._synced_at = monotonic()
+
+    def close(self):
+        """Sync and close the journal file."""
+        if self._fp is not None:
+            self.sync()
+            self._fp.close()
+            self._fp = None
+
+    def _write(self, data: dict):
+        assert self._fp is not None, "The journal is not open."
+        self._fp.write(json.dumps(data) + "\n")
+        self._fp.flush()
+        if monotonic() - self._synced_at >= SYNC_INTERVAL:
+            self.sync()
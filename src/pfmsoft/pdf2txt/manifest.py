@@ -0,0 +1,177 @@
+"""Manifest of extracted files, used to skip unchanged inputs on later runs."""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import pdfminer
+from pdfminer.layout import LAParams
+
+from pfmsoft.pdf2txt import __version__
+from pfmsoft.pdf2txt.snippets.atomic_write import atomic_open
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = ".pdf2txt-manifest.json"
+MANIFEST_FORMAT = 1
+
+
+def file_sha256(file_path: Path) -> str:
+    """Return the sha256 hex digest of a file's contents."""
+    with open(file_path, mode="rb") as fp_in:
+        return hashlib.file_digest(fp_in, "sha256").hexdigest()
+
+
+def la_params_key(la_params: LAParams | None) -> str:
+    """Return a stable string describing layout parameters, None being no layout."""
+    if la_params is None:
+        return "null"
+    return json.dumps(vars(la_params), sort_keys=True, default=str)
+
+
+@dataclass
+class ManifestEntry:
+    """What was known about an input file when its text was extracted."""
+
+    size: int
+    mtime_ns: int
+    sha256: str
+    la_params: str
+    version: str
+    pdfminer_version: str
+    path_out: str
+
+
+class Manifest:
+    """Record of extracted files, keyed by the input path relative to a source directory.
+
+    An entry is still valid when the output file exists, the layout parameters
+    and package versions match, and the input is unchanged. The input is
+    unchanged when its size and mtime match, or failing that, when its content
+    hash matches.
+    """
+
+    def __init__(self, path: Path, source_dir: Path, la_params: LAParams | None):
+        """Make an empty manifest.
+
+        Args:
+            path: Where the manifest is stored.
+            source_dir: The input directory that entry keys are relative to.
+            la_params: The layout parameters used for this run, None if there is
+                no layout analysis.
+        """
+        self.path = path
+        self.source_dir = source_dir
+        self.la_params = la_params_key(la_params)
+        self.entries: dict[str, ManifestEntry] = {}
+
+    @classmethod
+    def load(
+        cls, path: Path, source_dir: Path, la_params: LAParams | None
+    ) -> "Manifest":
+        """Load a manifest, or start an empty one if the file does not exist."""
+        manifest = cls(path=path, source_dir=source_dir, la_params=la_params)
+        if not path.is_file():
+            return manifest
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("format") != MANIFEST_FORMAT:
+            logger.warning(f"Ignoring manifest {path} with unknown format.")
+            return manifest
+        manifest.entries = {
+            key: ManifestEntry(**value) for key, value in data["entries"].items()
+        }
+        return manifest
+
+    def save(self):
+        """Write the manifest, replacing any earlier version in one step."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "format": MANIFEST_FORMAT,
+            "entries": {key: asdict(value) for key, value in self.entries.items()},
+        }
+        with atomic_open(self.path) as fp_out:
+            fp_out.write(json.dumps(data, indent=1))
+
+    def key(self, path_in: Path) -> str:
+        """The manifest key for an input file."""
+        return path_in.relative_to(self.source_dir).as_posix()
+
+    def is_current(
+        self, path_in: Path, path_out: Path, stat: os.stat_result | None = None
+    ) -> bool:
+        """Check if the recorded output for an input file is still valid.
+
+        Args:
+            path_in: The input file.
+            path_out: The output file for the input file.
+            stat: The stat result of the input file, if the caller already has it.
+        """
+        entry = self.entries.get(self.key(path_in))
+        if entry is None:
+            return False
+        if (
+            entry.path_out != str(path_out)
+            or entry.la_params != self.la_params
+            or entry.version != __version__
+            or entry.pdfminer_version != pdfminer.__version__
+            or not path_out.is_file()
+        ):
+            return False
+        if stat is None:
+            stat = path_in.stat()
+        if stat.st_size != entry.size:
+            return False
+        if stat.st_mtime_ns == entry.mtime_ns:
+            return True
+        if file_sha256(path_in) != entry.sha256:
+            return False
+        # Touched, but the content is unchanged.
+        entry.mtime_ns = stat.st_mtime_ns
+        return True
+
+    def has_entry(self, path_in: Path) -> bool:
+        """Check if an input file has been recorded by an earlier run."""
+        return self.key(path_in) in self.entries
+
+    def input_sha256(self, path_in: Path) -> str:
+        """The content hash of an input file, as recorded in its entry."""
+        return file_sha256(path_in)
+
+    def record(
+        self,
+        path_in: Path,
+        path_out: Path,
+        stat: os.stat_result | None = None,
+        sha256: str | None = None,
+    ):
+        """Record a successful extraction.
+
+        The stat result and hash should be taken before the input is extracted.
+        If the input changes while it is extracted, the entry then describes the
+        input as it was, and the next run extracts it again. Taken afterwards,
+        they would describe the changed input, next to text from the old one.
+
+        Args:
+            path_in: The input file.
+            path_out: The output file for the input file.
+            stat: The stat result of the input file, from before it was
+                extracted. Defaults to its current stat result.
+            sha256: The content hash of the input file, from before it was
+                extracted. Defaults to the hash of its current content.
+        """
+        if stat is None:
+            stat = path_in.stat()
+        if sha256 is None:
+            sha256 = file_sha256(path_in)
+        self.entries[self.key(path_in)] = ManifestEntry(
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            sha256=sha256,
+            la_params=self.la_params,
+            version=__version__,
+            pdfminer_version=pdfminer.__version__,
+            path_out=str(path_out),
+        )
@@ -0,0 +1,179 @@
+"""Per file and per phase timing of extraction runs."""
+
+import json
+import math
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+PERCENTILES = (50, 90, 99)
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+PHASES = ("parse", "layout", "render", "write")
+
+
+@dataclass
+class ExtractMetrics:
+    """Timings and sizes for the extraction of one file.
+
+    The phases are:
+        parse: Opening the document, walking the page tree, and interpreting the
+            page content streams into layout objects.
+        layout: Layout analysis, grouping characters into lines and boxes.
+        render: Turning the analyzed layout into text.
+        write: Writing the text to the output.
+
+    The font cache counts are the fonts of the file that were found in, or were
+    missing from, the fonts shared across documents, and the page cache counts
+    are the same for the text of its pages. They are 0 without the cache.
+    """
+
+    path_in: str = ""
+    path_out: str = ""
+    pages: int = 0
+    bytes_in: int = 0
+    chars_out: int = 0
+    parse_seconds: float = 0.0
+    layout_seconds: float = 0.0
+    render_seconds: float = 0.0
+    write_seconds: float = 0.0
+    total_seconds: float = 0.0
+    font_cache_hits: int = 0
+    font_cache_misses: int = 0
+    page_cache_hits: int = 0
+    page_cache_misses: int = 0
+
+    def add(self, other: "ExtractMetrics"):
+        """Add the counts and timings of another part of the same file."""
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, int | float):
+                setattr(self, field.name, value + getattr(other, field.name))
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """Nearest rank percentile of some values."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(latencies: Sequence[float]) -> dict[str, float]:
+    """Percentiles and max of per file latencies, in seconds."""
+    if not latencies:
+        return {}
+    summary = {f"p{pct}": percentile(latencies, pct) for pct in PERCENTILES}
+    summary["max"] = max(latencies)
+    return summary
+
+
+def latency_histogram(latencies: Sequence[float]) -> dict[str, int]:
+    """Count latencies into buckets, keyed by the bucket's upper bound in seconds."""
+    histogram = {str(bound): 0 for bound in LATENCY_BUCKETS}
+    histogram["inf"] = 0
+    for latency in latencies:
+        for bound in LATENCY_BUCKETS:
+            if latency <= bound:
+                histogram[str(bound)] += 1
+                break
+        else:
+            histogram["inf"] += 1
+    return histogram
+
+
+def cache_summary(files: Sequence[ExtractMetrics], cache: str) -> dict[str, float]:
+    """Hits and misses of a cache over some files, and the hit rate.
+
+    Args:
+        files: The metrics of the files.
+        cache: The prefix of the cache's metrics, e.g. `font_cache`.
+    """
+    hits = sum(getattr(metrics, f"{cache}_hits") for metrics in files)
+    misses = sum(getattr(metrics, f"{cache}_misses") for metrics in files)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0,
+    }
+
+
+class MetricsReport:
+    """Collects the metrics of each file in a run, and writes them as json."""
+
+    def __init__(self):
+        """Make an empty report."""
+        self.files: list[ExtractMetrics] = []
+        self.failures: list[dict[str, str]] = []
+        self.duplicates: list[dict[str, str]] = []
+
+    def record(self, metrics: ExtractMetrics):
+        """Record a successful extraction."""
+        self.files.append(metrics)
+
+    def record_duplicate(self, path_in: Path, duplicate_of: Path):
+        """Record an input whose output was reproduced from an identical input."""
+        self.duplicates.append(
+            {"path_in": str(path_in), "duplicate_of": str(duplicate_of)}
+        )
+
+    def record_failure(self, path_in: Path, error: BaseException):
+        """Record a failed extraction."""
+        self.failures.append(
+            {
+                "path_in": str(path_in),
+                "error_type": type(error).__name__,
+                "error": str(error),
+            }
+        )
+
+    def summary(
+        self,
+        elapsed_seconds: float | None = None,
+        makespan_seconds: float | None = None,
+    ) -> dict:
+        """Totals, phase timings, and latency distribution for the run.
+
+        Args:
+            elapsed_seconds: Wall clock time of the whole run, if known.
+            makespan_seconds: Wall clock time from starting the first file to
+                finishing the last, if known.
+        """
+        latencies = [metrics.total_seconds for metrics in self.files]
+        return {
+            "files": len(self.files),
+            "failed": len(self.failures),
+            "parses_saved": len(self.duplicates),
+            "pages": sum(metrics.pages for metrics in self.files),
+            "bytes_in": sum(metrics.bytes_in for metrics in self.files),
+            "chars_out": sum(metrics.chars_out for metrics in self.files),
+            "elapsed_seconds": elapsed_seconds,
+            "makespan_seconds": makespan_seconds,
+            "phase_seconds": {
+                phase: sum(
+                    getattr(metrics, f"{phase}_seconds") for metrics in self.files
+                )
+                for phase in PHASES
+            },
+            "latency_seconds": latency_summary(latencies),
+            "latency_histogram": latency_histogram(latencies),
+            "font_cache": cache_summary(self.files, "font_cache"),
+            "page_cache": cache_summary(self.files, "page_cache"),
+        }
+
+    def write(
+        self,
+        path: Path,
+        elapsed_seconds: float | None = None,
+        makespan_seconds: float | None = None,
+    ):
+        """Write the summary, each file's metrics, the duplicates, and the failures as json."""
+        data = {
+            "summary": self.summary(
+                elapsed_seconds=elapsed_seconds, makespan_seconds=makespan_seconds
+            ),
+            "files": [asdict(metrics) for metrics in self.files],
+            "duplicates": self.duplicates,
+            "failures": self.failures,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
@@ -0,0 +1,72 @@
+"""Choices shared by the library and the command line.
+
+This module only imports the standard library's enum, so the command line can
+build its options without importing pdfminer.six.
+"""
+
+from enum import StrEnum
+
+DEFAULT_FONT_CACHE_SIZE = 256
+"""Fonts kept by a worker process's font cache, unless told otherwise."""
+
+
+class LayoutMode(StrEnum):
+    """How much layout analysis to do.
+
+    full: pdfminer's complete analysis, grouping characters into lines, lines
+        into boxes, and ordering the boxes hierarchically.
+    fast: Group characters into lines, but not lines into boxes, or boxes into
+        a reading order, which is most of the cost of the full analysis. Lines
+        are written in content stream order.
+    none: No layout analysis. The characters are written in content stream
+        order, without line breaks.
+    """
+
+    FULL = "full"
+    FAST = "fast"
+    NONE = "none"
+
+
+class Compression(StrEnum):
+    """How extracted text files are compressed."""
+
+    NONE = "none"
+    GZIP = "gzip"
+    XZ = "xz"
+    BZ2 = "bz2"
+
+
+class SinkKind(StrEnum):
+    """Where the text of a batch run is written."""
+
+    FILES = "files"
+    JSONL = "jsonl"
+    SQLITE = "sqlite"
+    TAR = "tar"
+
+
+class LinkMethod(StrEnum):
+    """How the output of a duplicate input is made from the output of the original.
+
+    hardlink: Another name for the same file. Uses no space.
+    reflink: A copy on write clone, sharing the data blocks until either file is
+        changed. Falls back to a copy where the file system cannot clone.
+    copy: A full copy.
+    """
+
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+    COPY = "copy"
+
+
+class ProgressMode(StrEnum):
+    """How the progress of a batch run is shown.
+
+    rich: A progress bar on the terminal.
+    jsonl: Json lines events on stderr, for a program running the extraction.
+    none: Nothing, except failures.
+    """
+
+    RICH = "rich"
+    JSONL = "jsonl"
+    NONE = "none"
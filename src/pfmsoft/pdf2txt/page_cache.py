@@ -0,0 +1,198 @@
+"""An on-disk cache of page text, keyed by the content of each page.
+
+Reissued documents often keep most of their pages unchanged. The text of a page
+only depends on its content streams, its resources, its boxes and rotation, and
+the layout parameters, so a digest of those identifies the page's text in any
+document. The cache is a SQLite database, which can be shared by several worker
+processes, and is kept under a size limit by evicting the least recently used
+pages.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from time import time
+
+import pdfminer
+from pdfminer.layout import LAParams
+from pdfminer.pdfpage import PDFPage
+
+from pfmsoft.pdf2txt.manifest import la_params_key
+from pfmsoft.pdf2txt.resource_cache import update_digest
+
+PAGE_CACHE_FORMAT = 1
+DEFAULT_PAGE_CACHE_BYTES = 1024 * 1024 * 1024
+# The page attributes that change the text of a page. Inherited attributes are
+# already copied onto the page by pdfminer.
+_PAGE_ATTRIBUTES = ("Contents", "Resources", "MediaBox", "CropBox", "Rotate")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key BLOB PRIMARY KEY,
+    text TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS pages_insert AFTER INSERT ON pages BEGIN
+    UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS pages_delete AFTER DELETE ON pages BEGIN
+    UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size;
+END;
+"""
+
+
+def page_key(page: PDFPage, la_params: LAParams | None) -> bytes:
+    """A digest of everything that decides the text of a page.
+
+    Args:
+        page: The page.
+        la_params: The layout parameters the page is extracted with, or None for
+            no layout analysis.
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(
+        f"{PAGE_CACHE_FORMAT}\0{pdfminer.__version__}\0{la_params_key(la_params)}\0".encode()
+    )
+    for name in _PAGE_ATTRIBUTES:
+        hasher.update(f"{name}\0".encode())
+        update_digest(hasher, page.attrs.get(name))
+    return hasher.digest()
+
+
+class PageCache:
+    """Page text stored in a SQLite database, limited to a number of bytes.
+
+    Additions, and the use of cached pages, are held in memory until `commit`,
+    so the database is only locked for writing briefly, once per document. A
+    commit also evicts the least recently used pages once the cache is over its
+    limit.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = DEFAULT_PAGE_CACHE_BYTES):
+        """Open a cache, creating it if needed.
+
+        Args:
+            path: The database file.
+            max_bytes: The most bytes of text to keep. Eviction brings the cache
+                down to 90% of this, so it is not run on every commit.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._used: set[bytes] = set()
+        self._added: dict[bytes, str] = {}
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        # Write ahead logging lets worker processes read while another writes.
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(_SCHEMA)
+
+    def get(self, key: bytes) -> str | None:
+        """Get the text of a page, counting the lookup as a hit or a miss."""
+        with self._lock:
+            text = self._added.get(key)
+            if text is None:
+                row = self.connection.execute(
+                    "SELECT text FROM pages WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                text = row[0]
+            self.hits += 1
+            self._used.add(key)
+            return text
+
+    def put(self, key: bytes, text: str):
+        """Add the text of a page, to be saved by the next commit."""
+        with self._lock:
+            self._added[key] = text
+
+    def commit(self):
+        """Save the additions and the use of pages, and evict pages over the limit."""
+        with self._lock:
+            now = time()
+            self.connection.executemany(
+                "INSERT INTO pages (key, text, size, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO NOTHING",
+                [
+                    (key, text, len(text.encode("utf-8")), now)
+                    for key, text in self._added.items()
+                ],
+            )
+            self.connection.executemany(
+                "UPDATE pages SET last_used = ? WHERE key = ?",
+                [(now, key) for key in self._used],
+            )
+            self._added.clear()
+            self._used.clear()
+            total_bytes = self._total_bytes()
+            if total_bytes > self.max_bytes:
+                excess = total_bytes - int(self.max_bytes * 0.9)
+                evicted = []
+                rows = self.connection.execute(
+                    "SELECT key, size FROM pages ORDER BY last_used"
+                )
+                for key, size in rows:
+                    if excess <= 0:
+                        break
+                    evicted.append((key,))
+                    excess -= size
+                rows.close()
+                self.connection.executemany("DELETE FROM pages WHERE key = ?", evicted)
+                self.evictions += len(evicted)
+            self.connection.commit()
+
+    def stats(self) -> dict[str, float]:
+        """The entries and bytes in the cache, and this process's hits and misses."""
+        with self._lock:
+            entries, total_bytes = self.connection.execute(
+                "SELECT entries, bytes FROM totals"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        """Commit, and close the database."""
+        self.commit()
+        self.connection.close()
+
+    def _total_bytes(self) -> int:
+        return self.connection.execute("SELECT bytes FROM totals").fetchone()[0]
+
+
+_open_caches: dict[Path, PageCache] = {}
+_open_caches_lock = threading.Lock()
+
+
+def open_page_cache(path: Path, max_bytes: int = DEFAULT_PAGE_CACHE_BYTES) -> PageCache:
+    """The page cache of this process for a database file, opened on first use.
+
+    A worker process keeps its connection open for all of its documents.
+    """
+    key = path.resolve()
+    with _open_caches_lock:
+        cache = _open_caches.get(key)
+        if cache is None:
+            cache = _open_caches[key] = PageCache(key, max_bytes=max_bytes)
+        cache.max_bytes = max_bytes
+        return cache
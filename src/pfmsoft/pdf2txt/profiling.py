@@ -0,0 +1,82 @@
+"""Opt in cProfile profiling of extraction work."""
+
+import cProfile
+import hashlib
+import pstats
+from collections import defaultdict
+from collections.abc import Callable
+from io import StringIO
+from pathlib import Path
+from typing import Any
+
+RUN_STATS_FILE_NAME = "run.pstats"
+REPORT_FILE_NAME = "report.txt"
+
+
+def profile_path_for(profile_dir: Path, path_in: Path, suffix: str = "") -> Path:
+    """A unique .pstats path in a profile directory, for work on an input file."""
+    digest = hashlib.sha1(str(path_in.resolve()).encode()).hexdigest()[:10]
+    return profile_dir / f"{path_in.stem}-{digest}{suffix}.pstats"
+
+
+def run_profiled[T](
+    profile_path: Path | None, func: Callable[..., T], *args: Any, **kwargs: Any
+) -> T:
+    """Call a function, saving a cProfile of the call to `profile_path`.
+
+    This is a module level function, so that it can be sent to a worker process.
+    The profile is saved even if the function raises. If `profile_path` is None
+    the function is called without profiling.
+    """
+    if profile_path is None:
+        return func(*args, **kwargs)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(profile_path)
+
+
+def time_by_module(stats: pstats.Stats) -> list[tuple[str, float]]:
+    """Total internal time of the functions in each source file, largest first."""
+    totals: dict[str, float] = defaultdict(float)
+    for (file_name, _, _), (_, _, tottime, _, _) in stats.stats.items():  # type: ignore[attr-defined]
+        totals[file_name] += tottime
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def write_profile_report(profile_dir: Path, top: int = 30) -> Path | None:
+    """Combine the .pstats files in a directory, and write a hot function report.
+
+    The combined stats are saved as `run.pstats`. The report lists the time spent
+    in each source file, then the top functions by internal and by cumulative
+    time, which shows whether time goes to pdfminer's layout analysis, font
+    decoding, or file I/O.
+
+    Returns:
+        The path of the report, or None if there were no .pstats files.
+    """
+    stats_files = sorted(
+        str(path)
+        for path in profile_dir.glob("*.pstats")
+        if path.name != RUN_STATS_FILE_NAME
+    )
+    if not stats_files:
+        return None
+    report = StringIO()
+    stats = pstats.Stats(*stats_files, stream=report)
+    stats.dump_stats(profile_dir / RUN_STATS_FILE_NAME)
+    report.write(f"Combined {len(stats_files)} profiles from {profile_dir}\n\n")
+    report.write("Internal time by source file:\n")
+    for file_name, seconds in time_by_module(stats)[:top]:
+        report.write(f"{seconds:12.3f}s  {file_name}\n")
+    report.write(f"\nTop {top} functions by internal time:\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+    report.write(f"\nTop {top} functions by cumulative time:\n")
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    report_path = profile_dir / REPORT_FILE_NAME
+    report_path.write_text(report.getvalue(), encoding="utf-8")
+    return report_path
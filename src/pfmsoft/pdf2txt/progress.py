@@ -0,0 +1,296 @@
+"""Progress of a batch run, from page level events sent by the extraction workers.
+
+A worker process reports each page it extracts to the listener set by
+`set_page_listener`, which forwards it to the main process. There a reporter
+keeps the totals, and shows them as a rich progress bar, or writes them to
+stderr as json lines for an orchestrator to read.
+
+This module only imports the standard library, so that worker processes and the
+command line can import it cheaply. rich is imported by `RichProgress` itself.
+"""
+
+import json
+import sys
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter, time
+from typing import Any, NamedTuple, TextIO
+
+from pfmsoft.pdf2txt.options import ProgressMode
+
+
+class PageEvent(NamedTuple):
+    """A page of an input file has been extracted."""
+
+    path_in: str
+    page: int
+    page_count: int | None
+    """The page count of the document, if its page tree gives one."""
+
+
+PageListener = Callable[[PageEvent], None]
+
+_page_listener: PageListener | None = None
+
+
+def set_page_listener(listener: PageListener | None):
+    """Set where this process sends its page events, or None to send none.
+
+    Used as the initializer of worker processes.
+    """
+    global _page_listener
+    _page_listener = listener
+
+
+def listen_on_queue(queue: Any):
+    """Send the page events of this worker process to a multiprocessing queue."""
+    set_page_listener(queue.put)
+
+
+def page_callback(path_in: Path) -> Callable[[int, int | None], None] | None:
+    """An `on_page` callback that sends the page events of an input, if anyone listens."""
+    listener = _page_listener
+    if listener is None:
+        return None
+    path = str(path_in)
+
+    def send_page(page: int, page_count: int | None):
+        listener(PageEvent(path_in=path, page=page, page_count=page_count))
+
+    return send_page
+
+
+class ProgressState:
+    """The totals of a run, updated from several threads.
+
+    The progress of a file being extracted is its fraction of pages done, when
+    its page count is known, so a large file moves the totals while it runs.
+    """
+
+    def __init__(self):
+        """Start with nothing found."""
+        self.started = perf_counter()
+        self.files_found = 0
+        self.bytes_found = 0
+        self.files_done = 0
+        self.files_failed = 0
+        self.bytes_done = 0
+        self.pages_done = 0
+        self._sizes: dict[str, int] = {}
+        self._fractions: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def job_found(self, path_in: Path, size: int):
+        """Count a file to be extracted."""
+        with self._lock:
+            self.files_found += 1
+            self.bytes_found += size
+            self._sizes[str(path_in)] = size
+
+    def page_done(self, event: PageEvent):
+        """Count a page extracted."""
+        with self._lock:
+            self.pages_done += 1
+            if event.page_count:
+                self._fractions[event.path_in] = min(1.0, event.page / event.page_count)
+
+    def job_done(self, path_in: Path, failed: bool = False):
+        """Count a file finished."""
+        with self._lock:
+            key = str(path_in)
+            self.files_done += 1
+            self.files_failed += failed
+            self.bytes_done += self._sizes.pop(key, 0)
+            self._fractions.pop(key, None)
+
+    def snapshot(self) -> dict[str, Any]:
+        """The totals, the page rate, and the estimated seconds to go."""
+        with self._lock:
+            elapsed = perf_counter() - self.started
+            in_progress = sum(
+                self._sizes.get(key, 0) * fraction
+                for key, fraction in self._fractions.items()
+            )
+            progress_bytes = self.bytes_done + in_progress
+            eta = None
+            if progress_bytes > 0:
+                eta = (self.bytes_found - progress_bytes) * elapsed / progress_bytes
+            return {
+                "files_found": self.files_found,
+                "files_done": self.files_done,
+                "files_failed": self.files_failed,
+                "pages": self.pages_done,
+                "bytes_found": self.bytes_found,
+                "bytes_done": progress_bytes,
+                "elapsed_seconds": elapsed,
+                "pages_per_second": self.pages_done / elapsed if elapsed else 0.0,
+                "eta_seconds": eta,
+            }
+
+
+class ProgressReporter:
+    """Reports the progress of a run. This base class reports nothing.
+
+    Use as a context manager around the run. Failures are still written to
+    stderr.
+    """
+
+    def __init__(self):
+        """Make a reporter."""
+        self.state = ProgressState()
+
+    def __enter__(self) -> "ProgressReporter":
+        """Start reporting."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop reporting."""
+
+    def job_found(self, path_in: Path, size: int):
+        """A file was found, to be extracted."""
+        self.state.job_found(path_in, size)
+
+    def page_done(self, event: PageEvent):
+        """A page was extracted."""
+        self.state.page_done(event)
+
+    def job_done(self, path_in: Path, pages: int, error: BaseException | None):
+        """A file was finished, or failed with `error`."""
+        self.state.job_done(path_in, failed=error is not None)
+        if error is not None:
+            print(f"Skipping {path_in}\n\tCause: {error}", file=sys.stderr)
+
+
+class RichProgress(ProgressReporter):
+    """A rich progress bar of input bytes, with pages per second and an ETA."""
+
+    def __enter__(self) -> "RichProgress":
+        """Show the progress bar."""
+        # Imported here, to keep cli startup fast.
+        from rich.progress import (
+            BarColumn,
+            Progress,
+            TaskProgressColumn,
+            TextColumn,
+            TimeElapsedColumn,
+            TimeRemainingColumn,
+        )
+
+        self.progress = Progress(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            TextColumn("{task.fields[pages]} pages, {task.fields[rate]:.1f}/s"),
+            TimeElapsedColumn(),
+            TimeRemainingColumn(),
+        )
+        self.progress.__enter__()
+        self.task = self.progress.add_task("Scanning", total=0, pages=0, rate=0.0)
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop showing the progress bar."""
+        self.progress.__exit__(*exc_info)
+
+    def _update(self):
+        snapshot = self.state.snapshot()
+        self.progress.update(
+            self.task,
+            completed=snapshot["bytes_done"],
+            total=snapshot["bytes_found"],
+            description=f"{snapshot['files_done']} of {snapshot['files_found']}",
+            pages=snapshot["pages"],
+            rate=snapshot["pages_per_second"],
+        )
+
+    def job_found(self, path_in: Path, size: int):
+        """A file was found, to be extracted."""
+        super().job_found(path_in, size)
+        self._update()
+
+    def page_done(self, event: PageEvent):
+        """A page was extracted."""
+        super().page_done(event)
+        self._update()
+
+    def job_done(self, path_in: Path, pages: int, error: BaseException | None):
+        """A file was finished, or failed with `error`."""
+        self.state.job_done(path_in, failed=error is not None)
+        if error is not None:
+            self.progress.console.print(f"Skipping {path_in}\n\tCause: {error}")
+        self._update()
+
+
+class JsonlProgress(ProgressReporter):
+    """Json lines events, for a program that runs the extraction.
+
+    Every line is a json object with an `event` and a `time`:
+        start: The run started.
+        file: A file finished, with its `path`, `ok`, `pages`, and `error`.
+        progress: The totals of the run, at most once every `interval` seconds.
+            `files_found`, `files_done`, `files_failed`, `pages`, `bytes_found`,
+            `bytes_done`, `elapsed_seconds`, `pages_per_second`, and
+            `eta_seconds`, which is null until there is some progress.
+        finish: The final totals, as for progress.
+    """
+
+    def __init__(self, stream: TextIO | None = None, interval: float = 1.0):
+        """Make a reporter.
+
+        Args:
+            stream: Where the events are written. Defaults to stderr.
+            interval: The least seconds between progress events.
+        """
+        super().__init__()
+        self.stream = stream
+        self.interval = interval
+        self._last_progress = 0.0
+        self._write_lock = threading.Lock()
+
+    def emit(self, event: str, **fields: Any):
+        """Write an event line."""
+        line = json.dumps({"event": event, "time": time(), **fields})
+        with self._write_lock:
+            stream = self.stream or sys.stderr
+            stream.write(line + "\n")
+            stream.flush()
+
+    def _maybe_progress(self):
+        now = perf_counter()
+        if now - self._last_progress >= self.interval:
+            self._last_progress = now
+            self.emit("progress", **self.state.snapshot())
+
+    def __enter__(self) -> "JsonlProgress":
+        """Write the start event."""
+        self.emit("start")
+        return self
+
+    def __exit__(self, *exc_info):
+        """Write the finish event."""
+        self.emit("finish", **self.state.snapshot())
+
+    def page_done(self, event: PageEvent):
+        """A page was extracted."""
+        super().page_done(event)
+        self._maybe_progress()
+
+    def job_done(self, path_in: Path, pages: int, error: BaseException | None):
+        """A file was finished, or failed with `error`."""
+        self.state.job_done(path_in, failed=error is not None)
+        self.emit(
+            "file",
+            path=str(path_in),
+            ok=error is None,
+            pages=pages,
+            error=None if error is None else f"{type(error).__name__}: {error}",
+        )
+        self._maybe_progress()
+
+
+REPORTERS: dict[ProgressMode, type[ProgressReporter]] = {
+    ProgressMode.RICH: RichProgress,
+    ProgressMode.JSONL: JsonlProgress,
+    ProgressMode.NONE: ProgressReporter,
+}
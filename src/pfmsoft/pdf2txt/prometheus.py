@@ -0,0 +1,196 @@
+"""Export the metrics of a run in the Prometheus text format.
+
+The file is meant for the textfile collector of the Prometheus node exporter,
+which reads every `*.prom` file in a directory on each scrape. The file is
+replaced atomically, so the collector never reads a partial file, and is
+rewritten periodically while a run is in progress, so a long run can be watched.
+"""
+
+import threading
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from time import time
+
+from pfmsoft.pdf2txt.metrics import LATENCY_BUCKETS, PHASES, MetricsReport
+from pfmsoft.pdf2txt.snippets.atomic_write import atomic_open
+
+PREFIX = "pdf2txt"
+DEFAULT_INTERVAL = 15.0
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the text format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Exposition:
+    """Lines of the text format, with the HELP and TYPE of each metric once."""
+
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def metric(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        self.lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+    def sample(self, name: str, value: float, **labels: str):
+        label_text = ",".join(
+            f'{key}="{escape_label(label)}"' for key, label in labels.items()
+        )
+        if label_text:
+            label_text = f"{{{label_text}}}"
+        self.lines.append(f"{PREFIX}_{name}{label_text} {value!r}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def format_metrics(
+    report: MetricsReport,
+    started_at: float,
+    elapsed_seconds: float | None = None,
+    running: bool = False,
+) -> str:
+    """The metrics of a run so far, in the Prometheus text format.
+
+    Counters start from 0 on each run, which Prometheus treats as a counter
+    reset.
+
+    Args:
+        report: The metrics of the files finished so far. Read while the run may
+            still be adding to it.
+        started_at: The unix time the run started.
+        elapsed_seconds: Wall clock time of the run so far, if known.
+        running: Whether the run is still in progress.
+    """
+    # Copies, as the run adds to the report from another thread.
+    files = list(report.files)
+    failures = list(report.failures)
+    duplicates = len(report.duplicates)
+    out = _Exposition()
+    out.metric("files_total", "counter", "Input files finished, by status.")
+    out.sample("files_total", len(files), status="extracted")
+    out.sample("files_total", duplicates, status="duplicate")
+    out.sample("files_total", len(failures), status="failed")
+    out.metric("failures_total", "counter", "Failed input files, by exception type.")
+    for error_type, count in sorted(Counter(f["error_type"] for f in failures).items()):
+        out.sample("failures_total", count, error_type=error_type)
+    for name, help_text in (
+        ("pages", "Pages extracted."),
+        ("bytes_in", "Bytes of pdf input extracted."),
+        ("chars_out", "Characters of text written."),
+    ):
+        out.metric(f"{name}_total", "counter", help_text)
+        out.sample(f"{name}_total", sum(getattr(m, name) for m in files))
+    out.metric("phase_seconds_total", "counter", "Seconds spent in each phase.")
+    for phase in PHASES:
+        out.sample(
+            "phase_seconds_total",
+            sum(getattr(m, f"{phase}_seconds") for m in files),
+            phase=phase,
+        )
+    out.metric("cache_lookups_total", "counter", "Cache lookups, by cache and result.")
+    for cache in ("font", "page"):
+        for result, field in (("hit", "hits"), ("miss", "misses")):
+            out.sample(
+                "cache_lookups_total",
+                sum(getattr(m, f"{cache}_cache_{field}") for m in files),
+                cache=cache,
+                result=result,
+            )
+    out.metric("file_seconds", "histogram", "Seconds to extract each file.")
+    latencies = [m.total_seconds for m in files]
+    for bound in LATENCY_BUCKETS:
+        count = sum(1 for latency in latencies if latency <= bound)
+        out.sample("file_seconds_bucket", count, le=str(bound))
+    out.sample("file_seconds_bucket", len(latencies), le="+Inf")
+    out.sample("file_seconds_sum", sum(latencies))
+    out.sample("file_seconds_count", len(latencies))
+    out.metric("run_start_time_seconds", "gauge", "Unix time the run started.")
+    out.sample("run_start_time_seconds", started_at)
+    out.metric("run_elapsed_seconds", "gauge", "Wall clock seconds of the run so far.")
+    out.sample("run_elapsed_seconds", elapsed_seconds or 0.0)
+    out.metric("run_running", "gauge", "1 while the run is in progress, 0 after.")
+    out.sample("run_running", int(running))
+    out.metric("last_update_time_seconds", "gauge", "Unix time of this file.")
+    out.sample("last_update_time_seconds", time())
+    return out.text()
+
+
+def write_metrics(
+    path: Path,
+    report: MetricsReport,
+    started_at: float,
+    elapsed_seconds: float | None = None,
+    running: bool = False,
+):
+    """Write the metrics of a run to a textfile collector file, replacing it."""
+    text = format_metrics(
+        report, started_at=started_at, elapsed_seconds=elapsed_seconds, running=running
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_open(path) as fp_out:
+        fp_out.write(text)
+
+
+class PeriodicMetricsWriter:
+    """Writes the metrics of a run every `interval` seconds from a thread.
+
+    Use as a context manager around the run. The final metrics are written on
+    exit, whether or not the run succeeded.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        report: MetricsReport,
+        elapsed: Callable[[], float | None],
+        started_at: float | None = None,
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        """Make a writer.
+
+        Args:
+            path: The textfile collector file, ending in `.prom`.
+            report: The metrics of the run, added to as files finish.
+            elapsed: Gives the wall clock seconds of the run so far, or None to
+                time the run from `started_at`.
+            started_at: The unix time the run started. Defaults to now.
+            interval: Seconds between writes while the run is in progress.
+        """
+        self.path = path
+        self.report = report
+        self.elapsed = elapsed
+        self.interval = interval
+        self.started_at = time() if started_at is None else started_at
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="prometheus", daemon=True
+        )
+
+    def write(self, running: bool):
+        """Write the metrics now."""
+        write_metrics(
+            self.path,
+            self.report,
+            started_at=self.started_at,
+            elapsed_seconds=self.elapsed() or time() - self.started_at,
+            running=running,
+        )
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write(running=True)
+
+    def __enter__(self) -> "PeriodicMetricsWriter":
+        """Write the metrics, and start writing them periodically."""
+        self.write(running=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop the periodic writes, and write the final metrics."""
+        self._stop.set()
+        self._thread.join()
+        self.write(running=False)
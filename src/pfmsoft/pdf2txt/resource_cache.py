@@ -0,0 +1,173 @@
+"""Share decoded fonts across the documents extracted by a process.
+
+pdfminer caches fonts by object id, which only identifies a font within one
+document, so a new resource manager is needed for each document, and every
+document decodes its fonts again. Documents made from the same template embed
+the same fonts, so here fonts are also cached by a digest of their content, in
+a bounded cache that lives as long as the process. Predefined CMaps are already
+cached per process by pdfminer's `CMapDB`, and embedded ToUnicode CMaps are
+decoded as part of a font, so they are shared along with it.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from pdfminer.pdffont import PDFFont
+from pdfminer.pdfinterp import PDFResourceManager
+from pdfminer.pdftypes import PDFStream, resolve1
+from pdfminer.psparser import PSLiteral
+
+from pfmsoft.pdf2txt.options import DEFAULT_FONT_CACHE_SIZE
+
+_MAX_DEPTH = 16
+# Attributes that are only read while a font is built. They refer to objects of
+# the source document, and would keep the whole document alive in the cache.
+_DOCUMENT_ATTRIBUTES = ("descriptor", "fontfile", "cidsysteminfo")
+
+
+class FontCache:
+    """A least recently used cache of fonts, keyed by a digest of their content.
+
+    The cache is safe to share between threads.
+    """
+
+    def __init__(self, max_fonts: int = DEFAULT_FONT_CACHE_SIZE):
+        """Make an empty cache.
+
+        Args:
+            max_fonts: The most fonts to keep. The least recently used font is
+                evicted to make room for a new one.
+        """
+        self.max_fonts = max_fonts
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._fonts: OrderedDict[bytes, PDFFont] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """The number of cached fonts."""
+        return len(self._fonts)
+
+    def get(self, key: bytes) -> PDFFont | None:
+        """Get a font, counting the lookup as a hit or a miss."""
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is None:
+                self.misses += 1
+                return None
+            self._fonts.move_to_end(key)
+            self.hits += 1
+            return font
+
+    def put(self, key: bytes, font: PDFFont):
+        """Add a font, evicting the least recently used fonts over the limit."""
+        with self._lock:
+            self._fonts[key] = font
+            self._fonts.move_to_end(key)
+            while len(self._fonts) > self.max_fonts:
+                self._fonts.popitem(last=False)
+                self.evictions += 1
+
+
+class CachingResourceManager(PDFResourceManager):
+    """A resource manager for one document, that shares fonts through a `FontCache`.
+
+    Make a new manager for each document, as the fonts of the document are still
+    cached by object id as well, and object ids are only unique within a
+    document.
+    """
+
+    def __init__(self, font_cache: FontCache):
+        """Make a resource manager.
+
+        Args:
+            font_cache: The cache shared with the managers of other documents.
+        """
+        super().__init__(caching=True)
+        self.font_cache = font_cache
+        self.font_cache_hits = 0
+        self.font_cache_misses = 0
+
+    def get_font(self, objid: object, spec: Mapping[str, object]) -> PDFFont:
+        """Get a font from this document's fonts, the shared cache, or by decoding it."""
+        if objid and objid in self._cached_fonts:
+            return self._cached_fonts[objid]
+        key = font_digest(spec)
+        font = self.font_cache.get(key)
+        if font is None:
+            self.font_cache_misses += 1
+            # No object id, so only the shared cache keeps the font.
+            font = super().get_font(None, spec)
+            for name in _DOCUMENT_ATTRIBUTES:
+                if name in vars(font):
+                    setattr(font, name, None)
+            self.font_cache.put(key, font)
+        else:
+            self.font_cache_hits += 1
+        if objid:
+            self._cached_fonts[objid] = font
+        return font
+
+
+def font_digest(spec: Mapping[str, object]) -> bytes:
+    """A digest of a font dictionary, and every object and stream it refers to.
+
+    Two fonts with the same digest decode to the same font, whatever documents
+    they come from.
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    update_digest(hasher, spec, depth=0)
+    return hasher.digest()
+
+
+def update_digest(hasher, obj: object, depth: int = 0):
+    """Add a pdf object, and every object and stream it refers to, to a hash."""
+    obj = resolve1(obj)
+    if depth > _MAX_DEPTH:
+        # Deep enough to be a reference cycle, which no font needs.
+        hasher.update(b"^")
+        return
+    if isinstance(obj, PDFStream):
+        hasher.update(b"s")
+        update_digest(hasher, obj.attrs, depth=depth + 1)
+        # The decoded data, as pdfminer drops the raw data of a stream once it
+        # is decoded, and an object shared with an earlier page or font may
+        # already be.
+        data = obj.get_data()
+        hasher.update(len(data).to_bytes(8, "big"))
+        hasher.update(data)
+    elif isinstance(obj, Mapping):
+        hasher.update(b"d%d:" % len(obj))
+        for key in sorted(obj, key=str):
+            hasher.update(f"{key}\0".encode())
+            update_digest(hasher, obj[key], depth=depth + 1)
+    elif isinstance(obj, list | tuple):
+        hasher.update(b"l%d:" % len(obj))
+        for item in obj:
+            update_digest(hasher, item, depth=depth + 1)
+    elif isinstance(obj, bytes):
+        hasher.update(b"b%d:" % len(obj))
+        hasher.update(obj)
+    elif isinstance(obj, PSLiteral):
+        hasher.update(f"n{obj.name!r}\0".encode())
+    else:
+        hasher.update(f"{type(obj).__name__}:{obj!r}\0".encode())
+
+
+_shared_cache: FontCache | None = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_font_cache(max_fonts: int = DEFAULT_FONT_CACHE_SIZE) -> FontCache:
+    """The font cache of this process, shared by every document it extracts.
+
+    Asking for a different size replaces the cache with an empty one.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None or _shared_cache.max_fonts != max_fonts:
+            _shared_cache = FontCache(max_fonts=max_fonts)
+        return _shared_cache
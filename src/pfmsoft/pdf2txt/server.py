@@ -0,0 +1,296 @@
+"""A long lived extraction server with a warm worker pool, on a Unix domain socket.
+
+The protocol is json lines. A client sends one request object per line, and
+gets one response object per line for each request, in completion order, so
+the requests of a connection run concurrently.
+
+A request has a `path_in`, and optionally an `id` that is copied to its
+response, a `path_out` to write the text to instead of returning it,
+`overwrite`, and `layout`. A response has the `id`, `ok`, and either the
+extraction `metrics` and the `text` (null when written to `path_out`), or the
+`error_type` and `error` of a failed extraction.
+"""
+
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from pfmsoft.pdf2txt.extract_txt import (
+    LayoutMode,
+    extract_text_from_pdf,
+    extract_text_from_pdf_to_file,
+)
+from pfmsoft.pdf2txt.metrics import ExtractMetrics
+from pfmsoft.pdf2txt.options import DEFAULT_FONT_CACHE_SIZE
+
+
+@dataclass
+class ServeRequest:
+    """A request to extract the text of a pdf file."""
+
+    path_in: str
+    id: Any = None
+    path_out: str | None = None
+    overwrite: bool = False
+    layout: LayoutMode = LayoutMode.FULL
+
+    @classmethod
+    def from_json(cls, line: str | bytes) -> "ServeRequest":
+        """Parse a request line.
+
+        Raises:
+            ValueError: If the line is not a valid request.
+        """
+        data = json.loads(line)
+        if not isinstance(data, dict) or "path_in" not in data:
+            raise ValueError("A request must be a json object with a path_in.")
+        try:
+            request = cls(**data)
+        except TypeError as e:
+            raise ValueError(str(e)) from e
+        request.layout = LayoutMode(request.layout)
+        return request
+
+
+@dataclass
+class ServeResponse:
+    """The result of a request."""
+
+    id: Any = None
+    ok: bool = True
+    text: str | None = None
+    metrics: dict[str, Any] = field(default_factory=dict)
+    error_type: str | None = None
+    error: str | None = None
+
+    @classmethod
+    def failure(cls, request_id: Any, error: BaseException) -> "ServeResponse":
+        """A response for a failed request."""
+        return cls(
+            id=request_id, ok=False, error_type=type(error).__name__, error=str(error)
+        )
+
+    def to_json(self) -> bytes:
+        """The response as a json line."""
+        return (json.dumps(asdict(self)) + "\n").encode("utf-8")
+
+
+def serve_job(
+    request: ServeRequest, font_cache_size: int = 0
+) -> tuple[str | None, ExtractMetrics]:
+    """Extract the text for a request, in a worker process."""
+    if request.path_out is None:
+        return extract_text_from_pdf(
+            Path(request.path_in),
+            layout=request.layout,
+            font_cache_size=font_cache_size,
+        )
+    metrics = extract_text_from_pdf_to_file(
+        Path(request.path_in),
+        Path(request.path_out),
+        overwrite=request.overwrite,
+        layout=request.layout,
+        font_cache_size=font_cache_size,
+    )
+    return None, metrics
+
+
+def _warm_up() -> int:
+    """Give a new worker process something to do, so it imports pdfminer."""
+    return os.getpid()
+
+
+class ExtractRequestHandler(socketserver.StreamRequestHandler):
+    """Reads the requests of one connection, and streams back the responses."""
+
+    server: "ExtractServer"
+
+    def handle(self):
+        """Submit each request line, then wait for the responses to be sent."""
+        send_lock = threading.Lock()
+        # Waiting on the futures is not enough, as their done callbacks, which
+        # send the responses, run after the futures' waiters are woken.
+        sent = threading.Condition()
+        pending: set[Future] = set()
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = ServeRequest.from_json(line)
+            except ValueError as e:
+                self.send(ServeResponse.failure(None, e), send_lock)
+                continue
+            try:
+                future = self.server.submit(request)
+            except Exception as e:
+                self.send(ServeResponse.failure(request.id, e), send_lock)
+                continue
+            with sent:
+                pending.add(future)
+            future.add_done_callback(
+                partial(self.job_done, request.id, send_lock, sent, pending)
+            )
+        with sent:
+            sent.wait_for(lambda: not pending)
+
+    def job_done(
+        self,
+        request_id: Any,
+        send_lock: threading.Lock,
+        sent: threading.Condition,
+        pending: set,
+        future: Future,
+    ):
+        """Send the response for a finished job."""
+        try:
+            self.send(self.response_for(request_id, future), send_lock)
+        finally:
+            with sent:
+                pending.discard(future)
+                sent.notify_all()
+
+    def response_for(self, request_id: Any, future: Future) -> ServeResponse:
+        """The response for a finished job."""
+        if future.cancelled():
+            return ServeResponse.failure(
+                request_id, RuntimeError("The server is shutting down.")
+            )
+        if (error := future.exception()) is not None:
+            return ServeResponse.failure(request_id, error)
+        text, metrics = future.result()
+        return ServeResponse(id=request_id, text=text, metrics=asdict(metrics))
+
+    def send(self, response: ServeResponse, send_lock: threading.Lock):
+        """Write a response line, unless the client has gone away."""
+        with send_lock:
+            try:
+                self.wfile.write(response.to_json())
+                self.wfile.flush()
+            except OSError:
+                pass
+
+
+class ExtractServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves extraction requests from a pool of warm worker processes.
+
+    Each connection is handled in its own thread. At most `queue_size` jobs are
+    queued or running at once, across all connections. When the queue is full,
+    a connection stops reading requests until a job finishes, so clients that
+    send faster than the workers extract are slowed down by the socket.
+
+    If a worker process dies, the jobs that were running fail, and the workers
+    are replaced, so the server keeps serving.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: Path,
+        workers: int = 1,
+        queue_size: int = 0,
+        font_cache_size: int = DEFAULT_FONT_CACHE_SIZE,
+    ):
+        """Start the worker processes, and listen on a Unix domain socket.
+
+        Args:
+            socket_path: Path of the socket file. A stale socket file is replaced.
+            workers: Number of worker processes.
+            queue_size: Jobs that can be queued or running at once. Defaults to
+                four per worker.
+            font_cache_size: Fonts each worker keeps decoded between requests.
+                0 decodes the fonts of each document afresh.
+
+        Raises:
+            FileExistsError: If another server is listening on `socket_path`.
+        """
+        remove_stale_socket(socket_path)
+        self.socket_path = socket_path
+        self.workers = workers
+        self.font_cache_size = font_cache_size
+        self.executor = self._start_workers()
+        wait([self.executor.submit(_warm_up) for _ in range(workers)])
+        self._executor_lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(queue_size or workers * 4)
+        super().__init__(str(socket_path), ExtractRequestHandler)
+
+    def _start_workers(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def replace_workers(self, broken: ProcessPoolExecutor):
+        """Replace a pool broken by a dead worker, unless it was already replaced.
+
+        A broken pool has already stopped its other workers, and failed its jobs.
+        It is not shut down here, as this may run in its management thread.
+        """
+        with self._executor_lock:
+            if self.executor is broken:
+                self.executor = self._start_workers()
+
+    def submit(self, request: ServeRequest) -> Future:
+        """Queue a job, waiting for a free slot if the queue is full.
+
+        Raises:
+            RuntimeError: If the server is shutting down.
+        """
+        self.slots.acquire()
+        try:
+            executor = self.executor
+            try:
+                future = executor.submit(
+                    serve_job, request, font_cache_size=self.font_cache_size
+                )
+            except BrokenProcessPool:
+                self.replace_workers(executor)
+                executor = self.executor
+                future = executor.submit(
+                    serve_job, request, font_cache_size=self.font_cache_size
+                )
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(partial(self.job_done, executor))
+        return future
+
+    def job_done(self, executor: ProcessPoolExecutor, future: Future):
+        """Free the job's slot, and replace the workers if the job's worker died."""
+        self.slots.release()
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self.replace_workers(executor)
+
+    def server_close(self):
+        """Stop listening, stop the workers, and remove the socket file."""
+        super().server_close()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.socket_path.unlink(missing_ok=True)
+
+
+def remove_stale_socket(socket_path: Path):
+    """Remove a socket file left by a server that is no longer running.
+
+    Raises:
+        FileExistsError: If a server is listening on the socket, or the path is
+            not a socket.
+    """
+    if not socket_path.exists():
+        return
+    if not socket_path.is_socket():
+        raise FileExistsError(f"{socket_path} exists, and is not a socket.")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(socket_path))
+        except ConnectionRefusedError:
+            socket_path.unlink()
+            return
+    raise FileExistsError(f"A server is already listening on {socket_path}.")
@@ -0,0 +1,253 @@
+"""Split the inputs of a batch run across several machines, and check the parts.
+
+An input belongs to one shard, picked by a stable hash of its path relative to
+the input directory, so every node that scans the same directory agrees on the
+split without talking to the others. Each node writes a shard manifest of the
+inputs it owns, and `merge_shard_manifests` checks that the shards cover every
+input exactly once.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from pfmsoft.pdf2txt.snippets.atomic_write import atomic_open
+
+SHARD_MANIFEST_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One of `count` shards, numbered from 1."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, text: str) -> "Shard":
+        """Parse a shard written as `i/N`, e.g. `2/8`.
+
+        Raises:
+            ValueError: If the text is not a shard, or i is not from 1 to N.
+        """
+        index, sep, count = text.partition("/")
+        try:
+            shard = cls(index=int(index), count=int(count))
+        except ValueError:
+            raise ValueError(f"A shard is written as i/N, not {text!r}.") from None
+        if not sep or not 1 <= shard.index <= shard.count:
+            raise ValueError(f"A shard is written as i/N, with i from 1 to N: {text!r}")
+        return shard
+
+    def __str__(self) -> str:
+        """The shard as `i/N`."""
+        return f"{self.index}/{self.count}"
+
+    def contains(self, relative_path: str) -> bool:
+        """Check if an input belongs to this shard."""
+        return shard_index(relative_path, self.count) == self.index
+
+
+def shard_index(relative_path: str, count: int) -> int:
+    """The shard, from 1 to `count`, that an input belongs to.
+
+    Args:
+        relative_path: The input's path relative to the input directory, with
+            forward slashes, so all platforms agree.
+        count: The number of shards.
+    """
+    digest = hashlib.sha256(relative_path.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+class ShardManifest:
+    """The inputs a node owns in a sharded run, and what became of each.
+
+    Each input is recorded with a status:
+        extracted: Extracted by this run.
+        duplicate: Reproduced from an identical input, see `--dedupe`.
+        current: Skipped, as up to date in the incremental manifest.
+        resumed: Skipped, as completed by the interrupted run being resumed.
+        failed: Extraction failed.
+        pending: Found, but not finished when the run stopped.
+
+    Inputs are claimed and recorded from both the scanning thread and the main
+    thread, so updates hold a lock.
+    """
+
+    def __init__(
+        self, path: Path, source_dir: Path, shard: Shard, settings: dict[str, str]
+    ):
+        """Start an empty shard manifest.
+
+        Args:
+            path: Where the shard manifest is written.
+            source_dir: The input directory that paths are relative to.
+            shard: The shard this node runs.
+            settings: The options of the run that change its output. Every shard
+                of a run must use the same settings.
+        """
+        self.path = path
+        self.source_dir = source_dir
+        self.shard = shard
+        self.settings = settings
+        self.started_at = time.time()
+        self.files: dict[str, str] = {}
+        self.pages = 0
+        self.bytes_in = 0
+        self.chars_out = 0
+        self._lock = threading.Lock()
+
+    def key(self, path_in: Path) -> str:
+        """The key of an input file, its path relative to the source directory."""
+        return path_in.relative_to(self.source_dir).as_posix()
+
+    def claim(self, path_in: Path) -> bool:
+        """Check if an input belongs to this shard, recording it as pending if so."""
+        key = self.key(path_in)
+        if not self.shard.contains(key):
+            return False
+        with self._lock:
+            self.files.setdefault(key, "pending")
+        return True
+
+    def record(
+        self,
+        path_in: Path,
+        status: str,
+        pages: int = 0,
+        bytes_in: int = 0,
+        chars_out: int = 0,
+    ):
+        """Record what became of an input, and add its sizes to the totals."""
+        key = self.key(path_in)
+        with self._lock:
+            self.files[key] = status
+            self.pages += pages
+            self.bytes_in += bytes_in
+            self.chars_out += chars_out
+
+    def write(
+        self,
+        elapsed_seconds: float | None = None,
+        makespan_seconds: float | None = None,
+    ):
+        """Write the shard manifest as json, replacing an earlier one."""
+        with self._lock:
+            data = {
+                "format": SHARD_MANIFEST_FORMAT,
+                "shard": str(self.shard),
+                "settings": self.settings,
+                "started_at": self.started_at,
+                "finished_at": time.time(),
+                "elapsed_seconds": elapsed_seconds,
+                "makespan_seconds": makespan_seconds,
+                "pages": self.pages,
+                "bytes_in": self.bytes_in,
+                "chars_out": self.chars_out,
+                "files": dict(sorted(self.files.items())),
+            }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_open(self.path) as fp_out:
+            fp_out.write(json.dumps(data, indent=1))
+
+
+def shard_manifest_name(shard: Shard) -> str:
+    """The default file name of a shard's manifest."""
+    return f".pdf2txt-shard-{shard.index}-of-{shard.count}.json"
+
+
+@dataclass
+class MergeReport:
+    """The combined result of the shards of a run."""
+
+    shards: int
+    files: int
+    status_counts: dict[str, int]
+    pages: int
+    bytes_in: int
+    wall_seconds: float
+    node_seconds: float
+    problems: list[str]
+    """Ways the shards fail to cover the inputs exactly once. Empty if they do."""
+
+    @property
+    def pages_per_second(self) -> float:
+        """Pages extracted per second of wall time, across all nodes."""
+        return self.pages / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Input bytes extracted per second of wall time, across all nodes."""
+        return self.bytes_in / self.wall_seconds if self.wall_seconds else 0.0
+
+
+def merge_shard_manifests(
+    paths: list[Path], expected_files: set[str] | None = None
+) -> MergeReport:
+    """Check that shard manifests cover the inputs of a run exactly once.
+
+    Args:
+        paths: The shard manifest of every node.
+        expected_files: The relative paths of every input, from a scan of the
+            input directory, if available. Otherwise the inputs are those the
+            shards found.
+
+    Returns:
+        The combined totals and throughput, and any problems found.
+    """
+    problems: list[str] = []
+    manifests = [json.loads(path.read_text(encoding="utf-8")) for path in paths]
+    owners: dict[str, list[str]] = {}
+    status_counts: dict[str, int] = {}
+    shards: dict[Shard, Path] = {}
+    for path, data in zip(paths, manifests, strict=True):
+        if data.get("format") != SHARD_MANIFEST_FORMAT:
+            problems.append(f"{path} is not a shard manifest.")
+            continue
+        shard = Shard.parse(data["shard"])
+        if shard in shards:
+            problems.append(f"Shard {shard} is in both {shards[shard]} and {path}.")
+        shards[shard] = path
+        if data["settings"] != manifests[0]["settings"]:
+            problems.append(f"{path} was run with different settings.")
+        for key, status in data["files"].items():
+            owners.setdefault(key, []).append(str(shard))
+            status_counts[status] = status_counts.get(status, 0) + 1
+            if not shard.contains(key):
+                problems.append(f"{key} is in shard {shard}, but belongs to another.")
+    counts = {shard.count for shard in shards}
+    if len(counts) > 1:
+        problems.append(f"The shards split the run differently: {sorted(counts)}.")
+    elif counts:
+        (count,) = counts
+        missing = sorted(set(range(1, count + 1)) - {s.index for s in shards})
+        if missing:
+            problems.append(f"Missing shards {missing} of {count}.")
+    for key, shard_names in sorted(owners.items()):
+        if len(shard_names) > 1:
+            problems.append(f"{key} is in more than one shard: {shard_names}.")
+    if expected_files is not None:
+        for key in sorted(expected_files - owners.keys()):
+            problems.append(f"{key} is not in any shard.")
+        for key in sorted(owners.keys() - expected_files):
+            problems.append(f"{key} is in a shard, but not in the input directory.")
+    valid = [data for data in manifests if data.get("format") == SHARD_MANIFEST_FORMAT]
+    wall_seconds = 0.0
+    if valid:
+        wall_seconds = max(data["finished_at"] for data in valid) - min(
+            data["started_at"] for data in valid
+        )
+    return MergeReport(
+        shards=len(shards),
+        files=len(owners),
+        status_counts=status_counts,
+        pages=sum(data["pages"] for data in valid),
+        bytes_in=sum(data["bytes_in"] for data in valid),
+        wall_seconds=wall_seconds,
+        node_seconds=sum(data["elapsed_seconds"] or 0.0 for data in valid),
+        problems=problems,
+    )
@@ -0,0 +1,235 @@
+"""Write the text of many pdf files into one container file."""
+
+import io
+import json
+import os
+import queue
+import sqlite3
+import tarfile
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path, PurePosixPath
+from time import time
+
+from pfmsoft.pdf2txt.options import SinkKind
+from pfmsoft.pdf2txt.snippets.atomic_write import temporary_path_for
+
+
+@dataclass
+class Document:
+    """The text of one pdf file, and what is known about it."""
+
+    path: str
+    """The path of the pdf file, relative to the input directory."""
+    text: str
+    pages: int = 0
+    bytes_in: int = 0
+
+
+class Sink:
+    """A container file that documents are written to.
+
+    The container is written to a temporary file, and renamed into place when the
+    sink is closed, so a killed run does not leave a partial container behind. A
+    run that stops early aborts the sink, which removes the temporary file, and
+    leaves any earlier container at the path as it was.
+    """
+
+    def __init__(self, path: Path):
+        """Open a sink.
+
+        Args:
+            path: The container file. Replaced when the sink is closed.
+        """
+        self.path = path
+        self.tmp_path = temporary_path_for(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path.unlink(missing_ok=True)
+
+    def write(self, document: Document):
+        """Add a document to the container."""
+        raise NotImplementedError
+
+    def close(self):
+        """Finish the container, and move it into place."""
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        """Remove the unfinished container."""
+        self.tmp_path.unlink(missing_ok=True)
+
+
+class JsonlSink(Sink):
+    """One json object per line, with the text and metadata of a document."""
+
+    def __init__(self, path: Path):
+        """Open a sink."""
+        super().__init__(path)
+        self.fp_out = open(
+            self.tmp_path, mode="w", encoding="utf-8", buffering=1024 * 1024
+        )
+
+    def write(self, document: Document):
+        """Add a document to the container."""
+        self.fp_out.write(json.dumps(asdict(document)) + "\n")
+
+    def close(self):
+        """Finish the container, and move it into place."""
+        self.fp_out.close()
+        super().close()
+
+    def abort(self):
+        """Remove the unfinished container."""
+        self.fp_out.close()
+        super().abort()
+
+
+class SqliteSink(Sink):
+    """A `documents` table in a SQLite database, keyed by path."""
+
+    COMMIT_EVERY = 500
+
+    def __init__(self, path: Path):
+        """Open a sink."""
+        super().__init__(path)
+        # Opened here, but only used by the writer thread of a ThreadedSink.
+        self.connection = sqlite3.connect(self.tmp_path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE documents ("
+            "path TEXT PRIMARY KEY, pages INTEGER, bytes_in INTEGER, text TEXT)"
+        )
+        self.uncommitted = 0
+
+    def write(self, document: Document):
+        """Add a document to the container."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO documents (path, pages, bytes_in, text) "
+            "VALUES (?, ?, ?, ?)",
+            (document.path, document.pages, document.bytes_in, document.text),
+        )
+        self.uncommitted += 1
+        if self.uncommitted >= self.COMMIT_EVERY:
+            self.connection.commit()
+            self.uncommitted = 0
+
+    def close(self):
+        """Finish the container, and move it into place."""
+        self.connection.commit()
+        self.connection.close()
+        super().close()
+
+    def abort(self):
+        """Remove the unfinished container."""
+        self.connection.close()
+        super().abort()
+
+
+class TarSink(Sink):
+    """An uncompressed tar file with a .txt member for each document.
+
+    The page count and input size are stored in the PAX headers of each member,
+    as `pdf2txt.pages` and `pdf2txt.bytes_in`.
+    """
+
+    def __init__(self, path: Path):
+        """Open a sink."""
+        super().__init__(path)
+        self.tar = tarfile.open(self.tmp_path, mode="w", format=tarfile.PAX_FORMAT)
+
+    def write(self, document: Document):
+        """Add a document to the container."""
+        data = document.text.encode("utf-8")
+        info = tarfile.TarInfo(
+            name=str(PurePosixPath(document.path).with_suffix(".txt"))
+        )
+        info.size = len(data)
+        info.mtime = int(time())
+        info.pax_headers = {
+            "pdf2txt.pages": str(document.pages),
+            "pdf2txt.bytes_in": str(document.bytes_in),
+        }
+        self.tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        """Finish the container, and move it into place."""
+        self.tar.close()
+        super().close()
+
+    def abort(self):
+        """Remove the unfinished container."""
+        self.tar.close()
+        super().abort()
+
+
+SINKS: dict[SinkKind, type[Sink]] = {
+    SinkKind.JSONL: JsonlSink,
+    SinkKind.SQLITE: SqliteSink,
+    SinkKind.TAR: TarSink,
+}
+
+_CLOSE = object()
+
+
+class ThreadedSink:
+    """Writes documents to a sink from a single background thread.
+
+    Extraction does not wait on the container's I/O. The queue of documents is
+    bounded, so extraction slows down rather than filling memory when the writer
+    falls behind.
+    """
+
+    def __init__(self, sink: Sink, max_pending: int = 256):
+        """Start the writer thread.
+
+        Args:
+            sink: The sink to write to. Only used by the writer thread.
+            max_pending: Documents that can wait to be written.
+        """
+        self.sink = sink
+        self.error: BaseException | None = None
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="sink", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while (document := self._queue.get()) is not _CLOSE:
+            if self.error is not None:
+                continue
+            try:
+                self.sink.write(document)
+            except BaseException as e:
+                self.error = e
+
+    def write(self, document: Document):
+        """Queue a document to be written.
+
+        Raises:
+            Exception: The error from an earlier write, if one failed.
+        """
+        if self.error is not None:
+            raise self.error
+        self._queue.put(document)
+
+    def close(self):
+        """Write the queued documents, and close the sink.
+
+        Raises:
+            Exception: The error from a write, if one failed.
+        """
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+        self.sink.close()
+
+    def abort(self):
+        """Stop the writer thread, and remove the unfinished container."""
+        self.error = self.error or RuntimeError("The sink was aborted.")
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        self.sink.abort()
+
+
+def open_sink(kind: SinkKind, path: Path) -> ThreadedSink:
+    """Open a container of a kind at `path`, written by a background thread."""
+    return ThreadedSink(SINKS[kind](path))
@@ -0,0 +1,57 @@
+"""atomic_write.py."""
+
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+
+
+def temporary_path_for(path: Path) -> Path:
+    """The hidden temporary file that is renamed to `path` when it is complete."""
+    return path.with_name(f".{path.name}.tmp")
+
+
+def fsync_directory(directory: Path):
+    """Flush the entries of a directory to disk, so a rename in it survives a crash.
+
+    Does nothing on Windows, where a directory cannot be opened.
+    """
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(
+    path: Path, mode: str = "w", encoding: str | None = "utf-8"
+) -> Iterator[IO]:
+    """Open a temporary file for writing, and rename it to `path` when closed.
+
+    Readers, and later runs, only ever see a missing or a complete file at `path`,
+    even if the process dies while writing. The file is synced to disk before it
+    is renamed, and the rename after, so the same holds after a power loss or a
+    crash of the machine. If the block raises, the temporary file is removed and
+    `path` is left as it was.
+
+    The temporary file is in the same directory as `path`, so that the rename is
+    atomic, and has a fixed name, so a temporary file left by a killed process is
+    replaced by the next attempt.
+    """
+    tmp_path = temporary_path_for(path)
+    if "b" in mode:
+        encoding = None
+    try:
+        with open(tmp_path, mode=mode, encoding=encoding) as fp_out:
+            yield fp_out
+            fp_out.flush()
+            os.fsync(fp_out.fileno())
+        os.replace(tmp_path, path)
+        fsync_directory(path.parent)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,92 @@
+"""Find new and changed pdf files in a directory tree, by polling it."""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from time import monotonic
+
+from pfmsoft.pdf2txt.discovery import scan_pdf_files
+
+
+@dataclass(frozen=True)
+class FileState:
+    """What a poll sees of a file, to tell when it changes."""
+
+    size: int
+    mtime_ns: int
+
+    @classmethod
+    def from_stat(cls, stat: os.stat_result) -> "FileState":
+        """The state of a file from its stat result."""
+        return cls(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+
+class DirectoryIndex:
+    """The pdf files of a directory tree, kept in memory between polls.
+
+    A file is ready when it is new, or has changed since it was last ready, and
+    then has kept the same size and mtime for `debounce` seconds, so a file that
+    is still being written is left until it is complete. A file is only seen to
+    keep its size and mtime by a later poll, so a file is never ready on the poll
+    that first sees it.
+    """
+
+    def __init__(self, directory: Path, recurse: bool = False, debounce: float = 2.0):
+        """Make an empty index. The first poll finds every file.
+
+        Args:
+            directory: The directory to watch.
+            recurse: Also watch sub directories.
+            debounce: Seconds a new or changed file must stay unchanged.
+        """
+        self.directory = directory
+        self.recurse = recurse
+        self.debounce = debounce
+        self.files: dict[Path, FileState] = {}
+        """The state of each file when it was last ready."""
+        self._changing: dict[Path, tuple[FileState, float]] = {}
+
+    @property
+    def settling(self) -> int:
+        """The number of new or changed files waiting out the debounce."""
+        return len(self._changing)
+
+    def poll(self, now: float | None = None) -> list[tuple[Path, os.stat_result]]:
+        """Scan the directory, and find the files that have become ready.
+
+        Files that were removed are forgotten, so they are ready again if they
+        come back. If the scan fails, e.g. as a file is removed while it is
+        scanned, nothing is ready and nothing is forgotten, until the next poll.
+
+        Args:
+            now: The time of the poll, in `time.monotonic` seconds. Defaults to
+                the current time.
+
+        Returns:
+            The path and stat result of each ready file, in directory order.
+        """
+        if now is None:
+            now = monotonic()
+        try:
+            found = list(scan_pdf_files(self.directory, recurse=self.recurse))
+        except OSError:
+            return []
+        ready = []
+        for path, stat in found:
+            state = FileState.from_stat(stat)
+            if self.files.get(path) == state:
+                self._changing.pop(path, None)
+                continue
+            changing = self._changing.get(path)
+            if changing is None or changing[0] != state:
+                self._changing[path] = (state, now)
+            elif now - changing[1] >= self.debounce:
+                del self._changing[path]
+                self.files[path] = state
+                ready.append((path, stat))
+        seen = {path for path, _ in found}
+        for path in self.files.keys() - seen:
+            del self.files[path]
+        for path in self._changing.keys() - seen:
+            del self._changing[path]
+        return ready
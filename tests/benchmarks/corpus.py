@@ -0,0 +1,136 @@
+"""Generate deterministic synthetic pdf corpora for benchmarking.
+
+The pdf files are written directly, using the standard 14 fonts so nothing has
+to be embedded. The same spec always produces the same bytes.
+"""
+
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud "
+    "exercitation ullamco laboris nisi aliquip ex ea commodo consequat duis aute "
+    "irure in reprehenderit voluptate velit esse cillum fugiat nulla pariatur"
+).split()
+
+FONTS = ("Helvetica", "Times-Roman", "Courier")
+
+DENSITIES = {
+    # name: (lines per page, words per line)
+    "sparse": (12, 6),
+    "dense": (60, 14),
+}
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Description of one synthetic pdf file."""
+
+    pages: int
+    font: str
+    density: str
+
+    @property
+    def name(self) -> str:
+        """File name for the spec."""
+        return f"{self.pages:04d}p-{self.font}-{self.density}.pdf"
+
+
+def default_specs() -> list[CorpusSpec]:
+    """Every combination of a few page counts, the fonts, and the densities."""
+    return [
+        CorpusSpec(pages=pages, font=font, density=density)
+        for pages in (1, 10, 50)
+        for font in FONTS
+        for density in DENSITIES
+    ]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def page_content(rng: random.Random, font_size: int, density: str) -> bytes:
+    """Build the content stream for one page of text."""
+    line_count, words_per_line = DENSITIES[density]
+    leading = 700 // line_count
+    lines = [f"BT /F1 {min(font_size, leading)} Tf {leading} TL 54 740 Td"]
+    for _ in range(line_count):
+        words = " ".join(rng.choice(WORDS) for _ in range(words_per_line))
+        lines.append(f"({_escape(words)}) Tj T*")
+    lines.append("ET")
+    return "\n".join(lines).encode("latin-1")
+
+
+def build_pdf(spec: CorpusSpec, seed: int = 0) -> bytes:
+    """Build the bytes of a pdf file for a spec."""
+    rng = random.Random(f"{seed}-{spec.name}")
+    font_size = 11
+    page_count = spec.pages
+    # Object numbers: 1 catalog, 2 pages, 3 font, then a page and a content
+    # stream for each page.
+    page_ids = [4 + 2 * idx for idx in range(page_count)]
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        (
+            f"<< /Type /Pages /Kids [{' '.join(f'{x} 0 R' for x in page_ids)}] "
+            f"/Count {page_count} >>"
+        ).encode(),
+        (
+            f"<< /Type /Font /Subtype /Type1 /BaseFont /{spec.font} "
+            "/Encoding /WinAnsiEncoding >>"
+        ).encode(),
+    ]
+    for page_id in page_ids:
+        content = page_content(rng, font_size=font_size, density=spec.density)
+        objects.append(
+            (
+                "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>"
+            ).encode()
+        )
+        objects.append(
+            f"<< /Length {len(content)} >>\nstream\n".encode()
+            + content
+            + b"\nendstream"
+        )
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for obj_id, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{obj_id} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode()
+    return bytes(out)
+
+
+def generate_corpus(
+    directory: Path, specs: list[CorpusSpec] | None = None, seed: int = 0
+) -> list[Path]:
+    """Write a pdf file for each spec into a directory.
+
+    Args:
+        directory: Destination directory, created if needed.
+        specs: The files to make. Defaults to `default_specs()`.
+        seed: Seed for the generated text.
+
+    Returns:
+        The paths of the pdf files.
+    """
+    if specs is None:
+        specs = default_specs()
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for spec in specs:
+        path = directory / spec.name
+        path.write_bytes(build_pdf(spec, seed=seed))
+        paths.append(path)
+    return paths
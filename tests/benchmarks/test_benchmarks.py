@@ -0,0 +1,96 @@
+"""Benchmark the extraction paths over a synthetic corpus.
+
+These are marked slow, run them with `nox -s benchmark`, or
+`pytest tests/benchmarks --runslow --bench-results-json results.json`.
+"""
+
+import logging
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from pfmsoft.pdf2txt.benchmark import (
+    BenchmarkResult,
+    benchmark_extract_all,
+    benchmark_extract_files,
+    run_isolated,
+    write_results,
+)
+from pfmsoft.pdf2txt.extract_txt import count_pdf_pages
+from tests.benchmarks.corpus import CorpusSpec, build_pdf, generate_corpus
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture(scope="module", name="corpus_dir")
+def corpus_dir_(test_output_dir: Path) -> Path:
+    """Generate the default synthetic corpus."""
+    corpus_dir = test_output_dir / "benchmark_corpus"
+    generate_corpus(corpus_dir)
+    return corpus_dir
+
+
+@pytest.fixture(scope="module", name="results")
+def results_(
+    request: pytest.FixtureRequest, test_output_dir: Path
+) -> Iterator[list[BenchmarkResult]]:
+    """Collect benchmark results, and save them when the module is done."""
+    results: list[BenchmarkResult] = []
+    yield results
+    if not results:
+        return
+    json_path = request.config.getoption("--bench-results-json")
+    path = Path(json_path) if json_path else test_output_dir / "benchmark.json"
+    write_results(path, results)
+    logger.info(f"Saved benchmark results to {path}")
+
+
+def test_corpus_is_deterministic():
+    """The same spec always gives the same pdf, with the expected page count."""
+    spec = CorpusSpec(pages=3, font="Courier", density="sparse")
+    assert build_pdf(spec) == build_pdf(spec)
+    assert build_pdf(spec) != build_pdf(spec, seed=1)
+
+
+def test_corpus_page_counts(test_output_dir: Path):
+    """The generated files are readable pdfs."""
+    specs = [CorpusSpec(pages=2, font="Helvetica", density="dense")]
+    (path,) = generate_corpus(test_output_dir / "corpus_page_counts", specs)
+    assert count_pdf_pages(path) == 2
+
+
+@pytest.mark.slow
+def test_benchmark_extract_file(
+    corpus_dir: Path, test_output_dir: Path, results: list[BenchmarkResult]
+):
+    """Benchmark extract_text_from_pdf_to_file."""
+    result = run_isolated(
+        benchmark_extract_files,
+        sorted(corpus_dir.glob("*.pdf")),
+        test_output_dir / "benchmark_extract_file",
+    )
+    print(result)
+    assert result.pages > 0
+    results.append(result)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("workers", [1, 0])
+def test_benchmark_extract_all(
+    corpus_dir: Path,
+    test_output_dir: Path,
+    results: list[BenchmarkResult],
+    workers: int,
+):
+    """Benchmark the extract all batch path."""
+    result = run_isolated(
+        benchmark_extract_all,
+        corpus_dir,
+        test_output_dir / f"benchmark_extract_all_{workers}",
+        workers=workers,
+        name=f"extract_all_workers_{workers}",
+    )
+    print(result)
+    assert result.pages > 0
+    results.append(result)
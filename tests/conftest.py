@@ -35,6 +35,12 @@ def pytest_addoption(parser: pytest.Parser):
     parser.addoption(
         "--runslow", action="store_true", default=False, help="run slow tests"
     )
+    parser.addoption(
+        "--bench-results-json",
+        action="store",
+        default=None,
+        help="save benchmark results to this json file",
+    )
 
 
 def pytest_configure(config: pytest.Config):
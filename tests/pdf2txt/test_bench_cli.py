@@ -0,0 +1,46 @@
+"""Test the bench command."""
+
+import json
+import shutil
+from importlib import resources
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from pfmsoft.pdf2txt.cli.main_typer import app
+from tests.resources.pdf import PDF_ANCHOR
+
+DATA_FILE_NAME = "sample.pdf"
+
+
+def test_bench_baseline(
+    runner: CliRunner, test_output_dir: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Save a baseline, then fail against a faster one."""
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(test_output_dir / "bench_config"))
+    path_in = test_output_dir / "bench_corpus"
+    path_in.mkdir()
+    file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+    with resources.as_file(file_resource) as sample_path:
+        shutil.copy(sample_path, path_in / DATA_FILE_NAME)
+
+    result = runner.invoke(app, ["bench", str(path_in), "--save-baseline", "first"])
+    print(result.stdout)
+    assert result.exit_code == 0
+    assert "Pages/sec" in result.stdout
+    saved = next((test_output_dir / "bench_config").rglob("first.json"))
+    data = json.loads(saved.read_text())
+    data["results"][0]["pages_per_second"] *= 1000
+    saved.with_name("fast.json").write_text(json.dumps(data))
+
+    result = runner.invoke(
+        app,
+        ["bench", str(path_in), "--baseline", "first", "--max-throughput-drop", "99"],
+    )
+    print(result.stdout)
+    assert result.exit_code == 0
+    result = runner.invoke(app, ["bench", str(path_in), "--baseline", "fast"])
+    print(result.stdout)
+    assert result.exit_code == 1
+    assert "Throughput fell" in result.stdout
@@ -39,3 +39,21 @@ def test_extract_all(runner: CliRunner) -> None:
     if result.stderr_bytes is not None:
         print(result.stderr)
     assert result.exit_code == 0
+
+
+def test_bench(runner: CliRunner) -> None:
+    """It exits with a status code of zero."""
+    result = runner.invoke(app, ["bench", "--help"])
+    print(result.stdout)
+    if result.stderr_bytes is not None:
+        print(result.stderr)
+    assert result.exit_code == 0
+
+
+def test_serve(runner: CliRunner) -> None:
+    """It exits with a status code of zero."""
+    result = runner.invoke(app, ["serve", "--help"])
+    print(result.stdout)
+    if result.stderr_bytes is not None:
+        print(result.stderr)
+    assert result.exit_code == 0
@@ -0,0 +1,59 @@
+"""Test that the command line starts quickly."""
+
+import subprocess
+import sys
+
+# Modules that `--help` should not wait on.
+HEAVY_MODULES = (
+    "pdfminer",
+    "rich.progress",
+    "multiprocessing",
+    "concurrent.futures",
+    "sqlite3",
+    "tarfile",
+    "cProfile",
+)
+# Import time budget for this package's own modules, in seconds. The imports
+# take about 0.025 seconds on a developer machine.
+IMPORT_BUDGET = 0.15
+
+HELP_SCRIPT = (
+    "import sys; sys.argv = ['pfmsoft-pdf2txt', '--help']; "
+    "from pfmsoft.pdf2txt.cli.main_typer import app; app()"
+)
+
+
+def import_times(script: str) -> dict[str, float]:
+    """Run a script with `-X importtime`, and get the self time of each import."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, module = line.removeprefix("import time:").split("|")
+        if self_us.strip().isdigit():
+            times[module.strip()] = int(self_us) / 1_000_000
+    return times
+
+
+def test_help_import_time():
+    """`--help` does not import pdfminer, and stays within an import budget."""
+    times = import_times(HELP_SCRIPT)
+    assert "pfmsoft.pdf2txt.cli.main_typer" in times
+    heavy = sorted(
+        module
+        for module in times
+        if any(
+            module == name or module.startswith(f"{name}.") for name in HEAVY_MODULES
+        )
+    )
+    assert not heavy
+    own = sum(
+        seconds for module, seconds in times.items() if module.startswith("pfmsoft")
+    )
+    assert own < IMPORT_BUDGET
@@ -0,0 +1,97 @@
+"""Test finding input files."""
+
+import itertools
+import time
+from pathlib import Path
+
+import pytest
+
+from pfmsoft.pdf2txt.discovery import (
+    prefetch,
+    raise_if_prefetch_stopped,
+    scan_pdf_files,
+)
+from pfmsoft.pdf2txt.watch import DirectoryIndex
+
+
+def test_scan_pdf_files(test_output_dir: Path):
+    """Pdf files are found case insensitively, with their stat results."""
+    base_dir = test_output_dir / "scan_pdf_files"
+    (base_dir / "sub" / "deeper").mkdir(parents=True, exist_ok=True)
+    (base_dir / "sub" / "folder.pdf").mkdir(exist_ok=True)
+    for name, size in (
+        ("a.pdf", 1),
+        ("B.PDF", 2),
+        ("notes.txt", 3),
+        ("sub/c.Pdf", 4),
+        ("sub/deeper/d.pdf", 5),
+    ):
+        (base_dir / name).write_bytes(b"x" * size)
+    found = {
+        path.relative_to(base_dir).as_posix(): stat.st_size
+        for path, stat in scan_pdf_files(base_dir, recurse=True)
+    }
+    assert found == {"a.pdf": 1, "B.PDF": 2, "sub/c.Pdf": 4, "sub/deeper/d.pdf": 5}
+    top_level = {path.name for path, _ in scan_pdf_files(base_dir, recurse=False)}
+    assert top_level == {"a.pdf", "B.PDF"}
+
+
+def test_prefetch():
+    """Items are produced ahead of the consumer, and errors reach the consumer."""
+    produced = []
+    assert list(prefetch(range(5), on_item=produced.append)) == [0, 1, 2, 3, 4]
+    assert produced == [0, 1, 2, 3, 4]
+
+    def failing():
+        yield 1
+        raise ValueError("scan failed")
+
+    items = prefetch(failing())
+    assert next(items) == 1
+    with pytest.raises(ValueError, match="scan failed"):
+        next(items)
+
+
+def test_prefetch_stops_producer():
+    """A consumer that stops does not wait for a producer sorting a long scan."""
+
+    def endless_scan():
+        for idx in itertools.count():
+            raise_if_prefetch_stopped()
+            time.sleep(0.001)
+            yield idx
+
+    def produce():
+        yield "first"
+        yield from sorted(endless_scan())
+
+    items = prefetch(produce())
+    assert next(items) == "first"
+    start = time.perf_counter()
+    items.close()
+    assert time.perf_counter() - start < 5
+
+
+def test_directory_index_debounce(test_output_dir: Path):
+    """New and changed files are ready once they stop changing for the debounce."""
+    base_dir = test_output_dir / "directory_index_debounce"
+    base_dir.mkdir(parents=True, exist_ok=True)
+    pdf = base_dir / "a.pdf"
+    pdf.write_bytes(b"x")
+    index = DirectoryIndex(base_dir, debounce=2.0)
+    assert index.poll(now=0.0) == []
+    assert index.settling == 1
+    assert index.poll(now=1.0) == []
+    pdf.write_bytes(b"xx")
+    # Still being written, so the debounce starts again.
+    assert index.poll(now=2.5) == []
+    assert index.poll(now=4.0) == []
+    assert [path for path, _ in index.poll(now=4.5)] == [pdf]
+    assert index.poll(now=10.0) == []
+    assert index.settling == 0
+    pdf.write_bytes(b"xxx")
+    assert index.poll(now=11.0) == []
+    assert [path for path, _ in index.poll(now=13.0)] == [pdf]
+    pdf.unlink()
+    assert index.poll(now=14.0) == []
+    assert index.files == {}
@@ -0,0 +1,597 @@
+"""Test extracting text from a directory of pdf files via the cli."""
+
+import bz2
+import gzip
+import json
+import lzma
+import multiprocessing
+import os
+import shutil
+import signal
+import sqlite3
+import tarfile
+from contextlib import closing
+from importlib import resources
+from pathlib import Path, PurePosixPath
+
+from typer.testing import CliRunner
+
+from pfmsoft.pdf2txt.cli.extract_txt_cli import (
+    ExtractJob,
+    build_jobs_from_directory,
+    run_jobs,
+    watch_jobs,
+)
+from pfmsoft.pdf2txt.cli.main_typer import app
+from pfmsoft.pdf2txt.compression import SUFFIXES, Compression
+from pfmsoft.pdf2txt.extract_txt import layout_params
+from pfmsoft.pdf2txt.manifest import Manifest
+from pfmsoft.pdf2txt.options import LayoutMode
+from tests.benchmarks.corpus import CorpusSpec, build_pdf
+from tests.resources.pdf import PDF_ANCHOR
+
+DATA_FILE_NAME = "sample.pdf"
+
+
+def make_input_dir(path_in: Path, count: int) -> Path:
+    """Fill a directory with copies of the sample pdf, some in a sub directory."""
+    file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+    with resources.as_file(file_resource) as sample_path:
+        for idx in range(count):
+            sub_dir = path_in / "sub" if idx % 2 else path_in
+            sub_dir.mkdir(parents=True, exist_ok=True)
+            shutil.copy(sample_path, sub_dir / f"sample_{idx}.pdf")
+    return path_in
+
+
+def test_extract_all_workers_match_serial(runner: CliRunner, test_output_dir: Path):
+    """Extracting with a process pool gives the same output as a serial run."""
+    base_dir = test_output_dir / "extract_all_workers"
+    path_in = make_input_dir(base_dir / "in", count=6)
+    serial_out = base_dir / "serial"
+    pool_out = base_dir / "pool"
+    result = runner.invoke(
+        app, ["extract", "all", str(path_in), str(serial_out), "--recurse"]
+    )
+    assert result.exit_code == 0, result.stdout
+    result = runner.invoke(
+        app,
+        ["extract", "all", str(path_in), str(pool_out), "--recurse", "--workers", "3"],
+    )
+    assert result.exit_code == 0, result.stdout
+    serial_files = sorted(x.relative_to(serial_out) for x in serial_out.rglob("*.txt"))
+    pool_files = sorted(x.relative_to(pool_out) for x in pool_out.rglob("*.txt"))
+    assert len(serial_files) == 6
+    assert serial_files == pool_files
+    for file in serial_files:
+        assert (serial_out / file).read_bytes() == (pool_out / file).read_bytes()
+
+
+def test_extract_all_workers_halt_on_fail(runner: CliRunner, test_output_dir: Path):
+    """A failed job with --halt-on-fail stops a pooled run with an error."""
+    base_dir = test_output_dir / "extract_all_halt"
+    path_in = make_input_dir(base_dir / "in", count=4)
+    (path_in / "broken.pdf").write_bytes(b"not a pdf")
+    result = runner.invoke(
+        app,
+        [
+            "extract",
+            "all",
+            str(path_in),
+            str(base_dir / "out"),
+            "--workers",
+            "2",
+            "--halt-on-fail",
+        ],
+    )
+    assert result.exit_code != 0
+
+
+def test_run_jobs_replaces_dead_worker(test_output_dir: Path):
+    """A killed worker fails the jobs it broke, and the rest of the run goes on."""
+    base_dir = test_output_dir / "run_jobs_dead_worker"
+    path_in = make_input_dir(base_dir / "in", count=12)
+    jobs = build_jobs_from_directory(
+        path_in, base_dir / "out", recurse=True, overwrite=False, halt_on_fail=False
+    )
+    results = []
+    for result in run_jobs(jobs, workers=2):
+        if not results:
+            os.kill(multiprocessing.active_children()[0].pid, signal.SIGKILL)
+        results.append(result)
+    assert sorted(r.job.path_in for r in results) == sorted(j.path_in for j in jobs)
+    failed = [r for r in results if r.error is not None]
+    assert all(type(r.error).__name__ == "BrokenProcessPool" for r in failed)
+    # The jobs after the window of the broken pool ran on new workers.
+    assert len(failed) <= 4
+    assert results[-1].error is None
+    # A job on the surviving worker may finish its output as the pool breaks.
+    assert len(list((base_dir / "out").rglob("*.txt"))) >= 12 - len(failed)
+
+
+def test_extract_all_incremental(runner: CliRunner, test_output_dir: Path):
+    """An incremental run only extracts new or changed files."""
+    base_dir = test_output_dir / "extract_all_incremental"
+    path_in = make_input_dir(base_dir / "in", count=3)
+    path_out = base_dir / "out"
+    args = ["extract", "all", str(path_in), str(path_out), "--incremental"]
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.stdout
+    assert (path_out / ".pdf2txt-manifest.json").is_file()
+    first_run = {x: x.stat().st_mtime_ns for x in path_out.glob("*.txt")}
+    assert len(first_run) == 2
+
+    unchanged = path_in / "sample_0.pdf"
+    os.utime(unchanged, ns=(1, 1))
+    changed = path_in / "sample_2.pdf"
+    changed.write_bytes(changed.read_bytes() + b"\n")
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.stdout
+    second_run = {x: x.stat().st_mtime_ns for x in path_out.glob("*.txt")}
+    assert second_run[path_out / "sample_0.txt"] == first_run[path_out / "sample_0.txt"]
+    assert second_run[path_out / "sample_2.txt"] != first_run[path_out / "sample_2.txt"]
+
+
+def test_manifest_records_input_as_scanned(test_output_dir: Path):
+    """An input changed while it is extracted is extracted again by the next run."""
+    base_dir = test_output_dir / "manifest_as_scanned"
+    path_in = make_input_dir(base_dir / "in", count=1)
+    manifest = Manifest(
+        path=base_dir / "manifest.json",
+        source_dir=path_in,
+        la_params=layout_params(LayoutMode.FULL),
+    )
+    (job,) = build_jobs_from_directory(
+        path_in,
+        base_dir / "out",
+        recurse=False,
+        overwrite=False,
+        halt_on_fail=False,
+        manifest=manifest,
+    )
+    (result,) = run_jobs([job])
+    # Changed after the scan, as if while it was extracted.
+    job.path_in.write_bytes(job.path_in.read_bytes() + b"\n")
+    manifest.record(
+        path_in=job.path_in, path_out=job.path_out, stat=job.stat, sha256=job.sha256
+    )
+    assert result.error is None
+    assert not manifest.is_current(path_in=job.path_in, path_out=job.path_out)
+
+
+def test_extract_all_metrics_out(runner: CliRunner, test_output_dir: Path):
+    """A metrics file has per file phase timings and a run summary."""
+    base_dir = test_output_dir / "extract_all_metrics"
+    path_in = make_input_dir(base_dir / "in", count=2)
+    (path_in / "broken.pdf").write_bytes(b"not a pdf")
+    metrics_path = base_dir / "metrics.json"
+    result = runner.invoke(
+        app,
+        [
+            "extract",
+            "all",
+            str(path_in),
+            str(base_dir / "out"),
+            "--metrics-out",
+            str(metrics_path),
+        ],
+    )
+    assert result.exit_code == 0, result.stdout
+    data = json.loads(metrics_path.read_text())
+    summary = data["summary"]
+    assert summary["files"] == 1
+    assert summary["failed"] == 1
+    assert summary["pages"] == 2
+    assert summary["elapsed_seconds"] > 0
+    assert 0 < summary["makespan_seconds"] <= summary["elapsed_seconds"]
+    assert sum(summary["latency_histogram"].values()) == 1
+    assert summary["font_cache"]["hits"] + summary["font_cache"]["misses"] > 0
+    assert set(summary["phase_seconds"]) == {"parse", "layout", "render", "write"}
+    (file_metrics,) = data["files"]
+    assert file_metrics["chars_out"] > 0
+    assert file_metrics["layout_seconds"] > 0
+    assert data["failures"][0]["path_in"].endswith("broken.pdf")
+
+
+def test_extract_all_largest_first(runner: CliRunner, test_output_dir: Path):
+    """Jobs can be started in order of input size."""
+    base_dir = test_output_dir / "extract_all_order"
+    path_in = base_dir / "in"
+    path_in.mkdir(parents=True, exist_ok=True)
+    for pages in (1, 3, 2):
+        spec = CorpusSpec(pages=pages, font="Helvetica", density="sparse")
+        (path_in / spec.name).write_bytes(build_pdf(spec))
+    for order, expected in (
+        ("largest-first", [3, 2, 1]),
+        ("smallest-first", [1, 2, 3]),
+    ):
+        metrics_path = base_dir / f"{order}.json"
+        result = runner.invoke(
+            app,
+            [
+                "extract",
+                "all",
+                str(path_in),
+                str(base_dir / order),
+                "--order",
+                order,
+                "--metrics-out",
+                str(metrics_path),
+            ],
+        )
+        assert result.exit_code == 0, result.stdout
+        data = json.loads(metrics_path.read_text())
+        assert [file["pages"] for file in data["files"]] == expected
+
+
+def test_extract_all_with_limits(runner: CliRunner, test_output_dir: Path):
+    """With per file limits, files are extracted in killable workers."""
+    base_dir = test_output_dir / "extract_all_limits"
+    path_in = make_input_dir(base_dir / "in", count=2)
+    (path_in / "broken.pdf").write_bytes(b"not a pdf")
+    metrics_path = base_dir / "metrics.json"
+    result = runner.invoke(
+        app,
+        [
+            "extract",
+            "all",
+            str(path_in),
+            str(base_dir / "out"),
+            "--timeout-per-file",
+            "60",
+            "--max-memory-per-file",
+            "4096",
+            "--metrics-out",
+            str(metrics_path),
+        ],
+    )
+    assert result.exit_code == 0, result.stdout
+    assert (base_dir / "out" / "sample_0.txt").is_file()
+    data = json.loads(metrics_path.read_text())
+    assert data["summary"]["files"] == 1
+    assert data["failures"][0]["path_in"].endswith("broken.pdf")
+
+
+def test_extract_all_resume(runner: CliRunner, test_output_dir: Path):
+    """A resumed run only extracts the files the journal does not list."""
+    base_dir = test_output_dir / "extract_all_resume"
+    if base_dir.exists():
+        shutil.rmtree(base_dir)
+    path_in = make_input_dir(base_dir / "in", count=4)
+    (path_in / "broken.pdf").write_bytes(b"not a pdf")
+    path_out = base_dir / "out"
+    args = ["extract", "all", str(path_in), str(path_out), "--recurse"]
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.stdout
+    # A failed extraction leaves neither a text file nor a temporary file.
+    assert not list(path_out.glob("*broken*"))
+    # Pretend the run was killed after two files, part way through a journal line.
+    journal_path = path_out / ".pdf2txt-journal.jsonl"
+    header, first, second, *_ = journal_path.read_text().splitlines()
+    journal_path.write_text(f"{header}\n{first}\n{second[:10]}")
+    done = {json.loads(first)["path_in"]}
+    # The second file's output was renamed into place, but not journaled.
+    done.add(json.loads(second)["path_in"])
+    for output in path_out.glob("**/*.txt"):
+        if output.relative_to(path_out).with_suffix(".pdf").as_posix() not in done:
+            output.unlink()
+    result = runner.invoke(app, [*args, "--resume"])
+    assert result.exit_code == 0, result.stdout
+    assert "exists" not in result.output
+    assert len(list(path_out.glob("**/*.txt"))) == 4
+    lines = journal_path.read_text().splitlines()
+    # The header, the first file, the partial line, and the three extracted again.
+    assert len(lines) == 6
+    result = runner.invoke(app, [*args, "--resume", "--layout", "none"])
+    assert result.exit_code == 2
+
+
+def test_extract_all_bad_path_out(runner: CliRunner, test_output_dir: Path):
+    """A file as PATH_OUT, or no pdf files, is an error that creates nothing."""
+    base_dir = test_output_dir / "extract_all_bad_path_out"
+    if base_dir.exists():
+        shutil.rmtree(base_dir)
+    path_in = make_input_dir(base_dir / "in", count=1)
+    not_a_dir = base_dir / "out.txt"
+    not_a_dir.write_text("keep")
+    result = runner.invoke(app, ["extract", "all", str(path_in), str(not_a_dir)])
+    assert result.exit_code == 2
+    assert "existing file" in result.output
+    assert not_a_dir.read_text() == "keep"
+    empty_dir = base_dir / "empty"
+    empty_dir.mkdir()
+    path_out = base_dir / "out"
+    result = runner.invoke(app, ["extract", "all", str(empty_dir), str(path_out)])
+    assert result.exit_code == 2
+    assert "No pdf files" in result.output
+    assert not path_out.exists()
+
+
+def test_extract_all_sinks(runner: CliRunner, test_output_dir: Path):
+    """Each sink holds the same text as the text files."""
+    base_dir = test_output_dir / "extract_all_sinks"
+    path_in = make_input_dir(base_dir / "in", count=3)
+    files_out = base_dir / "files"
+    args = ["extract", "all", str(path_in), "--recurse", "--overwrite"]
+    result = runner.invoke(app, [*args, str(files_out)])
+    assert result.exit_code == 0, result.stdout
+    expected = {
+        path.relative_to(files_out).with_suffix(".pdf").as_posix(): path.read_bytes()
+        for path in files_out.glob("**/*.txt")
+    }
+    assert len(expected) == 3
+    for sink in ("jsonl", "sqlite", "tar"):
+        container = base_dir / f"texts.{sink}"
+        result = runner.invoke(app, [*args, str(container), "--sink", sink])
+        assert result.exit_code == 0, result.stdout
+        if sink == "jsonl":
+            documents = [
+                json.loads(line) for line in container.read_text().splitlines()
+            ]
+            found = {doc["path"]: doc["text"].encode() for doc in documents}
+            assert all(doc["pages"] == 2 for doc in documents)
+        elif sink == "sqlite":
+            with closing(sqlite3.connect(container)) as connection:
+                rows = connection.execute("SELECT path, text FROM documents")
+                found = {path: text.encode() for path, text in rows}
+        else:
+            with tarfile.open(container) as tar:
+                found = {
+                    str(
+                        PurePosixPath(member.name).with_suffix(".pdf")
+                    ): tar.extractfile(member).read()
+                    for member in tar.getmembers()
+                }
+        assert found == expected, sink
+    # A halted run leaves the earlier container in place, and no temporary file.
+    container = base_dir / "texts.jsonl"
+    before = container.read_bytes()
+    (path_in / "broken.pdf").write_bytes(b"not a pdf")
+    result = runner.invoke(
+        app, [*args, str(container), "--sink", "jsonl", "--halt-on-fail"]
+    )
+    (path_in / "broken.pdf").unlink()
+    assert result.exit_code != 0
+    assert container.read_bytes() == before
+    assert [path.name for path in base_dir.glob(".*")] == []
+
+
+def test_extract_all_compressed(runner: CliRunner, test_output_dir: Path):
+    """Compressed text files hold the same text, and work with incremental runs."""
+    base_dir = test_output_dir / "extract_all_compressed"
+    if base_dir.exists():
+        shutil.rmtree(base_dir)
+    path_in = make_input_dir(base_dir / "in", count=1)
+    files_out = base_dir / "files"
+    result = runner.invoke(app, ["extract", "all", str(path_in), str(files_out)])
+    assert result.exit_code == 0, result.stdout
+    expected = (files_out / "sample_0.txt").read_bytes()
+    for compress, open_func in (
+        ("gzip", gzip.open),
+        ("xz", lzma.open),
+        ("bz2", bz2.open),
+    ):
+        path_out = base_dir / compress
+        args = ["extract", "all", str(path_in), str(path_out), "--incremental"]
+        args += ["--compress", compress, "--compress-level", "1"]
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0, result.stdout
+        (output,) = path_out.glob("*.txt.*")
+        assert output.name == f"sample_0.txt{SUFFIXES[Compression(compress)]}"
+        with open_func(output, mode="rb") as fp_in:
+            assert fp_in.read() == expected
+        mtime = output.stat().st_mtime_ns
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0, result.stdout
+        assert output.stat().st_mtime_ns == mtime
+
+
+def test_extract_all_dedupe(runner: CliRunner, test_output_dir: Path):
+    """Identical inputs are extracted once, and their outputs reproduced."""
+    base_dir = test_output_dir / "extract_all_dedupe"
+    if base_dir.exists():
+        shutil.rmtree(base_dir)
+    path_in = make_input_dir(base_dir / "in", count=3)
+    spec = CorpusSpec(pages=1, font="Helvetica", density="sparse")
+    (path_in / spec.name).write_bytes(build_pdf(spec))
+    for link in ("hardlink", "reflink", "copy"):
+        metrics_path = base_dir / f"{link}.json"
+        path_out = base_dir / link
+        result = runner.invoke(
+            app,
+            [
+                "extract",
+                "all",
+                str(path_in),
+                str(path_out),
+                "--recurse",
+                "--dedupe",
+                "--dedupe-link",
+                link,
+                "--metrics-out",
+                str(metrics_path),
+            ],
+        )
+        assert result.exit_code == 0, result.stdout
+        summary = json.loads(metrics_path.read_text())["summary"]
+        assert summary["files"] == 2
+        assert summary["parses_saved"] == 2
+        expected = (path_out / "sample_0.txt").read_bytes()
+        assert (path_out / "sub" / "sample_1.txt").read_bytes() == expected
+        assert (path_out / "sample_2.txt").read_bytes() == expected
+        assert (path_out / Path(spec.name).with_suffix(".txt")).exists()
+        if link == "hardlink":
+            assert (path_out / "sample_2.txt").stat().st_nlink == 3
+
+
+def test_extract_all_page_cache(runner: CliRunner, test_output_dir: Path):
+    """A second run takes its pages from the page cache."""
+    base_dir = test_output_dir / "extract_all_page_cache"
+    if base_dir.exists():
+        shutil.rmtree(base_dir)
+    path_in = make_input_dir(base_dir / "in", count=1)
+    metrics_path = base_dir / "metrics.json"
+    args = ["extract", "all", str(path_in), str(base_dir / "out"), "--overwrite"]
+    args += ["--page-cache", str(base_dir / "pages.sqlite3")]
+    args += ["--metrics-out", str(metrics_path)]
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.stdout
+    expected = (base_dir / "out" / "sample_0.txt").read_bytes()
+    assert json.loads(metrics_path.read_text())["summary"]["page_cache"]["misses"] == 2
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.stdout
+    assert (base_dir / "out" / "sample_0.txt").read_bytes() == expected
+    page_cache = json.loads(metrics_path.read_text())["summary"]["page_cache"]
+    assert page_cache == {"hits": 2, "misses": 0, "hit_rate": 1.0}
+
+
+def test_extract_all_shards(runner: CliRunner, test_output_dir: Path):
+    """Shards split the inputs, and merge checks that they cover them once."""
+    base_dir = test_output_dir / "extract_all_shards"
+    if base_dir.exists():
+        shutil.rmtree(base_dir)
+    path_in = make_input_dir(base_dir / "in", count=6)
+    manifests = []
+    for index in (1, 2, 3):
+        path_out = base_dir / f"node_{index}"
+        result = runner.invoke(
+            app,
+            ["extract", "all", str(path_in), str(path_out), "--recurse"]
+            + ["--shard", f"{index}/3"],
+        )
+        assert result.exit_code == 0, result.stdout
+        (manifest,) = path_out.glob(f".pdf2txt-shard-{index}-of-3.json")
+        manifests.append(manifest)
+    extracted = sorted(
+        path.relative_to(node_dir).with_suffix(".pdf").as_posix()
+        for node_dir in base_dir.glob("node_*")
+        for path in node_dir.glob("**/*.txt")
+    )
+    assert extracted == sorted(
+        path.relative_to(path_in).as_posix() for path in path_in.glob("**/*.pdf")
+    )
+    report_path = base_dir / "merged.json"
+    args = ["extract", "merge", *map(str, manifests), "--path-in", str(path_in)]
+    args += ["--recurse", "--report-out", str(report_path)]
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.stdout
+    report = json.loads(report_path.read_text())
+    assert report["files"] == 6
+    assert report["status_counts"] == {"extracted": 6}
+    assert report["pages"] == 12
+    result = runner.invoke(app, ["extract", "merge", *map(str, manifests[:2])])
+    assert result.exit_code == 1
+    assert "Missing shards [3] of 3." in result.output
+    result = runner.invoke(
+        app, ["extract", "all", str(path_in), str(base_dir / "bad"), "--shard", "4/3"]
+    )
+    assert result.exit_code == 2
+
+
+def test_extract_all_progress_jsonl(runner: CliRunner, test_output_dir: Path):
+    """Json lines progress events on stderr report every file and the totals."""
+    base_dir = test_output_dir / "extract_all_progress_jsonl"
+    if base_dir.exists():
+        shutil.rmtree(base_dir)
+    path_in = make_input_dir(base_dir / "in", count=2)
+    (path_in / "broken.pdf").write_bytes(b"not a pdf")
+    args = ["extract", "all", str(path_in), str(base_dir / "out"), "--recurse"]
+    args += ["--workers", "2", "--progress", "jsonl"]
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.output
+    events = [json.loads(line) for line in result.stderr.splitlines()]
+    assert events[0]["event"] == "start"
+    assert events[-1]["event"] == "finish"
+    files = {Path(e["path"]).name: e for e in events if e["event"] == "file"}
+    assert files.keys() == {"sample_0.pdf", "sample_1.pdf", "broken.pdf"}
+    assert files["sample_0.pdf"]["ok"] and files["sample_0.pdf"]["pages"] == 2
+    assert not files["broken.pdf"]["ok"] and files["broken.pdf"]["error"]
+    assert events[-1]["files_done"] == 3
+    assert events[-1]["files_failed"] == 1
+    assert events[-1]["pages"] == 4
+    assert events[-1]["bytes_done"] == events[-1]["bytes_found"]
+
+
+def test_extract_all_prometheus_out(runner: CliRunner, test_output_dir: Path):
+    """The run's counters, failures, and latency histogram are exported."""
+    base_dir = test_output_dir / "extract_all_prometheus_out"
+    if base_dir.exists():
+        shutil.rmtree(base_dir)
+    path_in = make_input_dir(base_dir / "in", count=2)
+    (path_in / "broken.pdf").write_bytes(b"not a pdf")
+    prom_path = base_dir / "textfile" / "pdf2txt.prom"
+    args = ["extract", "all", str(path_in), str(base_dir / "out"), "--recurse"]
+    args += ["--prometheus-out", str(prom_path)]
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.output
+    samples = {}
+    for line in prom_path.read_text().splitlines():
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    assert samples['pdf2txt_files_total{status="extracted"}'] == 2
+    assert samples['pdf2txt_files_total{status="failed"}'] == 1
+    assert samples['pdf2txt_failures_total{error_type="PDFSyntaxError"}'] == 1
+    assert samples["pdf2txt_pages_total"] == 4
+    assert samples["pdf2txt_chars_out_total"] > 0
+    assert samples['pdf2txt_file_seconds_bucket{le="+Inf"}'] == 2
+    assert samples["pdf2txt_file_seconds_count"] == 2
+    assert samples["pdf2txt_run_running"] == 0
+    assert samples["pdf2txt_run_elapsed_seconds"] > 0
+
+
+def test_extract_watch(runner: CliRunner, test_output_dir: Path):
+    """Watch extracts the files that are not current, and exits once idle."""
+    base_dir = test_output_dir / "extract_watch"
+    if base_dir.exists():
+        shutil.rmtree(base_dir)
+    path_in = make_input_dir(base_dir / "in", count=2)
+    path_out = base_dir / "out"
+    args = ["extract", "watch", str(path_in), str(path_out), "--recurse"]
+    args += ["--poll-interval", "0.05", "--debounce", "0", "--max-idle", "0.5"]
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.output
+    assert (path_out / "sample_0.txt").is_file()
+    assert (path_out / "sub" / "sample_1.txt").is_file()
+    assert result.stdout.count("Extracted") == 2
+    # The manifest makes the next watch skip the files it already extracted.
+    os.utime(path_in / "sample_0.pdf", ns=(0, 0))
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.output
+    assert "Extracted" not in result.stdout
+
+
+class ScriptedIndex:
+    """Stands in for a DirectoryIndex, with the ready files of each poll given."""
+
+    settling = 0
+
+    def __init__(self, polls: list[list[Path]]):
+        """Make an index whose polls find these files, then none."""
+        self.polls = polls
+
+    def poll(self) -> list[tuple[Path, os.stat_result]]:
+        """The files of the next poll."""
+        paths = self.polls.pop(0) if self.polls else []
+        return [(path, path.stat()) for path in paths]
+
+
+def test_watch_jobs_one_job_per_file(test_output_dir: Path):
+    """A file ready again while its job runs waits, and replaces its queued job."""
+    base_dir = test_output_dir / "watch_one_job_per_file"
+    path_in = make_input_dir(base_dir / "in", count=1) / "sample_0.pdf"
+    made: list[ExtractJob] = []
+
+    def make_job(path: Path, stat: os.stat_result) -> ExtractJob:
+        job = ExtractJob(path_in=path, path_out=base_dir / "out.txt", overwrite=True)
+        made.append(job)
+        return job
+
+    # The first job is still starting its worker when the file is ready again.
+    index = ScriptedIndex([[path_in], [path_in], [path_in]])
+    results = list(
+        watch_jobs(index, make_job, workers=2, poll_interval=0.01, max_idle=0.2)
+    )
+    assert len(made) == 3
+    assert [result.job for result in results] == [made[0], made[2]]
+    assert all(result.error is None for result in results)
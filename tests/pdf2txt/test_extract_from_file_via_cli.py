@@ -31,3 +31,77 @@ def test_extract_pdf(runner: CliRunner, test_output_dir: Path):
         assert output_path.is_file()
         text = output_path.read_text()
         assert "Ipsum" in text
+
+
+def test_extract_pdf_page_ranges(runner: CliRunner, test_output_dir: Path):
+    """Extracting page ranges in parallel gives the same output as a serial run."""
+    file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+    with resources.as_file(file_resource) as input_path:
+        output_dir = test_output_dir.joinpath(Path("extract_page_ranges"))
+        serial_path = output_dir / "serial.txt"
+        parallel_path = output_dir / "parallel.txt"
+        result = runner.invoke(
+            app, ["extract", "text", str(input_path), str(serial_path)]
+        )
+        assert result.exit_code == 0
+        result = runner.invoke(
+            app,
+            [
+                "extract",
+                "text",
+                str(input_path),
+                str(parallel_path),
+                "--workers",
+                "2",
+                "--pages-per-chunk",
+                "1",
+            ],
+        )
+        print(result.stdout)
+        assert result.exit_code == 0
+        assert parallel_path.read_bytes() == serial_path.read_bytes()
+
+
+def test_extract_pdf_to_stdout(runner: CliRunner, test_output_dir: Path):
+    """Extracting to - writes the same text to stdout as to a file."""
+    file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+    with resources.as_file(file_resource) as input_path:
+        output_path = test_output_dir.joinpath(Path("extract_to_stdout"), "file.txt")
+        result = runner.invoke(
+            app, ["extract", "text", str(input_path), str(output_path)]
+        )
+        assert result.exit_code == 0
+        result = runner.invoke(app, ["extract", "text", str(input_path), "-"])
+        assert result.exit_code == 0
+        assert result.stdout == output_path.read_bytes().decode("utf-8")
+
+
+def test_extract_pdf_layout_modes(runner: CliRunner, test_output_dir: Path):
+    """The fast and none layout modes still find the text."""
+    file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+    with resources.as_file(file_resource) as input_path:
+        output_dir = test_output_dir.joinpath(Path("extract_layout_modes"))
+        texts = {}
+        for layout in ("full", "fast", "none"):
+            output_path = output_dir / f"{layout}.txt"
+            result = runner.invoke(
+                app,
+                [
+                    "extract",
+                    "text",
+                    str(input_path),
+                    str(output_path),
+                    "--layout",
+                    layout,
+                ],
+            )
+            assert result.exit_code == 0
+            texts[layout] = output_path.read_bytes().decode("utf-8")
+        assert "Ipsum" in texts["fast"]
+        # The same lines as full, only without the blank lines between boxes.
+        assert sorted(filter(str.strip, texts["fast"].splitlines())) == sorted(
+            filter(str.strip, texts["full"].splitlines())
+        )
+        assert "Ipsum" in texts["none"]
+        assert "\n" not in texts["none"]
+        assert "\n" in texts["full"]
@@ -0,0 +1,50 @@
+"""Test running work in worker processes with limits."""
+
+import time
+
+import pytest
+
+from pfmsoft.pdf2txt.isolation import (
+    MEMORY_LIMIT_SUPPORTED,
+    WorkMemoryError,
+    WorkTimeoutError,
+    run_with_limits,
+)
+
+
+def work(item: str) -> str:
+    """Misbehave as described by the item."""
+    if item == "slow":
+        time.sleep(60)
+    elif item == "big":
+        _ = bytearray(4 * 1024 * 1024 * 1024)
+    elif item == "raise":
+        raise ValueError("bad item")
+    return item.upper()
+
+
+def test_run_with_limits_timeout():
+    """A slow item is stopped, and the other items still complete."""
+    results = {
+        item: (result, error)
+        for item, result, error in run_with_limits(
+            work, ["ok", "slow", "raise", "fine"], workers=2, timeout=2
+        )
+    }
+    assert results["ok"] == ("OK", None)
+    assert results["fine"] == ("FINE", None)
+    assert isinstance(results["slow"][1], WorkTimeoutError)
+    assert isinstance(results["raise"][1], ValueError)
+
+
+@pytest.mark.skipif(not MEMORY_LIMIT_SUPPORTED, reason="Needs RLIMIT_AS.")
+def test_run_with_limits_memory():
+    """An item that allocates too much is stopped, and its worker replaced."""
+    results = {
+        item: (result, error)
+        for item, result, error in run_with_limits(
+            work, ["big", "ok"], workers=1, max_memory=2 * 1024 * 1024 * 1024
+        )
+    }
+    assert isinstance(results["big"][1], WorkMemoryError)
+    assert results["ok"] == ("OK", None)
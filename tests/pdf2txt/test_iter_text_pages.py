@@ -0,0 +1,155 @@
+"""Test the page by page library api."""
+
+from importlib import resources
+from pathlib import Path
+
+import pytest
+
+from pfmsoft.pdf2txt.extract_txt import extract_text_from_pdf, iter_text_pages
+from pfmsoft.pdf2txt.metrics import ExtractMetrics
+from pfmsoft.pdf2txt.options import LayoutMode
+from pfmsoft.pdf2txt.page_cache import PageCache
+from pfmsoft.pdf2txt.resource_cache import FontCache
+from tests.resources.pdf import PDF_ANCHOR
+
+DATA_FILE_NAME = "sample.pdf"
+
+
+def test_iter_text_pages_sources():
+    """Paths, bytes, and file objects give the same pages."""
+    file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+    with resources.as_file(file_resource) as input_path:
+        from_path = list(iter_text_pages(input_path))
+        from_bytes = list(iter_text_pages(input_path.read_bytes()))
+        with open(input_path, mode="rb") as fp_in:
+            from_file = list(iter_text_pages(fp_in))
+            assert not fp_in.closed
+    assert [number for number, _ in from_path] == [1, 2]
+    assert "Ipsum" in from_path[0][1]
+    assert all(text.endswith("\f") for _, text in from_path)
+    assert from_path == from_bytes == from_file
+
+
+def test_iter_text_pages_range():
+    """Only the requested pages are extracted."""
+    file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+    with resources.as_file(file_resource) as input_path:
+        all_pages = list(iter_text_pages(input_path))
+        assert list(iter_text_pages(input_path, last_page=1)) == all_pages[:1]
+        assert list(iter_text_pages(input_path, first_page=2)) == all_pages[1:]
+        with pytest.raises(ValueError):
+            list(iter_text_pages(input_path, first_page=2, last_page=1))
+
+
+def test_iter_text_pages_on_page():
+    """Each page is reported with the page count, before it is yielded."""
+    file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+    events = []
+    with resources.as_file(file_resource) as input_path:
+        for number, _ in iter_text_pages(
+            input_path,
+            first_page=2,
+            on_page=lambda page, count: events.append((page, count)),
+        ):
+            assert events[-1] == (number, 2)
+    assert events == [(2, 2)]
+
+
+def test_iter_text_pages_font_cache():
+    """A second document reuses the fonts decoded for the first."""
+    file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+    with resources.as_file(file_resource) as input_path:
+        uncached = list(iter_text_pages(input_path))
+        first, second = ExtractMetrics(), ExtractMetrics()
+        # An unusual size, so the test starts with an empty cache of its own.
+        assert (
+            list(iter_text_pages(input_path, metrics=first, font_cache_size=7))
+            == uncached
+        )
+        assert (
+            list(iter_text_pages(input_path, metrics=second, font_cache_size=7))
+            == uncached
+        )
+    assert first.font_cache_misses > 0
+    assert first.font_cache_hits == 0
+    assert second.font_cache_hits == first.font_cache_misses
+    assert second.font_cache_misses == 0
+
+
+def test_font_cache_evicts_least_recently_used():
+    """The cache keeps at most its size, evicting the least recently used."""
+    cache = FontCache(max_fonts=2)
+    fonts = [object(), object(), object()]
+    cache.put(b"a", fonts[0])  # type: ignore[arg-type]
+    cache.put(b"b", fonts[1])  # type: ignore[arg-type]
+    assert cache.get(b"a") is fonts[0]
+    cache.put(b"c", fonts[2])  # type: ignore[arg-type]
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") is fonts[0]
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 1, 1)
+
+
+def test_iter_text_pages_page_cache(test_output_dir: Path):
+    """Cached pages give the same text, and are keyed by the layout settings."""
+    cache_path = test_output_dir / "page_cache" / "pages.sqlite3"
+    cache_path.unlink(missing_ok=True)
+    cache = PageCache(cache_path)
+    file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+    with resources.as_file(file_resource) as input_path:
+        uncached = list(iter_text_pages(input_path))
+        first, second, fast = ExtractMetrics(), ExtractMetrics(), ExtractMetrics()
+        assert list(iter_text_pages(input_path, metrics=first, page_cache=cache)) == (
+            uncached
+        )
+        assert (
+            list(iter_text_pages(input_path, metrics=second, page_cache=cache))
+            == uncached
+        )
+        list(
+            iter_text_pages(
+                input_path, layout=LayoutMode.FAST, metrics=fast, page_cache=cache
+            )
+        )
+    assert (first.page_cache_hits, first.page_cache_misses) == (0, 2)
+    assert (second.page_cache_hits, second.page_cache_misses) == (2, 0)
+    assert (fast.page_cache_hits, fast.page_cache_misses) == (0, 2)
+    assert second.layout_seconds == 0
+    stats = cache.stats()
+    assert stats["entries"] == 4
+    assert stats["hit_rate"] == 2 / 6
+    cache.close()
+
+
+def test_page_cache_evicts_least_recently_used(test_output_dir: Path):
+    """Committing over the size limit evicts the least recently used pages."""
+    cache_path = test_output_dir / "page_cache" / "evict.sqlite3"
+    cache_path.unlink(missing_ok=True)
+    cache = PageCache(cache_path, max_bytes=20)
+    cache.put(b"a", "x" * 8)
+    cache.put(b"b", "y" * 8)
+    cache.commit()
+    assert cache.get(b"a") == "x" * 8
+    cache.commit()
+    cache.put(b"c", "z" * 8)
+    cache.commit()
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") == "x" * 8
+    assert cache.stats()["bytes"] <= 20
+    cache.close()
+
+
+def test_extract_text_from_pdf_size_from_open_file(monkeypatch: pytest.MonkeyPatch):
+    """The input size comes from the open file, without another stat of the path."""
+    file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+    with resources.as_file(file_resource) as input_path:
+        size = input_path.stat().st_size
+        path_stat = Path.stat
+
+        def no_input_stat(path: Path, *args, **kwargs):
+            assert path != input_path, "The input was stat'd by path."
+            return path_stat(path, *args, **kwargs)
+
+        monkeypatch.setattr(Path, "stat", no_input_stat)
+        _, metrics = extract_text_from_pdf(input_path)
+    assert metrics.bytes_in == size
@@ -0,0 +1,38 @@
+"""Test profiling extraction runs."""
+
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from pfmsoft.pdf2txt.cli.main_typer import app
+from tests.pdf2txt.test_extract_all_via_cli import make_input_dir
+
+
+def test_profile_extract_all_workers(runner: CliRunner, test_output_dir: Path):
+    """Each file gets a profile, including those run in worker processes."""
+    base_dir = test_output_dir / "profile_extract_all"
+    path_in = make_input_dir(base_dir / "in", count=2)
+    profile_dir = base_dir / "profile"
+    result = runner.invoke(
+        app,
+        [
+            "--profile",
+            str(profile_dir),
+            "--profile-top",
+            "5",
+            "extract",
+            "all",
+            str(path_in),
+            str(base_dir / "out"),
+            "--recurse",
+            "--workers",
+            "2",
+        ],
+    )
+    print(result.stdout)
+    assert result.exit_code == 0
+    assert len(list(profile_dir.glob("sample_*.pstats"))) == 2
+    assert (profile_dir / "run.pstats").is_file()
+    report = (profile_dir / "report.txt").read_text()
+    assert "Internal time by source file" in report
+    assert "pdfminer" in report
@@ -0,0 +1,79 @@
+"""Test the extraction server and its client."""
+
+import os
+import signal
+import threading
+from importlib import resources
+from pathlib import Path
+
+from pfmsoft.pdf2txt.client import ExtractClient
+from pfmsoft.pdf2txt.extract_txt import extract_text_from_pdf
+from pfmsoft.pdf2txt.server import ExtractServer, ServeRequest
+from tests.resources.pdf import PDF_ANCHOR
+
+DATA_FILE_NAME = "sample.pdf"
+
+
+def test_server_round_trip(test_output_dir: Path):
+    """Requests on one connection run concurrently, and each gets a response."""
+    base_dir = test_output_dir / "server"
+    base_dir.mkdir(parents=True, exist_ok=True)
+    socket_path = base_dir / "pdf2txt.sock"
+    server = ExtractServer(socket_path=socket_path, workers=2, queue_size=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+        with resources.as_file(file_resource) as input_path:
+            expected, _ = extract_text_from_pdf(input_path)
+            client = ExtractClient(socket_path, timeout=60)
+            response = client.extract(input_path)
+            assert response.ok, response.error
+            assert response.text == expected
+            assert response.metrics["pages"] == 2
+            requests = [
+                ServeRequest(id=idx, path_in=str(input_path)) for idx in range(4)
+            ]
+            requests.append(ServeRequest(id="missing", path_in=str(base_dir / "x")))
+            requests.append(
+                ServeRequest(
+                    id="to-file",
+                    path_in=str(input_path),
+                    path_out=str(base_dir / "out.txt"),
+                    overwrite=True,
+                )
+            )
+            responses = {r.id: r for r in client.extract_many(requests)}
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert set(responses) == {0, 1, 2, 3, "missing", "to-file"}
+    assert all(responses[idx].text == expected for idx in range(4))
+    assert responses["missing"].error_type == "FileNotFoundError"
+    assert responses["to-file"].text is None
+    assert (base_dir / "out.txt").read_bytes().decode("utf-8") == expected
+    assert not socket_path.exists()
+
+
+def test_server_replaces_dead_worker(test_output_dir: Path):
+    """After a worker is killed, every request gets a response, and the server recovers."""
+    base_dir = test_output_dir / "server_dead_worker"
+    base_dir.mkdir(parents=True, exist_ok=True)
+    socket_path = base_dir / "pdf2txt.sock"
+    server = ExtractServer(socket_path=socket_path, workers=1, queue_size=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        file_resource = resources.files(PDF_ANCHOR).joinpath(DATA_FILE_NAME)
+        with resources.as_file(file_resource) as input_path:
+            client = ExtractClient(socket_path, timeout=60)
+            assert client.extract(input_path).ok
+            os.kill(server.executor.submit(os.getpid).result(), signal.SIGKILL)
+            # Requests may fail until the dead worker is noticed, but each gets a
+            # response, and no slot of the queue of 1 is lost.
+            responses = [client.extract(input_path) for _ in range(3)]
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert all(r.ok or r.error_type == "BrokenProcessPool" for r in responses)
+    assert responses[-1].ok, responses[-1].error